@@ -0,0 +1,222 @@
+import hashlib
+import json
+import time
+import numpy as np
+
+from src.screening import get_ligand_descriptors
+
+
+class FakeMolecule:
+    """
+    Stand-in for the molecule returned by Architector's convert_io_molecule().
+    """
+
+    def __init__(self, xyz: str) -> None:
+        """
+        Initializes a `FakeMolecule` instance.
+
+        Args:
+            xyz (str): Geometry in XYZ format.
+        """
+        self.xyz = xyz
+
+    def write_xyz(self, path: str, writestring: bool = False) -> str | None:
+        """
+        Save the geometry in XYZ format.
+
+        Args:
+            path (str): Path to the XYZ file.
+            writestring (bool, optional): Return the geometry instead of writing the file. Defaults to False.
+
+        Returns:
+            str | None: The geometry if writestring is set.
+        """
+        if writestring:
+            return self.xyz
+        with open(path, "w") as file:
+            file.write(self.xyz)
+
+
+class FakeBackend:
+    """
+    Deterministic stand-in for Architector, to measure the throughput of the package without
+    real chemistry. Pass it to `Optimiser` as `backend`.
+
+    For every input, build_complex() waits for a configurable time and returns random
+    conformers with the metal at the origin. relax_complex() waits for a fraction of that
+    time and returns the given structure slightly displaced. The random numbers are seeded by the input,
+    so repeated runs produce identical outputs. The number of atoms follows the ligands, one
+    heavy atom and `hydrogens_per_atom` hydrogens per heavy ligand atom, unless `n_atoms` is set.
+
+    Initialize via:
+
+    ```python
+    backend = FakeBackend(latency=0.05, jitter=0.5)
+    Optimiser(root, settings, backend=backend).run(dataset)
+    ```
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_per_atom: float = 0.0,
+        jitter: float = 0.0,
+        busy: bool = False,
+        n_atoms: int | None = None,
+        hydrogens_per_atom: float = 1.0,
+        n_conformers: int = 1,
+        failure_rate: float = 0.0,
+        relax_speedup: float = 10.0,
+    ) -> None:
+        """
+        Initializes a `FakeBackend` instance.
+
+        Args:
+            latency (float, optional): Seconds per call of build_complex(). Defaults to 0.0.
+            latency_per_atom (float, optional): Additional seconds per atom of the complex. Defaults to 0.0.
+            jitter (float, optional): Standard deviation of the log-normal factor applied to the latency. Defaults to 0.0.
+            busy (bool, optional): Spend the latency computing instead of sleeping, to model CPU-bound
+                optimisations. Defaults to False.
+            n_atoms (int | None, optional): Number of atoms of every complex. Defaults to None.
+            hydrogens_per_atom (float, optional): Hydrogens per heavy ligand atom if `n_atoms` is None. Defaults to 1.0.
+            n_conformers (int, optional): Number of conformers returned per call. Defaults to 1.
+            failure_rate (float, optional): Fraction of inputs for which build_complex() raises. Defaults to 0.0.
+            relax_speedup (float, optional): Factor by which relax_complex() is faster than build_complex()
+                for a complex of the same size. Defaults to 10.0.
+        """
+        self.latency = latency
+        self.latency_per_atom = latency_per_atom
+        self.jitter = jitter
+        self.busy = busy
+        self.n_atoms = n_atoms
+        self.hydrogens_per_atom = hydrogens_per_atom
+        self.n_conformers = n_conformers
+        self.failure_rate = failure_rate
+        self.relax_speedup = relax_speedup
+
+    def build_complex(self, inp: dict) -> dict:
+        """
+        Build the conformers of a complex.
+
+        Args:
+            inp (dict): Input of Architector's build_complex(), see `Optimiser.get_architector_input`.
+
+        Raises:
+            RuntimeError: For a fraction `failure_rate` of all inputs.
+
+        Returns:
+            dict: Conformers by name, with "mol2string" in XYZ format, "total_charge",
+                "calc_n_unpaired_electrons" and "energy".
+        """
+        digest = hashlib.sha256(json.dumps(inp, sort_keys=True).encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+        charge = inp["parameters"].get("metal_ox", 0)
+        heavy_atoms = 0
+        for ligand in inp["ligands"]:
+            ligand_charge, ligand_heavy_atoms = get_ligand_descriptors(ligand["smiles"])
+            charge += ligand_charge
+            heavy_atoms += ligand_heavy_atoms
+        n_atoms = (
+            1 + heavy_atoms + round(self.hydrogens_per_atom * heavy_atoms)
+            if self.n_atoms is None
+            else self.n_atoms
+        )
+
+        seconds = self.latency + self.latency_per_atom * n_atoms
+        if self.jitter > 0:
+            seconds *= rng.lognormal(0.0, self.jitter)
+        self._wait(seconds)
+
+        if rng.random() < self.failure_rate:
+            raise RuntimeError("Fake optimisation failed.")
+
+        elements = [inp["core"]["metal"]] + ["C"] * heavy_atoms
+        elements += ["H"] * (n_atoms - len(elements))
+        elements = elements[:n_atoms]
+
+        out = {}
+        for i in range(self.n_conformers):
+            coordinates = rng.normal(0.0, 3.0, (n_atoms, 3))
+            coordinates[0] = 0.0
+            lines = [str(n_atoms), ""]
+            for element, (x, y, z) in zip(elements, coordinates):
+                lines.append(f"{element} {x:.8f} {y:.8f} {z:.8f}")
+            out[f"conformer_{i}"] = {
+                "mol2string": "\n".join(lines) + "\n",
+                "total_charge": int(charge),
+                "calc_n_unpaired_electrons": int(inp["parameters"].get("full_spin", 0)),
+                "energy": float(rng.normal(-100.0, 1.0)),
+            }
+        return out
+
+    def relax_complex(
+        self, structure: str, charge: int, n_unpaired: int, parameters: dict
+    ) -> dict:
+        """
+        Relax a given structure, see `relax_complex`.
+
+        Args:
+            structure (str): Starting geometry in XYZ format.
+            charge (int): Total charge.
+            n_unpaired (int): Number of unpaired electrons.
+            parameters (dict): Settings of the relaxation.
+
+        Raises:
+            RuntimeError: For a fraction `failure_rate` of all inputs.
+
+        Returns:
+            dict: A single conformer "relaxed" with the keys of a build_complex() conformer.
+        """
+        digest = hashlib.sha256(structure.encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+
+        lines = structure.strip().split("\n")
+        n_atoms = int(lines[0])
+        seconds = (self.latency + self.latency_per_atom * n_atoms) / self.relax_speedup
+        if self.jitter > 0:
+            seconds *= rng.lognormal(0.0, self.jitter)
+        self._wait(seconds)
+
+        if rng.random() < self.failure_rate:
+            raise RuntimeError("Fake relaxation failed.")
+
+        relaxed = [str(n_atoms), ""]
+        for line in lines[2 : 2 + n_atoms]:
+            element, *xyz = line.split()[:4]
+            x, y, z = np.array(xyz, dtype=float) + rng.normal(0.0, 0.01, 3)
+            relaxed.append(f"{element} {x:.8f} {y:.8f} {z:.8f}")
+        return {
+            "relaxed": {
+                "mol2string": "\n".join(relaxed) + "\n",
+                "total_charge": int(charge),
+                "calc_n_unpaired_electrons": int(n_unpaired),
+                "energy": float(rng.normal(-100.0, 1.0)),
+            }
+        }
+
+    def convert_io_molecule(self, structure: str) -> FakeMolecule:
+        """
+        Convert the structure of a conformer into a molecule.
+
+        Args:
+            structure (str): The "mol2string" of a conformer.
+
+        Returns:
+            FakeMolecule: The molecule.
+        """
+        return FakeMolecule(structure)
+
+    def _wait(self, seconds: float) -> None:
+        """
+        Wait by sleeping or, if `busy`, by computing.
+
+        Args:
+            seconds (float): Seconds to wait.
+        """
+        if not self.busy:
+            time.sleep(seconds)
+            return
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            sum(i * i for i in range(1000))
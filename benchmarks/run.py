@@ -0,0 +1,448 @@
+"""
+Offline benchmark suite of the package.
+
+Measures samples per second, files per second and peak memory of dataset generation,
+reading and writing, serial and parallel optimisation, mutation and warm-start relaxation
+of the mutated compounds, using `FakeBackend`
+instead of Architector. Every scenario runs in a fresh process. Run from the repository root:
+
+```bash
+python -m benchmarks.run --sizes 1e2 1e3 1e4 --latency 0.01
+python -m benchmarks.run --sizes 1e2 1e3 --compare benchmarks/results/<commit>.json
+```
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from src import Mutator, Optimiser, SampleDataset
+from src.bundle import Bundle
+from src.metrics import get_peak_rss
+
+from .backend import FakeBackend
+
+
+SCENARIOS = [
+    "generate",
+    "write",
+    "read",
+    "optimise_serial",
+    "optimise_parallel",
+    "mutate",
+    "relax",
+]
+"""All scenarios, in the order they depend on each other."""
+
+
+def get_peak_rss_children() -> int:
+    """
+    Get the largest peak resident memory of the terminated child processes.
+
+    Returns:
+        int: Peak resident memory in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_files(path: Path) -> int:
+    """
+    Count the files below a folder.
+
+    Args:
+        path (Path): The folder.
+
+    Returns:
+        int: Number of files.
+    """
+    return sum(len(files) for _, _, files in os.walk(path))
+
+
+def get_commit() -> str | None:
+    """
+    Get the commit of the repository.
+
+    Returns:
+        str | None: Hash of the checked out commit, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_generate(n: int, workdir: Path, config: dict) -> tuple[float, int, int]:
+    """
+    Generate a dataset and save it as input of the other scenarios. Saving is not measured.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of samples and number of files written.
+    """
+    dataset_path = workdir / "dataset.jsonl"
+    start = time.perf_counter()
+    dataset = SampleDataset.generate(
+        central_atom="La",
+        central_atom_OS=3,
+        central_atom_spin=1,
+        n_complexes=n,
+        min_CN=config["min_CN"],
+        max_CN=config["max_CN"],
+        rng=np.random.default_rng(config["seed"]),
+    )
+    seconds = time.perf_counter() - start
+    # input of the other scenarios
+    dataset.write(dataset_path)
+    return seconds, len(dataset), 0
+
+
+def bench_write(n: int, workdir: Path, config: dict) -> tuple[float, int, int]:
+    """
+    Write the dataset in JSON Lines format.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of samples and number of files written.
+    """
+    dataset = SampleDataset.read(workdir / "dataset.jsonl")
+    start = time.perf_counter()
+    dataset.write(workdir / "dataset_copy.jsonl")
+    return time.perf_counter() - start, len(dataset), 1
+
+
+def bench_read(n: int, workdir: Path, config: dict) -> tuple[float, int, int]:
+    """
+    Read the dataset in JSON Lines format.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of samples and number of files read.
+    """
+    start = time.perf_counter()
+    dataset = SampleDataset.read(workdir / "dataset.jsonl")
+    return time.perf_counter() - start, len(dataset), 1
+
+
+def bench_optimise(
+    n: int, workdir: Path, config: dict, name: str, nprocs: int
+) -> tuple[float, int, int]:
+    """
+    Optimise the dataset with `FakeBackend` in a new root folder.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of samples and number of files written.
+    """
+    dataset = SampleDataset.read(workdir / "dataset.jsonl")
+    root = workdir / name
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+    opt = Optimiser(
+        root,
+        {},
+        nprocs=nprocs,
+        chunksize=config["chunksize"],
+        output_format=config["output_format"],
+        background_writer=config["background_writer"],
+        backend=FakeBackend(**config["backend"]),
+    )
+    n_files = count_files(root)
+    start = time.perf_counter()
+    status = opt.run(dataset)
+    seconds = time.perf_counter() - start
+    return seconds, len(status), count_files(root) - n_files
+
+
+def bench_mutate(n: int, workdir: Path, config: dict) -> tuple[float, int, int]:
+    """
+    Mutate the outputs of the serial optimisation.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of mutated samples and number of files written.
+    """
+    source = workdir / "optimise_serial"
+    if config["output_format"] == "bundle":
+        source = source / Optimiser.bundle_dir
+        n_samples = len(Bundle(source))
+    else:
+        n_samples = sum(
+            1 for fp in source.iterdir() if (fp / Mutator.xyz_file).exists()
+        )
+    outdir = workdir / "mutate"
+    shutil.rmtree(outdir, ignore_errors=True)
+    mutator = Mutator(source, 3, 3, outdir, output_format=config["output_format"])
+    start = time.perf_counter()
+    mutator.mutate()
+    return time.perf_counter() - start, n_samples, count_files(outdir)
+
+
+def bench_relax(n: int, workdir: Path, config: dict) -> tuple[float, int, int]:
+    """
+    Relax the mutated compounds in parallel, starting from their mutated geometries.
+
+    Returns:
+        tuple[float, int, int]: Seconds, number of samples and number of files written.
+    """
+    root = workdir / "relax"
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+    opt = Optimiser(
+        root,
+        {},
+        nprocs=config["nprocs"],
+        chunksize=config["chunksize"],
+        output_format=config["output_format"],
+        background_writer=config["background_writer"],
+        backend=FakeBackend(**config["backend"]),
+        warm_start=workdir / "mutate",
+    )
+    n_files = count_files(root)
+    start = time.perf_counter()
+    status = opt.run()
+    seconds = time.perf_counter() - start
+    return seconds, len(status), count_files(root) - n_files
+
+
+def run_scenario(scenario: str, n: int, workdir: Path, config: dict) -> dict:
+    """
+    Run a scenario in the current process and measure it.
+
+    Args:
+        scenario (str): Name of the scenario, see `SCENARIOS`.
+        n (int): Number of samples.
+        workdir (Path): Folder of the dataset and outputs of this size.
+        config (dict): Settings of the suite.
+
+    Returns:
+        dict: Measurements of the scenario.
+    """
+    if scenario == "generate":
+        seconds, n_samples, n_files = bench_generate(n, workdir, config)
+    elif scenario == "write":
+        seconds, n_samples, n_files = bench_write(n, workdir, config)
+    elif scenario == "read":
+        seconds, n_samples, n_files = bench_read(n, workdir, config)
+    elif scenario == "optimise_serial":
+        seconds, n_samples, n_files = bench_optimise(n, workdir, config, scenario, 1)
+    elif scenario == "optimise_parallel":
+        seconds, n_samples, n_files = bench_optimise(
+            n, workdir, config, scenario, config["nprocs"]
+        )
+    elif scenario == "mutate":
+        seconds, n_samples, n_files = bench_mutate(n, workdir, config)
+    elif scenario == "relax":
+        seconds, n_samples, n_files = bench_relax(n, workdir, config)
+    else:
+        raise ValueError(f"Unknown scenario {scenario}.")
+
+    return {
+        "scenario": scenario,
+        "n": n,
+        "n_samples": n_samples,
+        "seconds": seconds,
+        "samples_per_second": n_samples / seconds if seconds > 0 else None,
+        "files": n_files,
+        "files_per_second": n_files / seconds if seconds > 0 else None,
+        "peak_rss": get_peak_rss(),
+        "peak_rss_workers": get_peak_rss_children(),
+    }
+
+
+def run_suite(
+    sizes: list[int], scenarios: list[str], workdir: Path, config: dict
+) -> list[dict]:
+    """
+    Run all scenarios for all sizes, each in a fresh process, so peak memory is measured per scenario.
+
+    Args:
+        sizes (list[int]): Numbers of samples.
+        scenarios (list[str]): Names of the scenarios, see `SCENARIOS`.
+        workdir (Path): Folder for datasets and outputs.
+        config (dict): Settings of the suite.
+
+    Returns:
+        list[dict]: Measurements of every scenario and size. Failed scenarios report an "error".
+    """
+    results = []
+    # the method is inherited by the worker processes of the optimiser, so use the default
+    context = multiprocessing.get_context()
+    for n in sizes:
+        size_dir = workdir / str(n)
+        size_dir.mkdir(parents=True, exist_ok=True)
+        for scenario in [s for s in SCENARIOS if s in scenarios]:
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                future = executor.submit(run_scenario, scenario, n, size_dir, config)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"scenario": scenario, "n": n, "error": repr(e)}
+            results.append(result)
+            print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result: dict) -> str:
+    """
+    Format the measurements of a scenario as a table row.
+
+    Args:
+        result (dict): Measurements of the scenario.
+
+    Returns:
+        str: The row.
+    """
+    head = f"{result['scenario']:<18} {result['n']:>9}"
+    if "error" in result:
+        return f"{head}  error: {result['error']}"
+    rate = result["samples_per_second"] or 0.0
+    files = result["files_per_second"] or 0.0
+    return (
+        f"{head} {result['seconds']:>10.3f} s {rate:>12.1f} samples/s "
+        f"{files:>10.1f} files/s {result['peak_rss'] / 2**20:>8.1f} MiB "
+        f"{result['peak_rss_workers'] / 2**20:>8.1f} MiB workers"
+    )
+
+
+def compare(results: list[dict], previous: list[dict]) -> list[str]:
+    """
+    Compare the throughput of two runs of the suite.
+
+    Args:
+        results (list[dict]): Measurements of the current run.
+        previous (list[dict]): Measurements of an earlier run.
+
+    Returns:
+        list[str]: One row per scenario and size measured in both runs.
+    """
+    before = {
+        (r["scenario"], r["n"]): r for r in previous if "error" not in r
+    }
+    rows = []
+    for r in results:
+        old = before.get((r["scenario"], r["n"]))
+        if "error" in r or old is None or not old["samples_per_second"]:
+            continue
+        rows.append(
+            f"{r['scenario']:<18} {r['n']:>9} {old['samples_per_second']:>12.1f} -> "
+            f"{r['samples_per_second']:>12.1f} samples/s "
+            f"({r['samples_per_second'] / old['samples_per_second']:.2f}x)"
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda s: int(float(s)),
+        default=[100, 1000, 10000],
+        help="Numbers of samples, e.g. 1e2 1e6.",
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS
+    )
+    parser.add_argument("--nprocs", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument(
+        "--output-format", choices=["directory", "bundle"], default="directory"
+    )
+    parser.add_argument("--background-writer", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-per-atom", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--busy", action="store_true")
+    parser.add_argument("--n-atoms", type=int, default=None)
+    parser.add_argument("--n-conformers", type=int, default=1)
+    parser.add_argument("--min-cn", type=int, default=4)
+    parser.add_argument("--max-cn", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workdir", type=Path, default=None, help="Defaults to a temporary folder."
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep datasets and outputs."
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Defaults to benchmarks/results/<commit>.json.",
+    )
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Results of an earlier run."
+    )
+    args = parser.parse_args()
+
+    config = {
+        "nprocs": args.nprocs,
+        "chunksize": args.chunksize,
+        "output_format": args.output_format,
+        "background_writer": args.background_writer,
+        "min_CN": args.min_cn,
+        "max_CN": args.max_cn,
+        "seed": args.seed,
+        "backend": {
+            "latency": args.latency,
+            "latency_per_atom": args.latency_per_atom,
+            "jitter": args.jitter,
+            "busy": args.busy,
+            "n_atoms": args.n_atoms,
+            "n_conformers": args.n_conformers,
+        },
+    }
+
+    workdir = (
+        Path(tempfile.mkdtemp(prefix="benchmark.")) if args.workdir is None else args.workdir
+    )
+    try:
+        results = run_suite(args.sizes, args.scenarios, workdir, config)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = get_commit()
+    output = (
+        Path(__file__).parent / "results" / f"{commit or 'unknown'}.json"
+        if args.output is None
+        else args.output
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "commit": commit,
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "config": config,
+                "results": results,
+            },
+            file,
+            indent=4,
+        )
+    print(f"Results saved to {output}")
+
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            previous = json.load(file)["results"]
+        print("\n".join(compare(results, previous)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from src import SampleDataset
+from src.dataset import SampleWriter
 
 
 def generate_dataset():
@@ -63,12 +64,36 @@ def generate_multi_atom_dataset():
     # Combine configurations
     cfgs = [cfg1, cfg2]
 
-    # Generate the dataset for the first configuration
-    dataset = SampleDataset.generate(**cfgs[0])
-
-    # Generate and combine datasets for the rest of the configurations
-    for params_dict in cfgs[1:]:
-        dataset = dataset + SampleDataset.generate(**params_dict)
+    # Generate the datasets of all configurations in parallel and combine them,
+    # the seed makes the result reproducible for any number of processes
+    dataset = SampleDataset.generate_many(cfgs, nprocs=2, seed=42)
 
     # Write the generated dataset to the specified path
     dataset.write(dataset_save_path)
+
+
+def generate_dataset_streaming():
+    """
+    Generates a large dataset directly into a JSON Lines file.
+
+    Samples are appended to the file as soon as they are accepted, so the dataset never has to
+    fit into memory. Rerunning the function after an interruption resumes the existing file.
+    """
+
+    # Define the path to save the dataset
+    dataset_save_path = Path(__file__).parent / "dummy_large.jsonl"
+
+    n_complexes = 100000
+
+    with SampleWriter(dataset_save_path, resume=True) as writer:
+        # Only generate the samples missing from a previous run
+        for sample in SampleDataset.generate_iter(
+            central_atom="La",
+            central_atom_OS=3,
+            central_atom_spin=0,
+            n_complexes=n_complexes - len(writer),
+            min_CN=5,
+            max_CN=9,
+            exclude=writer.uids,
+        ):
+            writer.write(sample)
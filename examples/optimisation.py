@@ -2,6 +2,7 @@ from pathlib import Path
 
 from src import SampleDataset
 from src import Optimiser
+from src.screening import PreScreen, Rule
 
 
 def optimisation():
@@ -50,3 +51,36 @@ def optimisation_parallel():
 
     opt = Optimiser(opt_save_path, settings, nprocs=3)
     opt.run(dataset)
+
+
+def optimisation_prescreened():
+    """Run batch optimisation of dataset after rejecting samples with
+    implausible total charges or steric overload."""
+
+    # load samples from disk
+    dataset = SampleDataset.read(Path(__file__).parent / "dummy.json")
+
+    # Define the path to save the optimised structures
+    opt_save_path = Path(__file__).parent / "dummy_prescreened"
+
+    # Define settings for Arcitector.build_complex()
+    # see details at https://github.com/lanl/Architector
+    settings = {
+        "full_method": "UFF",
+        "assemble_method": "UFF",
+        "n_conformers": 1,
+        "relax": True,
+        "return_only_1": True,
+    }
+
+    # Reject samples outside of these descriptor ranges before any optimisation,
+    # reasons are saved in the root folder
+    prescreen = PreScreen(
+        [
+            Rule(descriptor="total_charge", minimum=-4, maximum=2),
+            Rule(descriptor="steric_load", maximum=8.0),
+        ]
+    )
+
+    opt = Optimiser(opt_save_path, settings, prescreen=prescreen)
+    opt.run(dataset)
@@ -1,3 +1,4 @@
 from .dataset import SampleDataset
+from .lazy import LazySampleDataset
 from .optimiser import Optimiser
 from .mutations import Mutator
@@ -0,0 +1,367 @@
+import json
+import os
+from pathlib import Path
+import re
+import socket
+import uuid
+
+from .io import save_chrg, save_uhf
+
+
+def format_frame(
+    uid: str,
+    elements: list[str],
+    coordinates: list[tuple[float, float, float]],
+    charge: int,
+    n_unpels: int,
+    info: dict | None = None,
+) -> str:
+    """
+    Format a structure as frame of an extended XYZ file, with UID, charge and number of
+    unpaired electrons in the comment line.
+
+    Args:
+        uid (str): Unique identifier of the structure.
+        elements (list[str]): Element symbols.
+        coordinates (list[tuple[float, float, float]]): Cartesian coordinates in Angstrom.
+        charge (int): Total charge.
+        n_unpels (int): Number of unpaired electrons.
+        info (dict | None, optional): Further key=value pairs of the comment line. Values must not
+            contain whitespace. Defaults to None.
+
+    Returns:
+        str: The frame, ending with a newline.
+    """
+    comment = f"Properties=species:S:1:pos:R:3 uid={uid} charge={charge} uhf={n_unpels}"
+    for key, value in ({} if info is None else info).items():
+        comment += f" {key}={value}"
+    lines = [str(len(elements)), comment]
+    for element, (x, y, z) in zip(elements, coordinates):
+        lines.append(f"{element} {x:.8f} {y:.8f} {z:.8f}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_frame(
+    frame: str,
+) -> tuple[list[str], list[tuple[float, float, float]], dict[str, str]]:
+    """
+    Parse a single frame of an (extended) XYZ file.
+
+    Args:
+        frame (str): The frame.
+
+    Returns:
+        tuple[list[str], list[tuple[float, float, float]], dict[str, str]]: Element symbols, coordinates
+            and the key=value pairs of the comment line.
+    """
+    lines = frame.split("\n")
+    n_atoms = int(lines[0])
+    info = dict(re.findall(r"(\w+)=(\S+)", lines[1]))
+
+    elements = []
+    coordinates = []
+    for line in lines[2 : 2 + n_atoms]:
+        tokens = line.split()
+        elements.append(tokens[0])
+        coordinates.append((float(tokens[1]), float(tokens[2]), float(tokens[3])))
+    return elements, coordinates, info
+
+
+def parse_frames(
+    text: str,
+) -> list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]:
+    """
+    Parse all frames of a multi-frame (extended) XYZ file.
+
+    Args:
+        text (str): Content of the file.
+
+    Returns:
+        list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]: Element symbols,
+            coordinates and the key=value pairs of the comment line of every frame, see `parse_frame`.
+    """
+    lines = text.split("\n")
+    frames = []
+    start = 0
+    while start < len(lines) and lines[start].strip() != "":
+        end = start + 2 + int(lines[start])
+        frames.append(parse_frame("\n".join(lines[start:end])))
+        start = end
+    return frames
+
+
+class BundleWriter:
+    """
+    Writes structures into sharded multi-frame extended XYZ files instead of one directory per structure.
+
+    Every writer owns its shards `shard-<writer_id>-<n>.xyz` and its index `index-<writer_id>.jsonl`,
+    so many processes, also on different hosts, can write into one bundle without locks. Index
+    records are appended after their frame is written, so every indexed frame is complete.
+
+    Use as context manager:
+
+    ```python
+    with BundleWriter(Path("bundle")) as writer:
+        writer.write(uid, elements, coordinates, charge, n_unpels)
+    ```
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        shard_size: int = 10000,
+        batch_size: int = 1,
+        fsync: bool = False,
+        writer_id: str | None = None,
+    ) -> None:
+        """
+        Initializes a `BundleWriter` instance.
+
+        Args:
+            path (Path): Folder of the bundle.
+            shard_size (int, optional): Number of frames per shard. Defaults to 10000.
+            batch_size (int, optional): Number of frames buffered before they are written. Defaults to 1.
+            fsync (bool, optional): Force every batch to disk. Defaults to False.
+            writer_id (str | None, optional): Name of the writer's files. Defaults to host name, PID and a random suffix.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.writer_id = (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            if writer_id is None
+            else writer_id
+        )
+
+        self._buffer = []
+        self._shard = None
+        self._shard_name = None
+        self._n_shards = 0
+        self._n_frames = 0
+        self._index = None
+
+    def __enter__(self) -> "BundleWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(
+        self,
+        uid: str,
+        elements: list[str],
+        coordinates: list[tuple[float, float, float]],
+        charge: int,
+        n_unpels: int,
+    ) -> None:
+        """
+        Add a structure to the bundle.
+
+        Args:
+            uid (str): Unique identifier of the structure.
+            elements (list[str]): Element symbols.
+            coordinates (list[tuple[float, float, float]]): Cartesian coordinates in Angstrom.
+            charge (int): Total charge.
+            n_unpels (int): Number of unpaired electrons.
+        """
+        self.write_text(uid, format_frame(uid, elements, coordinates, charge, n_unpels))
+
+    def write_text(self, uid: str, text: str) -> None:
+        """
+        Add formatted frames to the bundle as a single record, e.g. all conformers of a structure.
+
+        Args:
+            uid (str): Unique identifier of the record.
+            text (str): One or more frames, see `format_frame`.
+        """
+        self._buffer.append((uid, text.encode()))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered frames and their index records.
+        """
+        records = []
+        for uid, frame in self._buffer:
+            if self._shard is None or self._n_frames == self.shard_size:
+                self._open_shard()
+            offset = self._shard.tell()
+            self._shard.write(frame)
+            self._n_frames += 1
+            records.append(
+                {
+                    "uid": uid,
+                    "shard": self._shard_name,
+                    "offset": offset,
+                    "length": len(frame),
+                }
+            )
+        self._buffer = []
+        if len(records) == 0:
+            return
+
+        self._shard.flush()
+        if self.fsync:
+            os.fsync(self._shard.fileno())
+
+        if self._index is None:
+            self._index = open(self.path / f"index-{self.writer_id}.jsonl", "a")
+        self._index.write("".join(json.dumps(r) + "\n" for r in records))
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+
+    def close(self) -> None:
+        """
+        Write all buffered frames and close the files.
+        """
+        self.flush()
+        for f in (self._shard, self._index):
+            if f is not None:
+                f.close()
+        self._shard = None
+        self._index = None
+
+    def _open_shard(self) -> None:
+        """
+        Start a new shard.
+        """
+        if self._shard is not None:
+            self._shard.close()
+        self._shard_name = f"shard-{self.writer_id}-{self._n_shards:05d}.xyz"
+        self._shard = open(self.path / self._shard_name, "ab")
+        self._n_shards += 1
+        self._n_frames = 0
+
+
+class Bundle:
+    """
+    Reader of a bundle written by `BundleWriter`.
+
+    Initialize via:
+
+    ```python
+    bundle = Bundle(Path("bundle"))
+    elements, coordinates, info = bundle.read(uid)
+    ```
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Initializes a `Bundle` instance and loads the index of all writers.
+        An incomplete last index record, as left behind by an interrupted writer, is ignored.
+
+        Args:
+            path (Path): Folder of the bundle.
+        """
+        self.path = Path(path)
+        self.index = {}
+        for fp in sorted(self.path.glob("index-*.jsonl")):
+            with open(fp, "r") as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break
+                    record = json.loads(line)
+                    self.index[record["uid"]] = record
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self.index
+
+    def __iter__(self):
+        """
+        Iterate over the UIDs of all structures.
+
+        Yields:
+            str: UIDs in the order of the index.
+        """
+        yield from self.index
+
+    @staticmethod
+    def is_bundle(path: Path) -> bool:
+        """
+        Checks if a folder contains a bundle.
+
+        Args:
+            path (Path): The folder.
+
+        Returns:
+            bool: True if the folder contains an index written by `BundleWriter`.
+        """
+        return Path(path).is_dir() and any(Path(path).glob("index-*.jsonl"))
+
+    def read_frame(self, uid: str) -> str:
+        """
+        Read the frame of a structure.
+
+        Args:
+            uid (str): Unique identifier of the structure.
+
+        Returns:
+            str: The frame in extended XYZ format.
+        """
+        record = self.index[uid]
+        with open(self.path / record["shard"], "rb") as file:
+            file.seek(record["offset"])
+            return file.read(record["length"]).decode()
+
+    def read(
+        self, uid: str
+    ) -> tuple[list[str], list[tuple[float, float, float]], dict[str, int]]:
+        """
+        Read a structure.
+
+        Args:
+            uid (str): Unique identifier of the structure.
+
+        Returns:
+            tuple[list[str], list[tuple[float, float, float]], dict[str, int]]: Element symbols,
+                coordinates, and the total charge and number of unpaired electrons as "charge" and "uhf".
+        """
+        elements, coordinates, info = parse_frame(self.read_frame(uid))
+        return elements, coordinates, {"charge": int(info["charge"]), "uhf": int(info["uhf"])}
+
+    def read_frames(
+        self, uid: str
+    ) -> list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]:
+        """
+        Read all frames of a record written by `BundleWriter.write_text`.
+
+        Args:
+            uid (str): Unique identifier of the record.
+
+        Returns:
+            list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]: Element symbols,
+                coordinates and the key=value pairs of the comment line of every frame.
+        """
+        return parse_frames(self.read_frame(uid))
+
+    def export(
+        self,
+        root: Path,
+        xyz_file: str = "sample.xyz",
+        chrg_file: str = ".CHRG",
+        uhf_file: str = ".UHF",
+    ) -> None:
+        """
+        Export the bundle to the directory layout, one sub-directory per UID with .xyz, .CHRG and .UHF files.
+
+        Args:
+            root (Path): Folder to create the sub-directories in.
+            xyz_file (str, optional): Name of the .xyz files. Defaults to "sample.xyz".
+            chrg_file (str, optional): Name of the charge files. Defaults to ".CHRG".
+            uhf_file (str, optional): Name of the unpaired electrons files. Defaults to ".UHF".
+        """
+        for uid in self:
+            elements, coordinates, info = self.read(uid)
+            save_dir = Path(root) / uid
+            save_dir.mkdir(parents=True, exist_ok=True)
+            with open(save_dir / xyz_file, "w") as file:
+                file.write(format_frame(uid, elements, coordinates, info["charge"], info["uhf"]))
+            save_chrg(info["charge"], str(save_dir / chrg_file))
+            save_uhf(info["uhf"], str(save_dir / uhf_file))
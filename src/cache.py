@@ -0,0 +1,268 @@
+import fcntl
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+
+def get_input_hash(inp: dict) -> str:
+    """
+    Get the content address of an Architector input, independent of the order of its keys.
+
+    Args:
+        inp (dict): Input dictionary of Architector's build_complex().
+
+    Returns:
+        str: Hash of the input.
+    """
+    dump = json.dumps(inp, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(dump.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of optimisation outputs, addressed by the hash of the Architector input.
+
+    Every entry is a directory `<root>/<key[:2]>/<key>` holding the output files. Entries are
+    assembled in `<root>/tmp` and renamed into place, so readers never see incomplete entries.
+    Hits are materialised by hardlink, or by copy across file systems, and refresh the
+    modification time of the entry, which orders the LRU eviction. The total size is tracked
+    in `<root>/size`, guarded by a lock file, so many processes can share one cache.
+
+    Initialize via:
+
+    ```python
+    cache = ResultCache(Path("cache"), max_size=50 * 2**30)
+    optimiser = Optimiser(root, settings, cache=cache)
+    ```
+    """
+
+    def __init__(self, root: Path, max_size: int | None = None, link: bool = True) -> None:
+        """
+        Initializes a `ResultCache` instance.
+
+        Args:
+            root (Path): Folder of the cache.
+            max_size (int | None, optional): Limit of the total size of all entries in bytes. The least
+                recently used entries are evicted above it. If None, the cache is unbounded. Defaults to None.
+            link (bool, optional): Materialise hits by hardlink where possible. Hardlinked outputs share
+                their content with the cache and must not be modified in place. Defaults to True.
+        """
+        self.root = Path(root)
+        self.max_size = max_size
+        self.link = link
+        (self.root / "tmp").mkdir(parents=True, exist_ok=True)
+
+    def get_entry_path(self, key: str) -> Path:
+        """
+        Get the directory of an entry.
+
+        Args:
+            key (str): Hash of the Architector input, see `get_input_hash`.
+
+        Returns:
+            Path: Directory of the entry.
+        """
+        return self.root / key[:2] / key
+
+    def contains(self, key: str) -> bool:
+        """
+        Checks if an entry exists.
+
+        Args:
+            key (str): Hash of the Architector input.
+
+        Returns:
+            bool: True if the entry exists, otherwise False.
+        """
+        return self.get_entry_path(key).is_dir()
+
+    def materialise(
+        self, key: str, save_dir: Path, order: list[str] | None = None
+    ) -> bool:
+        """
+        Copy the files of an entry into an output directory.
+
+        Files are placed under temporary names and renamed afterwards, those in `order`
+        last and in that order, so outputs stay complete as seen by `Optimiser.has_complete_output`.
+
+        Args:
+            key (str): Hash of the Architector input.
+            save_dir (Path): Path to the output directory.
+            order (list[str] | None, optional): Names of files that are renamed last, in this order. Defaults to None.
+
+        Returns:
+            bool: True on a hit, False if the entry does not exist.
+        """
+        entry = self.get_entry_path(key)
+        order = [] if order is None else order
+        tag = f".cache.{uuid.uuid4().hex}."
+        placed = []
+        try:
+            names = sorted(
+                (p.name for p in entry.iterdir()),
+                key=lambda n: order.index(n) if n in order else -1,
+            )
+            save_dir.mkdir(parents=True, exist_ok=True)
+            for name in names:
+                tmp_path = save_dir / (tag + name)
+                self._link_or_copy(entry / name, tmp_path)
+                placed.append(tmp_path)
+        except FileNotFoundError:
+            # missing, or evicted by another process while reading
+            for p in placed:
+                p.unlink()
+            return False
+
+        for name, tmp_path in zip(names, placed):
+            os.replace(tmp_path, save_dir / name)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def read(self, key: str) -> dict[str, bytes] | None:
+        """
+        Read the files of an entry into memory.
+
+        Args:
+            key (str): Hash of the Architector input.
+
+        Returns:
+            dict[str, bytes] | None: Content of every file by name, or None if the entry does not exist.
+        """
+        entry = self.get_entry_path(key)
+        try:
+            files = {p.name: p.read_bytes() for p in entry.iterdir()}
+        except FileNotFoundError:
+            # missing, or evicted by another process while reading
+            return None
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        return files
+
+    def put(self, key: str, files: dict[str, Path | bytes]) -> None:
+        """
+        Store output files under a key. Existing entries are kept.
+
+        Args:
+            key (str): Hash of the Architector input.
+            files (dict[str, Path | bytes]): Path or content of every file by name.
+        """
+        entry = self.get_entry_path(key)
+        if entry.is_dir():
+            return
+
+        tmp_entry = self.root / "tmp" / f"{key}.{uuid.uuid4().hex}"
+        tmp_entry.mkdir()
+        size = 0
+        for name, src in files.items():
+            if isinstance(src, bytes):
+                (tmp_entry / name).write_bytes(src)
+            else:
+                shutil.copyfile(src, tmp_entry / name)
+            size += (tmp_entry / name).stat().st_size
+
+        entry.parent.mkdir(exist_ok=True)
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # stored by another process in the meantime
+            shutil.rmtree(tmp_entry)
+            return
+
+        with self._lock():
+            total = self._read_size() + size
+            if self.max_size is not None and total > self.max_size:
+                total = self._evict()
+            self._write_size(total)
+
+    def _evict(self) -> int:
+        """
+        Remove the least recently used entries until the cache fits into `max_size`.
+        Must be called while holding the lock.
+
+        Returns:
+            int: Total size of the remaining entries in bytes.
+        """
+        entries = []
+        for shard in self.root.iterdir():
+            if not shard.is_dir() or shard.name == "tmp":
+                continue
+            for entry in shard.iterdir():
+                try:
+                    size = sum(p.stat().st_size for p in entry.iterdir())
+                    entries.append((entry.stat().st_mtime_ns, size, entry))
+                except FileNotFoundError:
+                    continue
+
+        total = sum(e[1] for e in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            # move out of place first, readers of the entry then see a miss
+            trash = self.root / "tmp" / f"evicted.{uuid.uuid4().hex}"
+            try:
+                os.rename(entry, trash)
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(trash, ignore_errors=True)
+            total -= size
+        return total
+
+    def _lock(self):
+        """
+        Open the lock file of the cache.
+
+        Returns:
+            _FileLock: Exclusive lock, to be used as context manager.
+        """
+        return _FileLock(self.root / "lock")
+
+    def _read_size(self) -> int:
+        try:
+            return int((self.root / "size").read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_size(self, size: int) -> None:
+        tmp_path = self.root / "tmp" / f"size.{os.getpid()}"
+        tmp_path.write_text(str(size))
+        os.replace(tmp_path, self.root / "size")
+
+    def _link_or_copy(self, src: Path, dst: Path) -> None:
+        if self.link:
+            try:
+                os.link(src, dst)
+                return
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # e.g. across file systems
+                pass
+        shutil.copyfile(src, dst)
+
+
+class _FileLock:
+    """
+    Exclusive advisory lock on a file, shared between processes.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = None
+
+    def __enter__(self) -> "_FileLock":
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args) -> None:
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
@@ -1,6 +1,6 @@
 import hashlib
 
-from .ligand import Ligand
+from .ligand import Ligand, LigandLibrary, get_ligand_signature
 
 
 class Complex:
@@ -28,15 +28,31 @@ class Complex:
         self.complex_ready = False
         self.complex_uid = None
 
-    def add_ligand(self, ligand_dict: dict, ligand_key: str):
+    def add_ligand(
+        self,
+        ligand_dict: dict | None,
+        ligand_key: str,
+        library: LigandLibrary | None = None,
+    ):
         """Add ligand to the complex.
 
         Args:
-            ligand_dict (dict): Ligand's dictionary containing SMILES, coordList, and ligType. Element of ligands.json.
+            ligand_dict (dict | None): Ligand's dictionary containing SMILES, coordList, and ligType. Element of ligands.json.
+                May be None if `library` is given.
             ligand_key (str): Unique id of the ligand, keys in ligands.json.
+            library (LigandLibrary | None, optional): Precompiled library to look the ligand up by its key,
+                which avoids validating `ligand_dict` again. Defaults to None.
         """
 
-        ligand = Ligand(**ligand_dict)
+        if library is not None:
+            idx = library.index(ligand_key)
+            ligand = Ligand.model_construct(
+                smiles=library.smiles[idx],
+                coordList=list(library.coordLists[idx]),
+                ligType=library.ligTypes[idx],
+            )
+        else:
+            ligand = Ligand(**ligand_dict)
 
         if ligand.denticity > self.remaining_sites:
             raise ValueError(
@@ -116,14 +132,65 @@ class Complex:
 
     def get_uid(self) -> str:
         """Get unique hash (unique identifier) for the complex defined by central atom (CA),
-        coordination number (CN), central atom oxidation state (OS), and list of ligand keys.
+        coordination number (CN), central atom oxidation state (OS), and the canonical signatures
+        of its ligands. Ligand entries describing the same ligand under different keys give the same UID.
+
+        Returns:
+            str: Unique hash of the complex.
+        """
+        return Complex.compute_uid(
+            self.central_atom,
+            self.CN,
+            self.central_atom_OS,
+            [
+                get_ligand_signature(smiles, tuple(coordList), ligType)
+                for smiles, coordList, ligType in zip(
+                    self.ligands_smiles, self.ligands_coordLists, self.ligands_types
+                )
+            ],
+        )
+
+    @staticmethod
+    def compute_uid(
+        central_atom: str, CN: int, central_atom_OS: int, ligand_signatures: list[str]
+    ) -> str:
+        """Compute the unique hash of a complex without constructing it.
+
+        Args:
+            central_atom (str): Central atom's symbol.
+            CN (int): Coordination number of the complex.
+            central_atom_OS (int): Central atom's oxidation state.
+            ligand_signatures (list[str]): Canonical signatures of all ligands of the complex, in any order.
+                See `get_ligand_signature`.
 
         Returns:
             str: Unique hash of the complex.
         """
-        sorted_strings = sorted(self.ligands_keys)
+        sorted_strings = sorted(ligand_signatures)
+        concatenated_strings = "_".join(sorted_strings)
+        unique_string = f"{central_atom}_{CN}_{central_atom_OS}_{concatenated_strings}"
+        unique_id = hashlib.blake2b(unique_string.encode(), digest_size=16).hexdigest()
+        return unique_id
+
+    @staticmethod
+    def compute_legacy_uid(
+        central_atom: str, CN: int, central_atom_OS: int, ligands_keys: list[str]
+    ) -> str:
+        """Compute the UID of a complex as defined before canonical ligand signatures,
+        i.e. from the keys of its ligands in ligands.json.
+
+        Args:
+            central_atom (str): Central atom's symbol.
+            CN (int): Coordination number of the complex.
+            central_atom_OS (int): Central atom's oxidation state.
+            ligands_keys (list[str]): Keys of all ligands of the complex, in any order.
+
+        Returns:
+            str: Legacy unique hash of the complex.
+        """
+        sorted_strings = sorted(ligands_keys)
         concatenated_strings = "_".join(sorted_strings)
-        unique_string = f"{self.central_atom}_{self.CN}_{self.central_atom_OS}_{concatenated_strings}"
+        unique_string = f"{central_atom}_{CN}_{central_atom_OS}_{concatenated_strings}"
         unique_id = hashlib.md5(unique_string.encode()).hexdigest()
         return unique_id
 
@@ -0,0 +1,195 @@
+import json
+import math
+import os
+from pathlib import Path
+import sys
+import numpy as np
+
+from .dataset import Sample
+from .screening import get_ligand_descriptors
+
+
+class CostModel:
+    """
+    Estimates the runtime of optimising a sample, used to dispatch the most expensive samples first.
+
+    The logarithm of the runtime is modelled as a linear function of the coordination number,
+    the logarithms of the number of heavy ligand atoms and of `n_conformers` in the settings,
+    and the number of ligands of every ligType. The fit is a ridge regression over all
+    observed runtimes, kept as sufficient statistics so it can be refined online and saved
+    between runs. Until enough runtimes are observed, a heuristic is used instead.
+
+    Initialize via:
+
+    ```python
+    model = CostModel.load(root / "cost_model.json")
+    order = np.argsort([-model.predict_log(s, settings) for s in dataset])
+    ```
+    """
+
+    base_features: list[str] = ["bias", "coreCN", "log_heavy_atoms", "log_conformers"]
+    """Features of every sample, followed by one count feature per ligType."""
+
+    def __init__(self, ridge: float = 1e-3) -> None:
+        """
+        Initializes an empty `CostModel` instance.
+
+        Args:
+            ridge (float, optional): Regularisation strength of the fit. Defaults to 1e-3.
+        """
+        self.ridge = ridge
+        self.features = list(self.base_features)
+        self.n_observations = 0
+        # sufficient statistics X^T X and X^T y of the fit
+        self._xtx = np.zeros((len(self.features), len(self.features)))
+        self._xty = np.zeros(len(self.features))
+        self._weights = None
+
+    def get_features(self, sample: Sample, settings: dict) -> dict[str, float]:
+        """
+        Compute the features of a sample.
+
+        Args:
+            sample (Sample): The sample.
+            settings (dict): Settings for Architector's build_complex().
+
+        Returns:
+            dict[str, float]: Features by name.
+        """
+        heavy_atoms = 0
+        features = {
+            "bias": 1.0,
+            "coreCN": float(sample.core["coreCN"]),
+            "log_conformers": math.log(settings.get("n_conformers", 1)),
+        }
+        for ligand in sample.ligands:
+            heavy_atoms += get_ligand_descriptors(ligand["smiles"])[1]
+            name = f"ligType:{ligand['ligType']}"
+            features[name] = features.get(name, 0.0) + 1.0
+        features["log_heavy_atoms"] = math.log(1 + heavy_atoms)
+        return features
+
+    def predict(self, sample: Sample, settings: dict) -> float:
+        """
+        Estimate the runtime of a sample. Estimates beyond the range of floats are clamped to the largest float.
+
+        Args:
+            sample (Sample): The sample.
+            settings (dict): Settings for Architector's build_complex().
+
+        Returns:
+            float: Estimated runtime in seconds, or a relative cost before enough runtimes were observed.
+        """
+        return math.exp(min(self.predict_log(sample, settings), math.log(sys.float_info.max)))
+
+    def predict_log(self, sample: Sample, settings: dict) -> float:
+        """
+        Estimate the logarithm of the runtime of a sample. Use it to rank samples, as it cannot
+        overflow for badly extrapolated fits.
+
+        Args:
+            sample (Sample): The sample.
+            settings (dict): Settings for Architector's build_complex().
+
+        Returns:
+            float: Logarithm of the estimated runtime in seconds, or of a relative cost before enough
+                runtimes were observed.
+        """
+        features = self.get_features(sample, settings)
+        if self.n_observations < len(self.features):
+            return (
+                features["log_conformers"]
+                + features["log_heavy_atoms"]
+                + (math.log(features["coreCN"]) if features["coreCN"] > 0 else -math.inf)
+            )
+
+        if self._weights is None:
+            a = self._xtx + self.ridge * np.eye(len(self.features))
+            self._weights = np.linalg.solve(a, self._xty)
+        x = self._to_vector(features)
+        return float(x @ self._weights)
+
+    def observe(self, sample: Sample, settings: dict, seconds: float) -> None:
+        """
+        Refine the model with a measured runtime.
+
+        Args:
+            sample (Sample): The sample.
+            settings (dict): Settings for Architector's build_complex().
+            seconds (float): Measured runtime in seconds.
+        """
+        features = self.get_features(sample, settings)
+        for name in features:
+            if name not in self.features:
+                self._add_feature(name)
+
+        x = self._to_vector(features)
+        self._xtx += np.outer(x, x)
+        self._xty += x * math.log(max(seconds, 1e-6))
+        self.n_observations += 1
+        self._weights = None
+
+    def save(self, path: str | Path) -> None:
+        """
+        Save the model in JSON format, atomically.
+
+        Args:
+            path (str | Path): Path to the JSON file.
+        """
+        dd = {
+            "ridge": self.ridge,
+            "features": self.features,
+            "n_observations": self.n_observations,
+            "xtx": self._xtx.tolist(),
+            "xty": self._xty.tolist(),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(dd, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CostModel":
+        """
+        Load a model saved by `save`.
+
+        Args:
+            path (str | Path): Path to the JSON file.
+
+        Returns:
+            CostModel: The loaded model, or an empty model if the file does not exist.
+        """
+        if not Path(path).exists():
+            return cls()
+
+        with open(path, "r") as file:
+            dd = json.load(file)
+        model = cls(ridge=dd["ridge"])
+        model.features = dd["features"]
+        model.n_observations = dd["n_observations"]
+        model._xtx = np.array(dd["xtx"])
+        model._xty = np.array(dd["xty"])
+        return model
+
+    def _add_feature(self, name: str) -> None:
+        """
+        Append a feature, padding the statistics with zeros.
+
+        Args:
+            name (str): Name of the feature.
+        """
+        self.features.append(name)
+        self._xtx = np.pad(self._xtx, ((0, 1), (0, 1)))
+        self._xty = np.pad(self._xty, (0, 1))
+
+    def _to_vector(self, features: dict[str, float]) -> np.ndarray:
+        """
+        Arrange features in the order of `features`. Unknown features are dropped.
+
+        Args:
+            features (dict[str, float]): Features by name.
+
+        Returns:
+            np.ndarray: Feature vector.
+        """
+        return np.array([features.get(name, 0.0) for name in self.features])
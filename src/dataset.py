@@ -1,17 +1,30 @@
+from concurrent.futures import ProcessPoolExecutor
 import json
+import os
 from pathlib import Path
+import numpy as np
 
+from .bundle import Bundle
 from .complex import Complex
-from .ligand import Ligand
-from .util import get_random_CN
+from .ligand import LigandLibrary, get_ligand_signature
+from .sampler import ComplexSampler, ComplexSpace
+from .store import SampleStore
+from .util import truncate_incomplete_line
 
 
 class Sample:
     """
     Represents a sample with its core structure, ligands, and parameters.
     Essentially a string representation of a `Complex`.
+
+    Samples taken from a `SampleDataset` are lightweight views on its `SampleStore`.
+    The first access to `core`, `ligands` or `parameters` builds their dictionaries and
+    detaches the view into a standalone sample, so changes persist on the sample but not
+    in the dataset, see `SampleDataset.add_sample` with overwrite.
     """
 
+    __slots__ = ("uid", "_core", "_ligands", "_parameters", "_store", "_row")
+
     def __init__(
         self,
         uid: str,
@@ -30,9 +43,88 @@ class Sample:
             parameters (dict[str, int]): Configuration including central atom oxidation state and total spin.
         """
         self.uid = uid
-        self.core = core
-        self.ligands = ligands
-        self.parameters = parameters
+        self._core = core
+        self._ligands = ligands
+        self._parameters = parameters
+        self._store = None
+        self._row = None
+
+    @staticmethod
+    def view(store: SampleStore, row: int) -> "Sample":
+        """
+        Creates a `Sample` that reads its content from a row of a `SampleStore`.
+
+        Args:
+            store (SampleStore): Store containing the sample.
+            row (int): Row of the sample.
+
+        Returns:
+            Sample: The view.
+        """
+        sample = Sample.__new__(Sample)
+        sample.uid = store.uids[row]
+        sample._core = sample._ligands = sample._parameters = None
+        sample._store = store
+        sample._row = row
+        return sample
+
+    def __reduce__(self):
+        # views are sent to other processes as standalone samples
+        if self._store is not None:
+            return (
+                Sample,
+                (
+                    self.uid,
+                    self._store.get_core(self._row),
+                    self._store.get_ligands(self._row),
+                    self._store.get_parameters(self._row),
+                ),
+            )
+        return (Sample, (self.uid, self._core, self._ligands, self._parameters))
+
+    @property
+    def core(self) -> dict[str, int]:
+        """Core element and core coordination number."""
+        self._detach()
+        return self._core
+
+    @core.setter
+    def core(self, core: dict[str, int]) -> None:
+        self._detach()
+        self._core = core
+
+    @property
+    def ligands(self) -> list[dict[str, list[int]]]:
+        """Collection of ligands, each specified via SMILES, coordination list, and ligand type."""
+        self._detach()
+        return self._ligands
+
+    @ligands.setter
+    def ligands(self, ligands: list[dict[str, list[int]]]) -> None:
+        self._detach()
+        self._ligands = ligands
+
+    @property
+    def parameters(self) -> dict[str, int]:
+        """Configuration including central atom oxidation state and total spin."""
+        self._detach()
+        return self._parameters
+
+    @parameters.setter
+    def parameters(self, parameters: dict[str, int]) -> None:
+        self._detach()
+        self._parameters = parameters
+
+    def _detach(self) -> None:
+        """
+        Turn a view into a standalone sample holding its own dictionaries.
+        """
+        if self._store is not None:
+            self._core = self._store.get_core(self._row)
+            self._ligands = self._store.get_ligands(self._row)
+            self._parameters = self._store.get_parameters(self._row)
+            self._store = None
+            self._row = None
 
     def to_dict(self) -> dict:
         """
@@ -48,10 +140,66 @@ class Sample:
             "parameters": self.parameters,
         }
 
+    def get_canonical_uid(self) -> str:
+        """
+        Compute the UID of the sample from its content, see `Complex.get_uid`.
+
+        Returns:
+            str: Canonical UID of the sample.
+        """
+        core = self.core
+        return Complex.compute_uid(
+            core["metal"],
+            core["coreCN"],
+            self.parameters["metal_ox"],
+            [
+                get_ligand_signature(l["smiles"], tuple(l["coordList"]), l["ligType"])
+                for l in self.ligands
+            ],
+        )
+
+    @staticmethod
+    def from_ligand_set(
+        central_atom: str,
+        central_atom_OS: int,
+        central_atom_spin: int,
+        CN: int,
+        ligand_set: tuple[int, ...],
+        library: LigandLibrary,
+    ) -> "Sample":
+        """
+        Creates a `Sample` from ligand indices into a `LigandLibrary`.
+
+        Args:
+            central_atom (str): Central atom's symbol.
+            central_atom_OS (int): Central atom's oxidation state.
+            central_atom_spin (int): Spin multiplicity of the central atom (2S+1).
+            CN (int): Coordination number of the complex.
+            ligand_set (tuple[int, ...]): Indices of all ligands of the complex into `library.keys`.
+            library (LigandLibrary): Library containing the ligands.
+
+        Returns:
+            Sample: The sample with its UID computed by `Complex.compute_uid`.
+        """
+        return Sample(
+            uid=Complex.compute_uid(
+                central_atom,
+                CN,
+                central_atom_OS,
+                [library.signatures[i] for i in ligand_set],
+            ),
+            core={"metal": central_atom, "coreCN": CN},
+            ligands=[library.get_dict(i) for i in ligand_set],
+            parameters={"metal_ox": central_atom_OS, "full_spin": central_atom_spin},
+        )
+
 
 class SampleDataset:
     """
     Represents a collection of samples in a dataset.
+
+    Samples are kept in a columnar `SampleStore`; indexing and iteration return
+    lightweight `Sample` views on it.
     """
 
     json_file: str = "ligands.json"
@@ -61,10 +209,27 @@ class SampleDataset:
         """
         Initializes a SampleDataset instance.
 
+        Samples with an already present UID are skipped.
+
         Args:
             samples (list[Sample]): List of samples in the dataset.
         """
-        self.samples = samples
+        self._store = SampleStore()
+        # maps the UID of every sample to its row in `self._store`
+        self._index = {}
+        for sample in samples:
+            self.add_sample(sample)
+
+    @property
+    def samples(self) -> tuple[Sample, ...]:
+        """
+        All samples of the dataset as views on the backing store. The tuple is built on every
+        access and cannot be modified, use `add_sample` and `remove_samples` to change the dataset.
+
+        Returns:
+            tuple[Sample, ...]: Tuple of samples.
+        """
+        return tuple(Sample.view(self._store, row) for row in range(len(self._store)))
 
     def __len__(self) -> int:
         """
@@ -73,7 +238,7 @@ class SampleDataset:
         Returns:
             int: Number of samples.
         """
-        return len(self.samples)
+        return len(self._store)
 
     def __getitem__(self, idx: int) -> Sample:
         """
@@ -85,7 +250,23 @@ class SampleDataset:
         Returns:
             Sample: The sample at the specified index.
         """
-        return self.samples[idx]
+        if isinstance(idx, slice):
+            return [Sample.view(self._store, row) for row in range(len(self))[idx]]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("SampleDataset index out of range")
+        return Sample.view(self._store, idx)
+
+    def __iter__(self):
+        """
+        Iterate over all samples in the dataset.
+
+        Yields:
+            Sample: Samples in the order of the dataset.
+        """
+        for row in range(len(self._store)):
+            yield Sample.view(self._store, row)
 
     def __str__(self) -> str:
         """
@@ -98,7 +279,12 @@ class SampleDataset:
 
     def __add__(self, other):
         if isinstance(other, SampleDataset):
-            return SampleDataset(self.samples + other.samples)
+            dataset = SampleDataset([])
+            for sample in self:
+                dataset.add_sample(sample)
+            for sample in other:
+                dataset.add_sample(sample)
+            return dataset
         raise ValueError("Can only add two SampleDataset instances")
 
     def contains(self, uid: str) -> bool:
@@ -111,7 +297,43 @@ class SampleDataset:
         Returns:
             bool: True if the UID is found, otherwise False.
         """
-        return uid in [s.uid for s in self.samples]
+        return uid in self._index
+
+    def get(self, uid: str) -> Sample | None:
+        """
+        Retrieves a sample by its UID.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            Sample | None: The sample with the given UID, or None if it is not present.
+        """
+        idx = self._index.get(uid)
+        return None if idx is None else Sample.view(self._store, idx)
+
+    def filter_by_output(
+        self, path: str | Path, present: bool = True, xyz_file: str = "sample.xyz"
+    ) -> "SampleDataset":
+        """
+        Select the samples that have, or lack, an optimised structure in an output folder.
+
+        Args:
+            path (str | Path): Root folder of an `Optimiser`, with one sub-directory per UID, or a bundle.
+            present (bool, optional): Select samples with a structure if True, without one if False. Defaults to True.
+            xyz_file (str, optional): Name of the .xyz files in the sub-directories. Defaults to "sample.xyz".
+
+        Returns:
+            SampleDataset: The selected samples.
+        """
+        path = Path(path)
+        if Bundle.is_bundle(path):
+            bundle = Bundle(path)
+            has_output = lambda uid: uid in bundle
+        else:
+            has_output = lambda uid: (path / uid / xyz_file).exists()
+
+        return SampleDataset([s for s in self if has_output(s.uid) == present])
 
     def to_dict(self) -> dict:
         """
@@ -120,15 +342,22 @@ class SampleDataset:
         Returns:
             dict: Dictionary containing samples' UID as keys and their dictionary representations as values.
         """
-        return {s.uid: s.to_dict() for s in self.samples}
+        return {s.uid: s.to_dict() for s in self}
 
     def write(self, path: str | Path) -> None:
         """
         Saves the dataset to a JSON file at the given path.
+        Paths ending with .jsonl are written in JSON Lines format, see `SampleWriter`.
 
         Args:
             path (str): Path to the JSON file.
         """
+        if str(path).endswith(".jsonl"):
+            with SampleWriter(path, resume=False) as writer:
+                for sample in self:
+                    writer.write(sample)
+            return
+
         dd = self.to_dict()
         with open(path, "w") as json_file:
             json.dump(dd, json_file, indent=4)
@@ -137,6 +366,7 @@ class SampleDataset:
     def read(path: str | Path) -> "SampleDataset":
         """
         Reads a dataset saved in JSON format from the given path.
+        Paths ending with .jsonl are read in JSON Lines format, see `SampleDataset.iter_jsonl`.
 
         Args:
             path (str): Path to the JSON file.
@@ -144,20 +374,82 @@ class SampleDataset:
         Returns:
             SampleDataset: The loaded SampleDataset instance.
         """
+        if str(path).endswith(".jsonl"):
+            return SampleDataset(list(SampleDataset.iter_jsonl(path)))
+
         with open(path, "r") as json_file:
             dd = json.load(json_file)
 
         return SampleDataset(samples=[Sample(uid=k, **v) for k, v in dd.items()])
 
-    def add_sample(self, sample: Sample) -> None:
+    def migrate_uids(self) -> tuple["SampleDataset", dict[str, str]]:
+        """
+        Recompute the UIDs of all samples with the canonical scheme of `Complex.get_uid`.
+        Samples that turn out to describe the same complex are collapsed into the first one.
+
+        Returns:
+            tuple[SampleDataset, dict[str, str]]: Dataset with canonical UIDs and the mapping from old to new UIDs.
+        """
+        dataset = SampleDataset([])
+        mapping = {}
+        for sample in self:
+            new_uid = sample.get_canonical_uid()
+            mapping[sample.uid] = new_uid
+            dataset.add_sample(
+                Sample(new_uid, sample.core, sample.ligands, sample.parameters)
+            )
+        return dataset, mapping
+
+    @staticmethod
+    def iter_jsonl(path: str | Path):
+        """
+        Stream the samples of a dataset saved in JSON Lines format, one sample per line.
+        An incomplete last line, as left behind by an interrupted writer, is ignored.
+
+        Args:
+            path (str | Path): Path to the JSONL file.
+
+        Yields:
+            Sample: Samples in the order of the file.
+        """
+        with open(path, "r") as jsonl_file:
+            for line in jsonl_file:
+                if not line.endswith("\n"):
+                    break
+                if line.strip() == "":
+                    continue
+                dd = json.loads(line)
+                yield Sample(uid=dd.pop("uid"), **dd)
+
+    def add_sample(self, sample: Sample, overwrite: bool = False) -> bool:
         """
         Add a single `Sample` to dataset. Sample will be added as last element in
-        `dataset.samples`.
+        `dataset.samples`, unless a sample with the same UID is already present.
 
         Args:
             sample (Sample): Sample object to be added to dataset.
+            overwrite (bool, optional): Replace an already present sample with the same UID in place.
+                Defaults to False.
+
+        Returns:
+            bool: True if the sample was added as a new entry, False if its UID collided with an existing one.
         """
-        self.samples.append(sample)
+        idx = self._index.get(sample.uid)
+        if idx is not None:
+            if overwrite:
+                self._store.replace(
+                    idx, sample.core, sample.ligands, sample.parameters
+                )
+            return False
+
+        if sample._store is not None:
+            row = self._store.append_from(sample._store, sample._row)
+        else:
+            row = self._store.append(
+                sample.uid, sample.core, sample.ligands, sample.parameters
+            )
+        self._index[sample.uid] = row
+        return True
 
     def remove_samples(self, keys: list[str]) -> None:
         """
@@ -166,7 +458,15 @@ class SampleDataset:
         Args:
             keys (list[str]): List of UIDs of samples to be removed.
         """
-        self.samples = [s for s in self.samples if s.uid not in keys]
+        keys = set(keys)
+        if not any(k in self._index for k in keys):
+            return
+
+        # views taken before keep pointing to the old store
+        self._store = self._store.take(
+            [row for row, uid in enumerate(self._store.uids) if uid not in keys]
+        )
+        self._index = {uid: row for row, uid in enumerate(self._store.uids)}
 
     @staticmethod
     def generate(
@@ -176,10 +476,15 @@ class SampleDataset:
         n_complexes: int,
         min_CN: int,
         max_CN: int,
+        batch_size: int = 4096,
+        library: LigandLibrary | None = None,
+        rng: np.random.Generator | None = None,
     ) -> "SampleDataset":
         """Generate the dataset containing the requested number of complexes (n_complexes),
         all having identical central atom in specific oxidation and spin states.
 
+        See `SampleDataset.generate_iter` for details on how complexes are drawn.
+
         Args:
             central_atom (str): Central atom's symbol.
             central_atom_OS (int): Central atom's oxidation state.
@@ -187,57 +492,441 @@ class SampleDataset:
             n_complexes (int): Number of unique complexes in the dataset.
             min_CN (int): Minimum coordination number.
             max_CN (int): Maximum coordination number.
+            batch_size (int, optional): Maximum number of candidates drawn per batch. Defaults to 4096.
+            library (LigandLibrary | None, optional): Ligands to choose from. If None, the cached library
+                loaded from `SampleDataset.json_file` is used.
+            rng (np.random.Generator | None, optional): Random number generator. If None, a new one is created.
+
+        Raises:
+            ValueError: If n_complexes exceeds the number of unique complexes for the CN range.
 
         Returns:
             dict: Dictionary contating complex unique ids (hashes) as keys and inputDicts as values for every complex.
             The number of elements is equal to n_complexes.
         """
+        return SampleDataset(
+            list(
+                SampleDataset.generate_iter(
+                    central_atom=central_atom,
+                    central_atom_OS=central_atom_OS,
+                    central_atom_spin=central_atom_spin,
+                    n_complexes=n_complexes,
+                    min_CN=min_CN,
+                    max_CN=max_CN,
+                    batch_size=batch_size,
+                    library=library,
+                    rng=rng,
+                )
+            )
+        )
 
-        with open(SampleDataset.json_file, "r") as file:
-            all_ligands = json.load(file)
+    @staticmethod
+    def generate_iter(
+        central_atom: str,
+        central_atom_OS: int,
+        central_atom_spin: int,
+        n_complexes: int,
+        min_CN: int,
+        max_CN: int,
+        batch_size: int = 4096,
+        library: LigandLibrary | None = None,
+        rng: np.random.Generator | None = None,
+        exclude: set[str] | None = None,
+    ):
+        """Stream the requested number of unique complexes (n_complexes), all having identical
+        central atom in specific oxidation and spin states.
+
+        Ligand sets are drawn in batches with `ComplexSampler`, which only ever picks
+        ligands that fit the remaining coordination sites. If more than half of all unique
+        complexes are requested, they are drawn without replacement from `ComplexSpace` instead.
 
-        dataset = SampleDataset([])
+        Args:
+            central_atom (str): Central atom's symbol.
+            central_atom_OS (int): Central atom's oxidation state.
+            central_atom_spin (int): Spin multiplicity of the central atom (2S+1).
+            n_complexes (int): Number of unique complexes to yield.
+            min_CN (int): Minimum coordination number.
+            max_CN (int): Maximum coordination number.
+            batch_size (int, optional): Maximum number of candidates drawn per batch. Defaults to 4096.
+            library (LigandLibrary | None, optional): Ligands to choose from. If None, the cached library
+                loaded from `SampleDataset.json_file` is used. Duplicate ligand entries are collapsed.
+            rng (np.random.Generator | None, optional): Random number generator. If None, a new one is created.
+            exclude (set[str] | None, optional): UIDs that must not be yielded, e.g. samples already
+                written by a previous run. Defaults to None.
+
+        Raises:
+            ValueError: If n_complexes exceeds the number of unique complexes for the CN range.
+
+        Yields:
+            Sample: Unique samples, as soon as they are accepted.
+        """
+        if library is None:
+            library = LigandLibrary.load(SampleDataset.json_file)
+        # duplicate ligand entries would yield identical complexes
+        library = library.unique()
+
+        rng = np.random.default_rng() if rng is None else rng
+        exclude = set() if exclude is None else exclude
+
+        space = ComplexSpace(library, min_CN=min_CN, max_CN=max_CN)
+        if n_complexes > space.size:
+            raise ValueError(
+                f"Cannot generate {n_complexes} complexes, the space of CN in [{min_CN}, {max_CN}] "
+                f"contains only {space.size} unique complexes."
+            )
+
+        # dense request, avoid drawing mostly duplicates
+        if 2 * (n_complexes + len(exclude)) > space.size:
+            n_yielded = 0
+            for rank in rng.permutation(space.size).tolist():
+                if n_yielded == n_complexes:
+                    return
+                cn, ligand_set = space.unrank(rank)
+                sample = Sample.from_ligand_set(
+                    central_atom, central_atom_OS, central_atom_spin, cn, ligand_set, library
+                )
+                if sample.uid in exclude:
+                    continue
+                n_yielded += 1
+                yield sample
+
+            if n_yielded < n_complexes:
+                raise ValueError(
+                    f"Cannot generate {n_complexes} complexes, the space of CN in [{min_CN}, {max_CN}] "
+                    f"contains only {n_yielded} unique complexes that are not excluded."
+                )
+            return
+
+        sampler = ComplexSampler(library, min_CN=min_CN, max_CN=max_CN, rng=rng)
+        seen = set()
 
         # loop to generate the requested number of complexes
-        while len(dataset) < n_complexes:
-            # random CN generation
-            entry = Complex(
-                central_atom=central_atom,
-                central_atom_OS=central_atom_OS,
-                central_atom_spin=central_atom_spin,
-                CN=get_random_CN(low=min_CN, high=max_CN + 1),
+        while len(seen) < n_complexes:
+            n_draw = min(batch_size, 2 * (n_complexes - len(seen)))
+            cns, ligand_sets = sampler.sample(n_draw)
+
+            for cn, ligand_set in zip(cns.tolist(), ligand_sets):
+                uid = Complex.compute_uid(
+                    central_atom,
+                    cn,
+                    central_atom_OS,
+                    [library.signatures[i] for i in ligand_set],
+                )
+
+                if uid in seen or uid in exclude:
+                    continue
+
+                seen.add(uid)
+                yield Sample.from_ligand_set(
+                    central_atom, central_atom_OS, central_atom_spin, cn, ligand_set, library
+                )
+
+                if len(seen) == n_complexes:
+                    break
+
+    @staticmethod
+    def enumerate(
+        central_atom: str,
+        central_atom_OS: int,
+        central_atom_spin: int,
+        min_CN: int,
+        max_CN: int,
+        library: LigandLibrary | None = None,
+    ):
+        """Stream every unique complex of a central atom in specific oxidation and spin states.
+
+        Args:
+            central_atom (str): Central atom's symbol.
+            central_atom_OS (int): Central atom's oxidation state.
+            central_atom_spin (int): Spin multiplicity of the central atom (2S+1).
+            min_CN (int): Minimum coordination number.
+            max_CN (int): Maximum coordination number.
+            library (LigandLibrary | None, optional): Ligands to choose from. If None, the cached library
+                loaded from `SampleDataset.json_file` is used.
+
+        Yields:
+            Sample: Every unique complex exactly once, ordered as in `ComplexSpace`.
+        """
+        if library is None:
+            library = LigandLibrary.load(SampleDataset.json_file)
+        # duplicate ligand entries would yield identical complexes
+        library = library.unique()
+
+        for cn, ligand_set in ComplexSpace(library, min_CN=min_CN, max_CN=max_CN):
+            yield Sample.from_ligand_set(
+                central_atom, central_atom_OS, central_atom_spin, cn, ligand_set, library
             )
 
-            # loop to fill the coordination sites with random ligands
-            while entry.complex_ready == False:
-                random_ligand_dict, random_ligand_key = Ligand.get_random(all_ligands)
+    @staticmethod
+    def generate_many(
+        configs: list[dict],
+        nprocs: int | None = 1,
+        seed: int | None = None,
+        chunk_size: int = 10000,
+    ) -> "SampleDataset":
+        """Generate a dataset from multiple configurations in a process pool.
+
+        Every configuration is split into chunks of at most `chunk_size` complexes, and each chunk
+        draws from its own generator spawned from `np.random.SeedSequence(seed)`. Results are merged
+        in chunk order with global UID deduplication; missing complexes are drawn in further rounds.
+        Hence, the same seed gives the same dataset for any number of processes.
 
-                remaining_coord_site = entry.get_remaining_coord_site_number()
+        Args:
+            configs (list[dict]): Keyword arguments of `SampleDataset.generate` for every configuration,
+                i.e. central_atom, central_atom_OS, central_atom_spin, n_complexes, min_CN and max_CN.
+            nprocs (int | None, optional): Number of processes. Choosing `None` uses all available processors. Defaults to 1.
+            seed (int | None, optional): Seed of the root `SeedSequence`. If None, fresh entropy is used.
+            chunk_size (int, optional): Maximum number of complexes generated per task. Defaults to 10000.
 
-                ligand_denticity = Ligand(**random_ligand_dict).denticity
+        Raises:
+            ValueError: If the configurations request more complexes than there are unique ones, also if
+                the complexes drawn for one configuration leave too few for another one with overlapping CNs.
 
-                if ligand_denticity > remaining_coord_site:
-                    continue
+        Returns:
+            SampleDataset: Dataset containing the requested number of unique complexes for every configuration.
+        """
+        json_file = os.path.abspath(SampleDataset.json_file)
+        library = LigandLibrary.load(json_file).unique()
+
+        space = ComplexSpace(
+            library,
+            min_CN=min(cfg["min_CN"] for cfg in configs),
+            max_CN=max(cfg["max_CN"] for cfg in configs),
+        )
+        sizes = {cn: space.count(cn) for cn in range(space.min_CN, space.max_CN + 1)}
+        # generated complexes by central atom, oxidation state and CN
+        used = {}
 
-                elif remaining_coord_site == 0:
+        config_seeds = np.random.SeedSequence(seed).spawn(len(configs))
+        counts = [0] * len(configs)
+
+        dataset = SampleDataset([])
+
+        executor = None
+        if nprocs != 1:
+            executor = ProcessPoolExecutor(max_workers=nprocs)
+
+        try:
+            while True:
+                # fail fast, also if complexes drawn for one configuration used up those another one needs
+                _check_capacity(
+                    configs,
+                    [cfg["n_complexes"] - n for cfg, n in zip(configs, counts)],
+                    sizes,
+                    used,
+                )
+
+                # chunks of every configuration still missing complexes
+                tasks = []
+                for i, cfg in enumerate(configs):
+                    missing = cfg["n_complexes"] - counts[i]
+                    for start in range(0, missing, chunk_size):
+                        chunk = {**cfg, "n_complexes": min(chunk_size, missing - start)}
+                        tasks.append((i, chunk, config_seeds[i].spawn(1)[0]))
+
+                if len(tasks) == 0:
                     break
 
+                args = (
+                    [t[1] for t in tasks],
+                    [t[2] for t in tasks],
+                    [json_file] * len(tasks),
+                )
+                if executor is None:
+                    results = map(_generate_chunk, *args)
                 else:
-                    entry.add_ligand(
-                        ligand_dict=random_ligand_dict, ligand_key=random_ligand_key
+                    results = executor.map(_generate_chunk, *args)
+
+                # merge in task order to be independent of the number of processes
+                for (i, _, _), samples in zip(tasks, results):
+                    for sample in samples:
+                        if counts[i] == configs[i]["n_complexes"]:
+                            break
+                        if dataset.add_sample(sample):
+                            counts[i] += 1
+                            key = (
+                                configs[i]["central_atom"],
+                                configs[i]["central_atom_OS"],
+                                sample.core["coreCN"],
+                            )
+                            used[key] = used.get(key, 0) + 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return dataset
+
+
+def _check_capacity(
+    configs: list[dict],
+    missing: list[int],
+    sizes: dict[int, int],
+    used: dict[tuple[str, int, int], int],
+) -> None:
+    """Check that the complexes still missing in `SampleDataset.generate_many` can be generated.
+
+    Configurations sharing central atom and oxidation state share UIDs. As every configuration draws
+    from an interval of CNs, the missing complexes fit if, for every window of CNs, the configurations
+    within the window miss at most as many complexes as are left unused in the CNs they cover.
+
+    Args:
+        configs (list[dict]): The configurations.
+        missing (list[int]): Number of complexes every configuration still misses.
+        sizes (dict[int, int]): Number of unique complexes by CN.
+        used (dict[tuple[str, int, int], int]): Number of generated complexes by central atom, oxidation state and CN.
+
+    Raises:
+        ValueError: If the configurations within a window of CNs miss more complexes than are left.
+    """
+    groups = {}
+    for cfg, n in zip(configs, missing):
+        key = (cfg["central_atom"], cfg["central_atom_OS"])
+        groups.setdefault(key, []).append((cfg, n))
+
+    for (central_atom, central_atom_OS), group in groups.items():
+        cns = sorted({cfg["min_CN"] for cfg, _ in group} | {cfg["max_CN"] for cfg, _ in group})
+        for low in cns:
+            for high in [cn for cn in cns if cn >= low]:
+                inside = [
+                    (cfg, n)
+                    for cfg, n in group
+                    if cfg["min_CN"] >= low and cfg["max_CN"] <= high
+                ]
+                requested = sum(n for _, n in inside)
+                if requested == 0:
+                    continue
+                covered = set()
+                for cfg, _ in inside:
+                    covered.update(range(cfg["min_CN"], cfg["max_CN"] + 1))
+                left = sum(
+                    sizes[cn] - used.get((central_atom, central_atom_OS, cn), 0)
+                    for cn in covered
+                )
+                if requested > left:
+                    raise ValueError(
+                        f"Cannot generate {requested} more complexes for {central_atom} with oxidation state "
+                        f"{central_atom_OS} and CN {low} to {high}, only {left} unique complexes are left."
                     )
 
-            if dataset.contains(entry.complex_uid):
-                continue
 
-            inputDict = entry.get_inputDict()
-            inputDict = entry.set_atom_parameters(
-                inputDict=inputDict,
-                metal_ox=central_atom_OS,
-                full_spin=central_atom_spin,
-            )
-            inputDict["uid"] = entry.complex_uid
+class SampleWriter:
+    """
+    Appends samples to a file in JSON Lines format, one sample per line, as they are accepted.
+    Lines are buffered and flushed in batches. Existing files can be resumed, in which case
+    the UIDs already present are reloaded and duplicates are skipped.
 
-            dataset.add_sample(Sample(**inputDict))
+    Use as context manager:
 
-        return dataset
+    ```python
+    with SampleWriter(path) as writer:
+        writer.write(sample)
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 1000,
+        resume: bool = True,
+        fsync: bool = False,
+    ) -> None:
+        """
+        Initializes a `SampleWriter` instance.
+
+        Args:
+            path (str | Path): Path to the JSONL file.
+            batch_size (int, optional): Number of samples buffered before they are flushed to disk. Defaults to 1000.
+            resume (bool, optional): Append to an existing file and reload its UIDs. If False, the file is
+                truncated. Defaults to True.
+            fsync (bool, optional): Force every flushed batch to disk. Defaults to False.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.uids = set()
+        self._buffer = []
+
+        if resume and self.path.exists():
+            truncate_incomplete_line(self.path)
+            self.uids = {s.uid for s in SampleDataset.iter_jsonl(self.path)}
+            self._file = open(self.path, "a")
+        else:
+            self._file = open(self.path, "w")
+
+    def __len__(self) -> int:
+        """
+        Returns the number of samples in the file, including buffered ones.
+
+        Returns:
+            int: Number of samples.
+        """
+        return len(self.uids)
+
+    def __enter__(self) -> "SampleWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, sample: Sample) -> bool:
+        """
+        Append a sample, unless its UID was written before.
+
+        Args:
+            sample (Sample): Sample to be written.
+
+        Returns:
+            bool: True if the sample was written, False if its UID collided with an existing one.
+        """
+        if sample.uid in self.uids:
+            return False
+
+        self.uids.add(sample.uid)
+        self._buffer.append(
+            json.dumps({"uid": sample.uid, **sample.to_dict()}, separators=(",", ":"))
+            + "\n"
+        )
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        """
+        Write all buffered samples to disk.
+        """
+        if len(self._buffer) > 0:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """
+        Flush all buffered samples and close the file.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+
+def _generate_chunk(
+    config: dict, seed: np.random.SeedSequence, json_file: str
+) -> list[Sample]:
+    """Generate the samples of a single chunk of `SampleDataset.generate_many`.
+
+    Args:
+        config (dict): Keyword arguments of `SampleDataset.generate`.
+        seed (np.random.SeedSequence): Seed of the chunk's random number generator.
+        json_file (str): File containing all available ligands.
+
+    Returns:
+        list[Sample]: Generated samples.
+    """
+    dataset = SampleDataset.generate(
+        **config,
+        library=LigandLibrary.load(json_file),
+        rng=np.random.default_rng(seed),
+    )
+    return list(dataset)
@@ -1,3 +1,8 @@
+import os
+
+from .util import parse_xyz
+
+
 def save_xyz(mol: str, save_path: str) -> None:
     """Save the geometry in XYZ format.
 
@@ -28,3 +33,40 @@ def save_chrg(charge: int, save_path: str) -> None:
     """
     with open(save_path, "w") as file:
         file.write(str(charge))
+
+
+def get_xyz(mol) -> tuple[list[str], list[tuple[float, float, float]]]:
+    """Get the elements and coordinates of a molecule.
+
+    Args:
+        mol (str): Molecule returned by Architector's convert_io_molecule().
+
+    Returns:
+        tuple[list[str], list[tuple[float, float, float]]]: A tuple containing a list of elements and a list of coordinates.
+    """
+    return parse_xyz(get_xyz_string(mol))
+
+
+def get_xyz_string(mol) -> str:
+    """Get the geometry of a molecule in XYZ format, without writing a file.
+
+    Args:
+        mol (str): Molecule returned by Architector's convert_io_molecule().
+
+    Returns:
+        str: The content of the XYZ file.
+    """
+    return mol.write_xyz("", writestring=True)
+
+
+def sync_path(path: str) -> None:
+    """Force a file or directory to disk.
+
+    Args:
+        path (str): Path to the file or directory.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,111 @@
+import os
+from pathlib import Path
+import shutil
+import time
+import numpy as np
+
+from .dataset import SampleDataset
+from .optimiser import Optimiser
+
+
+def get_layouts(n_cores: int | None = None) -> list[tuple[int, int]]:
+    """
+    Get layouts with a power of two as threads per worker and as many processes as fit on the cores.
+
+    Args:
+        n_cores (int | None, optional): Number of cores. If None, the cores available to the current process.
+
+    Returns:
+        list[tuple[int, int]]: Number of processes and threads per worker of every layout, most processes first.
+    """
+    if n_cores is None:
+        n_cores = (
+            len(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity")
+            else os.cpu_count()
+        )
+
+    layouts = []
+    threads = 1
+    while threads <= n_cores:
+        layouts.append((n_cores // threads, threads))
+        threads *= 2
+    return layouts
+
+
+def benchmark_layouts(
+    root: Path,
+    settings: dict[str],
+    dataset: SampleDataset,
+    layouts: list[tuple[int, int]] | None = None,
+    n_samples: int | None = None,
+    seed: int = 0,
+    **options,
+) -> list[dict]:
+    """
+    Measure the throughput of the `Optimiser` for a few layouts of processes and threads per worker
+    on a random subset of a dataset, to choose nprocs and threads_per_worker for the full run.
+
+    Every layout optimises the same subset from scratch in its own folder in the root folder, which
+    is removed afterwards, so the cache is not used. The subset should hold several samples per process,
+    otherwise the last samples running alone dominate the measurement.
+
+    Use via:
+
+    ```python
+    results = benchmark_layouts(root, settings, dataset, n_samples=256)
+    best = results[0]
+    Optimiser(..., nprocs=best["nprocs"], threads_per_worker=best["threads_per_worker"])
+    ```
+
+    Args:
+        root (Path): Folder for the outputs of the measurements.
+        settings (dict[str]): Settings for Arcitector.build_complex().
+        dataset (SampleDataset): The dataset to draw the subset from.
+        layouts (list[tuple[int, int]] | None, optional): Number of processes and threads per worker of every
+            layout. Defaults to `get_layouts`.
+        n_samples (int | None, optional): Size of the subset. If None, four samples per process of the widest
+            layout. Defaults to None.
+        seed (int, optional): Seed of the random subset. Defaults to 0.
+        **options: Further arguments of the `Optimiser`, e.g. pin_cores or timeout.
+
+    Returns:
+        list[dict]: "nprocs", "threads_per_worker", "seconds", "samples_per_second" and number of
+            "successful" samples of every layout, highest throughput, i.e. the recommendation, first.
+    """
+    layouts = get_layouts() if layouts is None else layouts
+    if n_samples is None:
+        n_samples = 4 * max(nprocs for nprocs, _ in layouts)
+
+    rng = np.random.default_rng(seed)
+    indices = rng.choice(len(dataset), min(n_samples, len(dataset)), replace=False)
+    subset = SampleDataset([dataset[int(i)] for i in indices])
+
+    results = []
+    for nprocs, threads in layouts:
+        layout_root = root / f"layout_{nprocs}x{threads}"
+        shutil.rmtree(layout_root, ignore_errors=True)
+        opt = Optimiser(
+            layout_root,
+            settings,
+            nprocs=nprocs,
+            threads_per_worker=threads,
+            **{**options, "cache": None, "resume": False},
+        )
+        start = time.perf_counter()
+        status = opt.run(subset)
+        seconds = time.perf_counter() - start
+
+        opt.delete_logger(opt.logger)
+        shutil.rmtree(layout_root, ignore_errors=True)
+        results.append(
+            {
+                "nprocs": nprocs,
+                "threads_per_worker": threads,
+                "seconds": seconds,
+                "samples_per_second": len(subset) / seconds,
+                "successful": sum(1 for s in status.values() if s == "success"),
+            }
+        )
+
+    return sorted(results, key=lambda r: -r["samples_per_second"])
@@ -0,0 +1,280 @@
+import json
+import mmap
+import os
+from pathlib import Path
+import re
+import numpy as np
+
+from .dataset import Sample, SampleDataset
+
+
+class LazySampleDataset:
+    """
+    Read-only dataset backed by a JSON Lines file, see `SampleWriter`.
+
+    Samples are parsed only when accessed. The file is memory-mapped and an on-disk
+    index maps every UID to its byte offset, so many worker processes can share one
+    large file without each of them parsing all of it.
+    """
+
+    index_suffix: str = ".idx.npy"
+    """Suffix appended to the dataset path for the index file."""
+
+    _uid_pattern = re.compile(rb'^\{"uid":"([^"\\]*)"')
+
+    def __init__(
+        self, path: str | Path, positions: np.ndarray | None = None
+    ) -> None:
+        """
+        Initializes a `LazySampleDataset` instance. The index is built if it is missing or outdated.
+
+        Args:
+            path (str | Path): Path to the JSONL file.
+            positions (np.ndarray | None, optional): Rows of the file that belong to this dataset,
+                used for subsets. If None, all rows are used.
+        """
+        self.path = Path(path)
+        self.index = self.load_index(self.path)
+        self.positions = positions
+        self._sorted_positions = None
+        self._mmap = None
+
+    def __len__(self) -> int:
+        """
+        Returns the number of samples in the dataset.
+
+        Returns:
+            int: Number of samples.
+        """
+        if self.positions is None:
+            return len(self.index)
+        return len(self.positions)
+
+    def __getitem__(self, idx: int | slice) -> Sample | list[Sample]:
+        """
+        Retrieves a sample from the dataset at the given index.
+
+        Args:
+            idx (int | slice): Index of the sample to retrieve, or a slice of indices.
+
+        Returns:
+            Sample | list[Sample]: The sample at the specified index, or the samples of the slice.
+        """
+        if isinstance(idx, slice):
+            return [self[i] for i in range(len(self))[idx]]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("LazySampleDataset index out of range")
+        row = idx if self.positions is None else int(self.positions[idx])
+        return self._read_row(row)
+
+    def __iter__(self):
+        """
+        Iterate over all samples in the dataset.
+
+        Yields:
+            Sample: Samples in the order of the file.
+        """
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getstate__(self) -> dict:
+        # memory maps are reopened in every process
+        return {"path": self.path, "positions": self.positions}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def uids(self) -> np.ndarray:
+        """
+        UIDs of all samples in the dataset.
+
+        Returns:
+            np.ndarray: UIDs as bytes.
+        """
+        if self.positions is None:
+            return self.index["uid"]
+        return self.index["uid"][self.positions]
+
+    def contains(self, uid: str) -> bool:
+        """
+        Checks if a sample with a given UID is present in the dataset.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            bool: True if the UID is found, otherwise False.
+        """
+        return self._find_row(uid) is not None
+
+    def get(self, uid: str) -> Sample | None:
+        """
+        Retrieves a sample by its UID.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            Sample | None: The sample with the given UID, or None if it is not present.
+        """
+        row = self._find_row(uid)
+        return None if row is None else self._read_row(row)
+
+    def subset(self, indices: list[int] | np.ndarray) -> "LazySampleDataset":
+        """
+        Create a dataset of selected samples that shares the file and index.
+
+        Args:
+            indices (list[int] | np.ndarray): Indices of the samples in this dataset.
+
+        Returns:
+            LazySampleDataset: The subset.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        positions = indices if self.positions is None else self.positions[indices]
+        return LazySampleDataset(self.path, positions=positions)
+
+    def shard(self, rank: int, world_size: int) -> "LazySampleDataset":
+        """
+        Get the contiguous slice of the dataset handled by one of `world_size` workers.
+
+        Args:
+            rank (int): Index of the worker in [0, world_size).
+            world_size (int): Total number of workers.
+
+        Returns:
+            LazySampleDataset: The worker's share of the samples.
+        """
+        bounds = np.linspace(0, len(self), world_size + 1).astype(np.int64)
+        return self.subset(np.arange(bounds[rank], bounds[rank + 1]))
+
+    def materialize(self) -> SampleDataset:
+        """
+        Load all samples of the dataset into memory.
+
+        Returns:
+            SampleDataset: The in-memory dataset.
+        """
+        return SampleDataset(list(self))
+
+    def _read_row(self, row: int) -> Sample:
+        """
+        Parse a single line of the file.
+
+        Args:
+            row (int): Row in the index.
+
+        Returns:
+            Sample: The parsed sample.
+        """
+        if self._mmap is None:
+            with open(self.path, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        offset = int(self.index["offset"][row])
+        length = int(self.index["length"][row])
+        dd = json.loads(self._mmap[offset : offset + length])
+        return Sample(uid=dd.pop("uid"), **dd)
+
+    def _find_row(self, uid: str) -> int | None:
+        """
+        Look up the row of a UID with a binary search on the index.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            int | None: Row in the index, or None if the UID is not part of this dataset.
+        """
+        key = uid.encode()
+        uids = self.index["uid"]
+        by_uid = self.index["by_uid"]
+
+        lo, hi = 0, len(by_uid)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if uids[by_uid[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(by_uid) or uids[by_uid[lo]] != key:
+            return None
+
+        row = int(by_uid[lo])
+        if self.positions is not None:
+            if self._sorted_positions is None:
+                self._sorted_positions = np.sort(self.positions)
+            i = np.searchsorted(self._sorted_positions, row)
+            if i == len(self._sorted_positions) or self._sorted_positions[i] != row:
+                return None
+        return row
+
+    @staticmethod
+    def load_index(path: str | Path) -> np.ndarray:
+        """
+        Load the index of a JSONL file as memory map, building it first if it is missing or outdated.
+
+        Args:
+            path (str | Path): Path to the JSONL file.
+
+        Returns:
+            np.ndarray: Structured array with the fields uid, offset, length and by_uid (rows sorted by UID).
+        """
+        index_path = Path(str(path) + LazySampleDataset.index_suffix)
+        if (
+            not index_path.exists()
+            or index_path.stat().st_mtime_ns < Path(path).stat().st_mtime_ns
+        ):
+            LazySampleDataset.build_index(path)
+        return np.load(index_path, mmap_mode="r")
+
+    @staticmethod
+    def build_index(path: str | Path) -> None:
+        """
+        Scan a JSONL file once and write its index next to it.
+        An incomplete last line is not indexed.
+
+        Args:
+            path (str | Path): Path to the JSONL file.
+        """
+        uids = []
+        offsets = []
+        lengths = []
+
+        with open(path, "rb") as file:
+            offset = 0
+            for line in file:
+                if line.endswith(b"\n") and line.strip() != b"":
+                    match = LazySampleDataset._uid_pattern.match(line)
+                    if match is not None:
+                        uids.append(match.group(1))
+                    else:
+                        uids.append(json.loads(line)["uid"].encode())
+                    offsets.append(offset)
+                    lengths.append(len(line))
+                offset += len(line)
+
+        width = max([len(u) for u in uids], default=1)
+        index = np.empty(
+            len(uids),
+            dtype=[
+                ("uid", f"S{width}"),
+                ("offset", "<i8"),
+                ("length", "<i8"),
+                ("by_uid", "<i8"),
+            ],
+        )
+        index["uid"] = uids
+        index["offset"] = offsets
+        index["length"] = lengths
+        index["by_uid"] = np.argsort(index["uid"], kind="stable")
+
+        # write atomically, concurrent workers may build the same index
+        index_path = str(path) + LazySampleDataset.index_suffix
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, index)
+        os.replace(tmp_path, index_path)
@@ -1,6 +1,16 @@
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
 from pydantic import BaseModel
 import numpy as np
 
+# required by `get_ligand_signature`, other users fall back to parsing SMILES
+try:
+    from rdkit import Chem
+except ImportError:
+    Chem = None
+
 
 class Ligand(BaseModel):
     """
@@ -31,20 +41,266 @@ class Ligand(BaseModel):
         """
         return len(self.coordList)
 
+    @property
+    def signature(self) -> str:
+        """Get ligand's canonical signature, see `get_ligand_signature`.
+
+        Returns:
+            str: Canonical signature of the ligand.
+        """
+        return get_ligand_signature(self.smiles, tuple(self.coordList), self.ligType)
+
     @staticmethod
-    def get_random(ligands_dict: dict) -> "Ligand":
+    def get_random(
+        ligands_dict: "dict | LigandLibrary", rng: np.random.Generator | None = None
+    ) -> "Ligand":
         """Get random ligand from dictionary containing multiple ligand options.
 
         Args:
-            ligands_dict (dict): Dictionary containing multiple ligand dictionaries as values, and any unique keys.
-            Example: ligands.json converted into python dict format.
+            ligands_dict (dict | LigandLibrary): Dictionary containing multiple ligand dictionaries as values, and any unique keys.
+            Example: ligands.json converted into python dict format. A `LigandLibrary` can be used instead.
+            rng (np.random.Generator | None, optional): Random number generator. If None, NumPy's global random state is used.
 
         Returns:
             dict: Ligand's dictionary containing SMILES, coordList, and ligType.
         """
+        total_ligands_number = len(ligands_dict)
+        if rng is not None:
+            random_index = int(rng.integers(low=0, high=total_ligands_number))
+        else:
+            random_index = np.random.randint(low=0, high=total_ligands_number)
+
+        if isinstance(ligands_dict, LigandLibrary):
+            return ligands_dict.get_dict(random_index), ligands_dict.keys[random_index]
+
         keywords = list(ligands_dict.keys())
-        total_ligands_number = len(keywords)
-        random_index = np.random.randint(low=0, high=total_ligands_number)
         random_ligand_keyword = keywords[random_index]
         random_ligand_dict = ligands_dict[random_ligand_keyword]
         return random_ligand_dict, random_ligand_keyword
+
+
+@lru_cache(maxsize=None)
+def get_ligand_signature(smiles: str, coordList: tuple[int, ...], ligType: str) -> str:
+    """Get a normalised signature of a ligand, which is identical for equivalent ligand entries.
+
+    The SMILES is canonicalised with RDKit and the coordinating atoms are given by their
+    canonical ranks, so differently written SMILES of the same ligand match. SMILES that
+    RDKit cannot parse are used as is. Signatures define the UIDs of all samples, hence
+    RDKit is required; there is no fallback that would give different UIDs on other installs.
+
+    Args:
+        smiles (str): SMILES of the ligand.
+        coordList (tuple[int, ...]): Indices of the coordinating atoms.
+        ligType (str): Ligand's type.
+
+    Raises:
+        ImportError: If RDKit is not installed.
+
+    Returns:
+        str: Signature consisting of SMILES, coordinating atoms and ligand type.
+    """
+    if Chem is None:
+        raise ImportError(
+            "RDKit is required to compute ligand signatures and UIDs, please install rdkit."
+        )
+    mol = Chem.MolFromSmiles(smiles)
+
+    if mol is not None and all(i < mol.GetNumAtoms() for i in coordList):
+        ranks = list(Chem.CanonicalRankAtoms(mol, breakTies=False))
+        smiles = Chem.MolToSmiles(mol)
+        sites = sorted(ranks[i] for i in coordList)
+    else:
+        sites = sorted(coordList)
+
+    return f"{smiles}|{','.join(map(str, sites))}|{ligType}"
+
+
+class LigandLibrary:
+    """
+    Precompiled, read-only collection of ligands, e.g. the content of ligands.json.
+
+    Ligands are validated once on construction and stored in compact arrays, indexed
+    by their position. Use `LigandLibrary.load` to share one instance per file and process.
+    """
+
+    keys: list[str]
+    """Unique ligand keys."""
+
+    smiles: np.ndarray
+    """SMILES of every ligand."""
+
+    coordLists: tuple[tuple[int, ...], ...]
+    """Coordination lists of every ligand."""
+
+    ligTypes: np.ndarray
+    """Ligand type of every ligand."""
+
+    denticities: np.ndarray
+    """Denticity of every ligand."""
+
+    by_denticity: dict[int, np.ndarray]
+    """Ligand indices grouped by denticity."""
+
+    by_ligType: dict[str, np.ndarray]
+    """Ligand indices grouped by ligand type."""
+
+    signatures: list[str]
+    """Canonical signature of every ligand, see `get_ligand_signature`."""
+
+    _cache: dict[str, tuple[int, "LigandLibrary"]] = {}
+    """Loaded libraries by absolute file path, together with the file's modification time."""
+
+    def __init__(self, ligands: dict[str, dict]) -> None:
+        """
+        Initializes a `LigandLibrary` instance.
+
+        Args:
+            ligands (dict[str, dict]): Dictionary containing ligand dictionaries as values and unique keys.
+                Example: ligands.json converted into python dict format.
+        """
+        validated = [Ligand(**v) for v in ligands.values()]
+
+        self.keys = list(ligands.keys())
+        self.smiles = np.array([l.smiles for l in validated], dtype=object)
+        self.coordLists = tuple(tuple(l.coordList) for l in validated)
+        self.ligTypes = np.array([l.ligType for l in validated], dtype=object)
+        self.denticities = np.array([l.denticity for l in validated], dtype=np.int64)
+
+        self.by_denticity = {
+            int(d): np.flatnonzero(self.denticities == d)
+            for d in np.unique(self.denticities)
+        }
+
+        self.by_ligType = {
+            t: np.flatnonzero(self.ligTypes == t) for t in dict.fromkeys(self.ligTypes)
+        }
+
+        self.signatures = [l.signature for l in validated]
+
+        self._key_index = {k: i for i, k in enumerate(self.keys)}
+        self._unique = None
+
+    def __len__(self) -> int:
+        """
+        Returns the number of ligands in the library.
+
+        Returns:
+            int: Number of ligands.
+        """
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Checks if a ligand key is present in the library.
+
+        Args:
+            key (str): Ligand key.
+
+        Returns:
+            bool: True if the key is found, otherwise False.
+        """
+        return key in self._key_index
+
+    def index(self, key: str) -> int:
+        """
+        Get the position of a ligand in the library.
+
+        Args:
+            key (str): Ligand key.
+
+        Returns:
+            int: Index of the ligand.
+        """
+        return self._key_index[key]
+
+    def get_dict(self, idx: int | str) -> dict:
+        """
+        Get a ligand's dictionary containing SMILES, coordList, and ligType.
+
+        Args:
+            idx (int | str): Index or key of the ligand.
+
+        Returns:
+            dict: A new ligand dictionary, as stored in ligands.json.
+        """
+        if isinstance(idx, str):
+            idx = self._key_index[idx]
+        return {
+            "smiles": self.smiles[idx],
+            "coordList": list(self.coordLists[idx]),
+            "ligType": self.ligTypes[idx],
+        }
+
+    def to_dict(self) -> dict[str, dict]:
+        """
+        Converts the library back into the format of ligands.json.
+
+        Returns:
+            dict[str, dict]: Ligand keys and ligand dictionaries.
+        """
+        return {k: self.get_dict(i) for i, k in enumerate(self.keys)}
+
+    def get_aliases(self) -> dict[str, str]:
+        """
+        Map every ligand key to the first key with the same canonical signature.
+
+        Returns:
+            dict[str, str]: Aliases, e.g. "bipyradine" -> "bipyradine" and "bipy" -> "bipyradine".
+        """
+        first = {}
+        for k, signature in zip(self.keys, self.signatures):
+            first.setdefault(signature, k)
+        return {k: first[sig] for k, sig in zip(self.keys, self.signatures)}
+
+    def unique(self) -> "LigandLibrary":
+        """
+        Get the library without duplicate ligand entries, keeping the first key of every
+        canonical signature. The result is computed once per library.
+
+        Returns:
+            LigandLibrary: This library if it contains no duplicates, otherwise a collapsed copy.
+        """
+        if self._unique is None:
+            aliases = self.get_aliases()
+            if all(k == v for k, v in aliases.items()):
+                self._unique = self
+            else:
+                self._unique = LigandLibrary(
+                    {k: self.get_dict(k) for k in self.keys if aliases[k] == k}
+                )
+        return self._unique
+
+    def write(self, path: str | Path) -> None:
+        """
+        Save the library to a JSON file in the format of ligands.json.
+
+        Args:
+            path (str | Path): Path to the JSON file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LigandLibrary":
+        """
+        Load a library from a JSON file. Libraries are cached per process and only
+        re-read if the file was modified since it was loaded.
+
+        Args:
+            path (str | Path): Path to the JSON file, e.g. ligands.json.
+
+        Returns:
+            LigandLibrary: The loaded library.
+        """
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+
+        cached = cls._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "r") as file:
+            library = cls(json.load(file))
+
+        cls._cache[path] = (mtime, library)
+        return library
@@ -0,0 +1,111 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+
+class SampleErrorHandler(logging.Handler):
+    """
+    Routes log records carrying a `uid` attribute to the .err file of that sample's output directory.
+
+    Records are tagged via `logger.error(message, extra={"uid": uid})`. The file is opened
+    for every record, so no handler or open file is kept per sample.
+    """
+
+    def __init__(self, root: Path, file_name: str = ".err") -> None:
+        """
+        Initializes a `SampleErrorHandler` instance.
+
+        Args:
+            root (Path): Root folder containing one output directory per UID.
+            file_name (str, optional): Name of the error file. Defaults to ".err".
+        """
+        super().__init__(logging.DEBUG)
+        self.root = Path(root)
+        self.file_name = file_name
+        self.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+        self.addFilter(lambda record: hasattr(record, "uid"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            save_dir = self.root / record.uid
+            save_dir.mkdir(parents=True, exist_ok=True)
+            with open(save_dir / self.file_name, "a") as file:
+                file.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+def get_queue_logger(name: str, queue, level: int = logging.DEBUG) -> logging.Logger:
+    """
+    Create a logger that only puts records on a queue, to be written by a `QueueListener`.
+
+    The logger is not registered with the logging module, so creating one per process or per
+    optimiser does not accumulate handlers on shared named loggers.
+
+    Args:
+        name (str): Name of the logger, shown in records.
+        queue (queue.Queue): Queue read by the listener.
+        level (int, optional): Lowest level that is sent. Defaults to logging.DEBUG.
+
+    Returns:
+        logging.Logger: The logger.
+    """
+    logger = logging.Logger(name, level)
+    logger.addHandler(QueueHandler(queue))
+    return logger
+
+
+class LoggerHandler(logging.Handler):
+    """
+    Passes records on to a logger, applying its level, handlers and propagation.
+    """
+
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__(logging.DEBUG)
+        self.logger = logger
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.logger.isEnabledFor(record.levelno):
+            self.logger.handle(record)
+
+
+def get_sample_logger(
+    name: str, logger: logging.Logger, root: Path, level: int = logging.DEBUG
+) -> logging.Logger:
+    """
+    Create a logger that writes records directly to a logger and routes per-sample errors
+    to their .err files, like the listener of `get_listener`, but in the calling thread.
+
+    Args:
+        name (str): Name of the logger, shown in records.
+        logger (logging.Logger): Logger that receives all records.
+        root (Path): Root folder containing one output directory per UID.
+        level (int, optional): Lowest level that is written. Defaults to logging.DEBUG.
+
+    Returns:
+        logging.Logger: The logger, not registered with the logging module.
+    """
+    sample_logger = logging.Logger(name, level)
+    sample_logger.addHandler(LoggerHandler(logger))
+    sample_logger.addHandler(SampleErrorHandler(root))
+    return sample_logger
+
+
+def get_listener(queue, logger: logging.Logger, root: Path) -> QueueListener:
+    """
+    Create the listener that writes queued records to a logger and routes per-sample
+    errors to their .err files, see `SampleErrorHandler`.
+
+    Args:
+        queue (queue.Queue): Queue written by the queue loggers.
+        logger (logging.Logger): Logger that receives all records.
+        root (Path): Root folder containing one output directory per UID.
+
+    Returns:
+        QueueListener: The listener, not yet started.
+    """
+    return QueueListener(
+        queue, LoggerHandler(logger), SampleErrorHandler(root), respect_handler_level=True
+    )
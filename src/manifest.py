@@ -0,0 +1,142 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .util import truncate_incomplete_line
+
+
+def get_settings_hash(settings: dict) -> str:
+    """
+    Get a short hash of optimisation settings, independent of the order of their keys.
+
+    Args:
+        settings (dict): Settings for Architector's build_complex().
+
+    Returns:
+        str: Hash of the settings.
+    """
+    dump = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha256(dump.encode()).hexdigest()[:16]
+
+
+class RunManifest:
+    """
+    Journal of the state of every sample of an optimisation run.
+
+    Records are appended to a JSON Lines file as samples start and finish, one line
+    per update, and the latest record of a UID wins. Appending a single line is
+    atomic for practical purposes, and an incomplete last line left behind by a
+    crash is ignored. `compact` rewrites the journal via a temporary file and rename.
+    """
+
+    IN_PROGRESS: str = "in_progress"
+    """Status of samples that were started but have not finished."""
+
+    SUCCESS: str = "success"
+    """Status of samples whose output was written."""
+
+    FAILED: str = "failed"
+    """Status of samples whose optimisation failed."""
+
+    def __init__(self, path: Path, settings_hash: str, fsync: bool = False) -> None:
+        """
+        Initializes a `RunManifest` instance and loads existing records.
+
+        Args:
+            path (Path): Path to the JSONL journal.
+            settings_hash (str): Hash of the settings of the current run, see `get_settings_hash`.
+            fsync (bool, optional): Force every record to disk. Defaults to False.
+        """
+        self.path = Path(path)
+        self.settings_hash = settings_hash
+        self.fsync = fsync
+        self.entries = self.load(self.path)
+        self._file = None
+
+    @staticmethod
+    def load(path: Path) -> dict[str, dict]:
+        """
+        Replay a journal.
+
+        Args:
+            path (Path): Path to the JSONL journal.
+
+        Returns:
+            dict[str, dict]: Latest record of every UID.
+        """
+        entries = {}
+        if not path.exists():
+            return entries
+
+        with open(path, "r") as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    break
+                if line.strip() == "":
+                    continue
+                record = json.loads(line)
+                entries[record["uid"]] = record
+        return entries
+
+    def status(self, uid: str) -> str | None:
+        """
+        Get the status of a sample in the current settings.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            str | None: Latest status, or None if the sample is unknown or was run with different settings.
+        """
+        record = self.entries.get(uid)
+        if record is None or record["settings_hash"] != self.settings_hash:
+            return None
+        return record["status"]
+
+    def update(self, uid: str, status: str) -> None:
+        """
+        Record the status of a sample.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            status (str): New status.
+        """
+        record = {
+            "uid": uid,
+            "status": status,
+            "settings_hash": self.settings_hash,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.entries[uid] = record
+
+        if self._file is None:
+            if self.path.exists():
+                truncate_incomplete_line(self.path)
+            self._file = open(self.path, "a")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def compact(self) -> None:
+        """
+        Rewrite the journal with only the latest record of every UID.
+        """
+        self.close()
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as file:
+            for record in self.entries.values():
+                file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self) -> None:
+        """
+        Close the journal file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
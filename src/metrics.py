@@ -0,0 +1,173 @@
+import json
+import os
+from pathlib import Path
+import resource
+import sys
+import time
+import numpy as np
+
+
+def get_peak_rss() -> int:
+    """
+    Get the peak resident memory of the current process.
+
+    Returns:
+        int: Peak resident memory in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunMetrics:
+    """
+    Collects per-sample timings of an optimisation run.
+
+    Every sample is appended to a JSON Lines file with its status, the runtime of every
+    phase, the worker PID and the worker's peak resident memory. Aggregated counts,
+    throughput and latency percentiles are exported in the Prometheus text format, which
+    is rewritten atomically at most every `interval` seconds, so a node exporter or a
+    `watch` can follow long runs. Percentiles are estimated from a uniform random sample
+    of bounded size of every phase's latencies, so memory does not grow with the run.
+    """
+
+    prefix: str = "optimiser"
+    """Prefix of the exported metric names."""
+
+    quantiles: list[float] = [0.5, 0.9, 0.99]
+    """Exported latency quantiles."""
+
+    reservoir_size: int = 10000
+    """Maximum number of latencies kept per phase to estimate the quantiles."""
+
+    def __init__(self, timings_path: Path, metrics_path: Path, interval: float = 10.0) -> None:
+        """
+        Initializes a `RunMetrics` instance, which starts the throughput clock. Timings are appended to an existing file.
+
+        Args:
+            timings_path (Path): Path to the JSONL file of per-sample timings.
+            metrics_path (Path): Path to the Prometheus text file.
+            interval (float, optional): Minimum number of seconds between updates of the metrics file. Defaults to 10.0.
+        """
+        self.timings_path = Path(timings_path)
+        self.metrics_path = Path(metrics_path)
+        self.interval = interval
+
+        self.start = time.time()
+        self.counts = {}
+        # reservoir, sum and count of the latencies of every phase
+        self.latencies = {}
+        self.sums = {}
+        self.n_latencies = {}
+        self._rng = np.random.default_rng()
+        self._last_write = 0.0
+        self._file = None
+
+    def record(
+        self,
+        uid: str,
+        status: str,
+        timings: dict[str, float],
+        pid: int | None = None,
+        peak_rss: int | None = None,
+    ) -> None:
+        """
+        Record a finished sample.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            status (str): Status of the sample.
+            timings (dict[str, float]): Runtime of every phase in seconds.
+            pid (int | None, optional): PID of the worker process. Defaults to None.
+            peak_rss (int | None, optional): Peak resident memory of the worker process in bytes. Defaults to None.
+        """
+        total = sum(timings.values())
+        record = {
+            "uid": uid,
+            "status": status,
+            "pid": pid,
+            "peak_rss": peak_rss,
+            "total": total,
+            "timings": timings,
+            "timestamp": time.time(),
+        }
+        if self._file is None:
+            self._file = open(self.timings_path, "a")
+        self._file.write(json.dumps(record) + "\n")
+
+        self.counts[status] = self.counts.get(status, 0) + 1
+        # samples stopped by the worker limits have no timings
+        if len(timings) > 0:
+            for phase, seconds in [("total", total), *timings.items()]:
+                self.add_latency(phase, seconds)
+
+        if time.time() - self._last_write >= self.interval:
+            self.write()
+
+    def add_latency(self, phase: str, seconds: float) -> None:
+        """
+        Add a latency to the reservoir of a phase, replacing a random one once it is full.
+
+        Args:
+            phase (str): Name of the phase.
+            seconds (float): Runtime of the phase in seconds.
+        """
+        n = self.n_latencies.get(phase, 0) + 1
+        self.n_latencies[phase] = n
+        self.sums[phase] = self.sums.get(phase, 0.0) + seconds
+
+        reservoir = self.latencies.setdefault(phase, [])
+        if len(reservoir) < self.reservoir_size:
+            reservoir.append(seconds)
+        else:
+            idx = self._rng.integers(n)
+            if idx < self.reservoir_size:
+                reservoir[idx] = seconds
+
+    def write(self) -> None:
+        """
+        Rewrite the metrics file.
+        """
+        if self._file is not None:
+            self._file.flush()
+
+        elapsed = time.time() - self.start
+        n = sum(self.counts.values())
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_samples_total Finished samples by status.",
+            f"# TYPE {p}_samples_total counter",
+        ]
+        for status, count in sorted(self.counts.items()):
+            lines.append(f'{p}_samples_total{{status="{status}"}} {count}')
+
+        lines += [
+            f"# HELP {p}_throughput_samples_per_second Finished samples per second since the start of the run.",
+            f"# TYPE {p}_throughput_samples_per_second gauge",
+            f"{p}_throughput_samples_per_second {n / elapsed if elapsed > 0 else 0.0:.6g}",
+            f"# HELP {p}_elapsed_seconds Seconds since the start of the run.",
+            f"# TYPE {p}_elapsed_seconds gauge",
+            f"{p}_elapsed_seconds {elapsed:.6g}",
+            f"# HELP {p}_phase_seconds Per-sample runtime of every phase.",
+            f"# TYPE {p}_phase_seconds summary",
+        ]
+        for phase, values in sorted(self.latencies.items()):
+            for q, v in zip(self.quantiles, np.quantile(values, self.quantiles)):
+                lines.append(f'{p}_phase_seconds{{phase="{phase}",quantile="{q}"}} {v:.6g}')
+            lines.append(f'{p}_phase_seconds_sum{{phase="{phase}"}} {self.sums[phase]:.6g}')
+            lines.append(f'{p}_phase_seconds_count{{phase="{phase}"}} {self.n_latencies[phase]}')
+
+        tmp_path = self.metrics_path.with_name(f"{self.metrics_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.metrics_path)
+        self._last_write = time.time()
+
+    def close(self) -> None:
+        """
+        Write the final metrics and close the timings file.
+        """
+        self.write()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
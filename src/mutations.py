@@ -1,6 +1,7 @@
 import pandas as pd
 from pathlib import Path
 
+from .bundle import Bundle, BundleWriter, format_frame
 from .constants import lanthanides, actinides, ln_multiplicity, ac_multiplicity
 from .io import save_chrg, save_uhf, save_xyz
 from .util import read_xyz, check_max_one_overlap
@@ -8,7 +9,7 @@ from .util import read_xyz, check_max_one_overlap
 
 class Mutator:
     dir: Path
-    """Directory containing all compounds in subfolders."""
+    """Directory containing all compounds in subfolders, or a bundle written by `BundleWriter`."""
 
     oxidation_state: int
     """Original oxidation state of central atom."""
@@ -19,6 +20,9 @@ class Mutator:
     outdir: Path | None
     """Directory containing all mutated compounds."""
 
+    output_format: str
+    """"directory" for one subfolder per mutated compound, "bundle" for a bundle in `outdir`."""
+
     xyz_file: str = "sample.xyz"
     """Naming scheme for .xyz files."""
 
@@ -35,24 +39,41 @@ class Mutator:
         oxidation_state: int,
         oxidation_state_new: int,
         outdir: Path = None,
+        output_format: str = "directory",
     ) -> None:
         self.dir = dir
         self.oxidation_state = oxidation_state
         self.oxidation_state_new = oxidation_state_new
         self.outdir = outdir
+        self.output_format = output_format
 
         if self.outdir == None:
-            self.outdir == self.dir
+            self.outdir = self.dir
         self.outdir.mkdir(parents=True, exist_ok=True)
+        self._writer = None
 
     def mutate(self) -> None:
         """
         Iterate through each sub-directory in the parent directory and mutate the compounds within.
+        If the parent directory is a bundle, the compounds are read from it directly.
         """
-        # avoid IO issues for self.outdir == self.dir
-        for fp in [f for f in self.dir.iterdir()]:
-            if fp.is_dir():
-                self.mutate_compound(fp)
+        if self.output_format == "bundle":
+            self._writer = BundleWriter(self.outdir, batch_size=1000)
+
+        if Bundle.is_bundle(self.dir):
+            bundle = Bundle(self.dir)
+            for uid in list(bundle):
+                elements, coordinates, info = bundle.read(uid)
+                self.mutate_structure(uid, elements, coordinates, info["charge"])
+        else:
+            # avoid IO issues for self.outdir == self.dir
+            for fp in [f for f in self.dir.iterdir()]:
+                if fp.is_dir():
+                    self.mutate_compound(fp)
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
 
     def mutate_compound(self, dir: Path) -> None:
         """
@@ -69,26 +90,15 @@ class Mutator:
             if not (dir / file).exists():
                 raise IOError(f"Required file {file} not found in {dir}")
 
-        elements, _ = read_xyz(dir / self.xyz_file)
+        if self._writer is not None:
+            elements, coordinates = read_xyz(dir / self.xyz_file)
+            with open(dir / self.chrg_file, "r") as file:
+                charge = int(file.readline().strip())
+            self.mutate_structure(dir.name, elements, coordinates, charge)
+            return
 
-        # check for mono-complex
-        _all = lanthanides + actinides
-        assert check_max_one_overlap(
-            _all, elements
-        ), "More than one central atom present"
-
-        # automatically detect central atom
-        central_atom = set(_all).intersection(set(elements)).pop()
-
-        # permute other elements
-        if central_atom in lanthanides:
-            elements_to_permute = lanthanides.copy()
-        elif central_atom in actinides:
-            elements_to_permute = actinides.copy()
-        else:
-            raise ValueError("Only lanthanides and actinides supported.")
-
-        elements_to_permute.remove(central_atom)
+        elements, _ = read_xyz(dir / self.xyz_file)
+        central_atom, elements_to_permute = self.get_elements_to_permute(elements)
 
         for element in elements_to_permute:
             # Assume each compound saved by uid (uid == dir)
@@ -116,6 +126,80 @@ class Mutator:
             )
             save_uhf(new_unpels, str(outdir / self.uhf_file))
 
+    def mutate_structure(
+        self,
+        uid: str,
+        elements: list[str],
+        coordinates: list[tuple[float, float, float]],
+        charge: int,
+    ) -> None:
+        """
+        Mutate a single compound given in memory and save the mutated compounds in the output format.
+
+        Args:
+            uid (str): The UID of the compound.
+            elements (list[str]): Element symbols of the compound.
+            coordinates (list[tuple[float, float, float]]): Coordinates of the compound.
+            charge (int): Total charge of the compound.
+        """
+        central_atom, elements_to_permute = self.get_elements_to_permute(elements)
+        new_charge = charge - self.oxidation_state + self.oxidation_state_new
+
+        for element in elements_to_permute:
+            new_uid = self.mutated_uid(uid, element)
+            new_elements = [element if e == central_atom else e for e in elements]
+            new_unpels = (
+                self.calc_multiplicity(CA=element, OS=self.oxidation_state_new) - 1
+            )
+
+            if self._writer is not None:
+                self._writer.write(
+                    new_uid, new_elements, coordinates, new_charge, new_unpels
+                )
+                continue
+
+            outdir = self.outdir / new_uid
+            outdir.mkdir(parents=True, exist_ok=True)
+            with open(outdir / self.xyz_file, "w") as file:
+                file.write(
+                    format_frame(new_uid, new_elements, coordinates, new_charge, new_unpels)
+                )
+            save_chrg(new_charge, str(outdir / self.chrg_file))
+            save_uhf(new_unpels, str(outdir / self.uhf_file))
+
+    def get_elements_to_permute(self, elements: list[str]) -> tuple[str, list[str]]:
+        """
+        Detect the central atom of a compound and the elements it is mutated to.
+
+        Args:
+            elements (list[str]): Element symbols of the compound.
+
+        Raises:
+            ValueError: If the central atom is neither a lanthanide nor an actinide.
+
+        Returns:
+            tuple[str, list[str]]: The central atom and the elements to replace it with.
+        """
+        # check for mono-complex
+        _all = lanthanides + actinides
+        assert check_max_one_overlap(
+            _all, elements
+        ), "More than one central atom present"
+
+        # automatically detect central atom
+        central_atom = set(_all).intersection(set(elements)).pop()
+
+        # permute other elements
+        if central_atom in lanthanides:
+            elements_to_permute = lanthanides.copy()
+        elif central_atom in actinides:
+            elements_to_permute = actinides.copy()
+        else:
+            raise ValueError("Only lanthanides and actinides supported.")
+
+        elements_to_permute.remove(central_atom)
+        return central_atom, elements_to_permute
+
     def mutate_xyz(
         self, xyz_to_mutate: str, old_CA: str, new_CA: str, save_path: str
     ) -> None:
@@ -232,7 +316,7 @@ class Mutator:
                 "This function works now only for lanthanides and actinides!"
             )
 
-        return int(df[df["element"] == CA.lower()][str(OS)])
+        return int(df[df["element"] == CA.lower()][str(OS)].iloc[0])
 
     def mutated_uid(self, uid: str, new_ca: str) -> str:
         """
@@ -1,20 +1,90 @@
-from architector import build_complex, convert_io_molecule
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+import importlib
+from itertools import islice
 import logging
+import multiprocessing
+import os
 from pathlib import Path
+import pickle
+import queue
+import sys
+import time
+from types import ModuleType
 from tqdm import tqdm
 
+from .bundle import Bundle, BundleWriter, format_frame, parse_frame
+from .cache import ResultCache, get_input_hash
+from .costmodel import CostModel
 from .dataset import SampleDataset, Sample
-from .io import save_xyz, save_chrg, save_uhf
+from .io import get_xyz, get_xyz_string, save_xyz, save_chrg, save_uhf, sync_path
+from .logs import get_listener, get_queue_logger, get_sample_logger
+from .manifest import RunManifest, get_settings_hash
+from .metrics import RunMetrics, get_peak_rss
+from .pool import WorkerPool, get_cpu_sets, get_thread_env, get_worker_log_queue
+from .screening import PreScreen
+from .util import read_xyz
+from .workqueue import WorkQueue
+from .writer import OutputWriter
 
 
 class Optimiser:
+    prescreen_file: str = "prescreen_rejected.jsonl"
+    """File in the root folder listing samples rejected by pre-screening and the reasons."""
+
+    manifest_file: str = "manifest.jsonl"
+    """File in the root folder recording the state of every sample, see `RunManifest`."""
+
+    tmp_prefix: str = ".tmp."
+    """Prefix of output files while they are written."""
+
+    cost_model_file: str = "cost_model.json"
+    """File in the root folder storing the `CostModel` between runs."""
+
+    timings_file: str = "timings.jsonl"
+    """File in the root folder with the phase timings of every sample, see `RunMetrics`."""
+
+    metrics_file: str = "metrics.prom"
+    """File in the root folder with aggregated metrics in the Prometheus text format."""
+
+    bundle_dir: str = "bundle"
+    """Folder in the root folder holding the bundle if `output_format` is "bundle", see `BundleWriter`."""
+
+    output_files: list[str] = [".CHRG", ".UHF", "sample.xyz"]
+    """Files written by `write_output`, in the order they are completed."""
+
+    conformers_file: str = "conformers.xyz"
+    """File in every output directory with the conformers kept with `keep_conformers`, lowest energy first."""
+
+    conformers_dir: str = "conformers"
+    """Folder in the root folder holding the kept conformers if `output_format` is "bundle", one record per sample."""
+
     def __init__(
         self,
         root: Path,
         settings: dict[str],
         nprocs: int | None = 1,
         logger: logging.Logger | None = None,
+        prescreen: PreScreen | None = None,
+        chunksize: int = 1,
+        max_pending: int | None = None,
+        resume: bool = False,
+        retry_failed: bool = False,
+        timeout: float | None = None,
+        max_memory: int | None = None,
+        max_tasks_per_worker: int | None = None,
+        cache: ResultCache | None = None,
+        schedule_by_cost: bool = False,
+        metrics_interval: float = 10.0,
+        output_format: str = "directory",
+        background_writer: bool = False,
+        write_queue_size: int = 1000,
+        write_batch_size: int = 100,
+        fsync: bool = False,
+        backend=None,
+        keep_conformers: int | None = None,
+        warm_start: Path | None = None,
+        threads_per_worker: int | None = None,
+        pin_cores: bool = False,
     ):
         """
         The Optimiser class can create .xyz geometries from a given `SampleDataset` using Architector's build_complex() method.
@@ -25,85 +95,842 @@ class Optimiser:
             nprocs (int | None, optional): Number of processes for calculations. Recommended to set equal to the number of CPUs.
                                         Choosing `None` sets nprocs to max available number of processor.
             logger (logging.Logger | None, optional): Logger used for logging. If None, a default logger will be created.
+                Records of the per-sample hot path, also from worker processes, reach it through a queue.
+            prescreen (PreScreen | None, optional): Pre-screening stage that rejects samples before any optimisation.
+                Reasons of rejected samples are saved in `prescreen_file`. Defaults to None.
+            chunksize (int, optional): Number of samples sent to a worker process per task. Defaults to 1.
+            max_pending (int | None, optional): Maximum number of tasks in flight during parallel optimisation.
+                Choosing `None` uses twice the number of processes.
+            resume (bool, optional): Skip samples that were completed by a previous run with the same settings,
+                according to the manifest in the root folder. Samples left in progress by a crashed run are
+                recovered if their output is complete, otherwise rerun. Defaults to False.
+            retry_failed (bool, optional): When resuming, rerun samples that failed before. Defaults to False.
+            timeout (float | None, optional): Wall-clock limit per sample in seconds. Workers exceeding it are killed
+                and replaced, also when nprocs is 1. Defaults to None.
+            max_memory (int | None, optional): Limit of the resident memory per worker process in bytes.
+                Workers exceeding it are killed and replaced. Defaults to None.
+            max_tasks_per_worker (int | None, optional): Number of samples after which a worker process is replaced,
+                to release memory leaked by the underlying libraries. Defaults to None.
+            cache (ResultCache | None, optional): Cache of outputs by Architector input. Hits are copied into the
+                root folder instead of calling build_complex(), new outputs are stored. Defaults to None.
+            schedule_by_cost (bool, optional): Dispatch samples longest-first during parallel optimisation, as
+                estimated by the `CostModel` in `cost_model_file`. The model is refined with the measured runtimes
+                and saved after every run. Defaults to False.
+            metrics_interval (float, optional): Minimum number of seconds between updates of `metrics_file`.
+                Defaults to 10.0.
+            output_format (str, optional): "directory" writes one sub-directory per sample with .xyz, .CHRG and .UHF
+                files. "bundle" appends the structures to shared multi-frame extended XYZ files in `bundle_dir`,
+                which avoids millions of small files; see `Bundle.export` for the directory layout.
+                Defaults to "directory".
+            background_writer (bool, optional): Write outputs in a background thread of the main process, see
+                `OutputWriter`. Worker processes only compute and return the content of the output files, the
+                thread writes them in batches. Defaults to False.
+            write_queue_size (int, optional): Number of outputs waiting for the background writer at which the
+                optimisation pauses until it catches up. Defaults to 1000.
+            write_batch_size (int, optional): Maximum number of outputs the background writer writes at once.
+                Defaults to 100.
+            fsync (bool, optional): With `background_writer`, force every batch to disk before its samples are
+                recorded as successful. Defaults to False.
+            backend (optional): Module or object providing build_complex() and convert_io_molecule() with the
+                interface of Architector, e.g. a stand-in for benchmarks. Modules are imported by name in the worker
+                processes, objects are sent to them and have to be picklable. If None, Architector is imported on
+                first use. Defaults to None.
+            keep_conformers (int | None, optional): Number of conformers returned by build_complex() to keep,
+                ranked by their reported energy. They are saved with energies and metadata as frames of
+                `conformers_file`, or of the bundle in `conformers_dir`; see `read_conformers`. If None, only
+                the first conformer is saved. Defaults to None.
+            warm_start (Path | None, optional): Folder with the outputs of an earlier run, in the directory layout
+                or a bundle, e.g. of a cheaper stage of a `Pipeline`. Samples with a structure there are relaxed from
+                it with the relax_complex() function of the backend instead of assembled by build_complex().
+                Backends without relax_complex() build all samples from scratch. Running without a dataset relaxes
+                every structure of the folder, e.g. the mutated compounds written by `Mutator`. Defaults to None.
+            threads_per_worker (int | None, optional): Number of threads of OpenMP, MKL and OpenBLAS in every
+                worker process, see `get_thread_env`. Workers are then started with the "spawn" method, so the
+                limit is set before the numerical libraries are loaded, also when nprocs is 1. Scripts have to
+                guard their entry point with `if __name__ == "__main__":`. If None, every library starts one
+                thread per core. See `benchmark_layouts` for choosing it. Defaults to None.
+            pin_cores (bool, optional): Pin every worker process to its own `threads_per_worker` cores, or to
+                a single core without thread limit, see `get_cpu_sets`. Only available on Linux. Defaults to False.
 
         Raises:
-            ValueError: If nprocs is less than 1.
+            ValueError: If nprocs, keep_conformers or threads_per_worker is less than 1, the output format is
+                unknown, cores are to be pinned on a platform without CPU affinity, or the backend cannot be
+                sent to the worker processes.
         """
         self.root = root
         self.root.mkdir(parents=True, exist_ok=True)
         self.settings = settings
         self.nprocs = nprocs
         self.logger = self.default_logger() if logger is None else logger
+        # records of the hot path are written by a listener thread during runs, see `listen_logs`,
+        # and directly otherwise
+        self.log_queue = queue.Queue()
+        self.log_level = self.logger.getEffectiveLevel()
+        self.sample_logger = get_sample_logger(
+            f"{self.__class__.__name__}Logger", self.logger, self.root, self.log_level
+        )
+        self.prescreen = prescreen
+        self.chunksize = chunksize
+        self.max_pending = max_pending
+        self.resume = resume
+        self.retry_failed = retry_failed
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.cache = cache
+        self.cost_model = (
+            CostModel.load(self.root / self.cost_model_file)
+            if schedule_by_cost
+            else None
+        )
+        self.metrics_interval = metrics_interval
+        self.metrics = None
+        self.output_format = output_format
+        # bundle writers of the current process by folder
+        self.bundle_writers = {}
+        self.background_writer = background_writer
+        self.write_queue_size = write_queue_size
+        self.write_batch_size = write_batch_size
+        self.fsync = fsync
+        self.backend = backend
+        self.keep_conformers = keep_conformers
+        self.warm_start = warm_start
+        self.warm_start_bundle = (
+            Bundle(warm_start)
+            if warm_start is not None and Bundle.is_bundle(warm_start)
+            else None
+        )
+        self.threads_per_worker = threads_per_worker
+        self.pin_cores = pin_cores
+        # runtimes of the phases of the last `optimise` call
+        self.timings = {}
+        # output of the last `optimise` call left to the background writer, see `write_batch`
+        self.output = None
 
-        if self.nprocs < 1 and not self.nprocs == None:
+        if self.nprocs is not None and self.nprocs < 1:
             raise ValueError(
                 "For the number of processes, please use an integer larger than 1."
             )
+        if self.output_format not in ("directory", "bundle"):
+            raise ValueError(
+                f"Unknown output format {self.output_format}, please use 'directory' or 'bundle'."
+            )
+        if self.keep_conformers is not None and self.keep_conformers < 1:
+            raise ValueError(
+                "For the number of kept conformers, please use an integer larger than 0."
+            )
+        if self.threads_per_worker is not None and self.threads_per_worker < 1:
+            raise ValueError(
+                "For the number of threads per worker, please use an integer larger than 0."
+            )
+        if self.pin_cores and not hasattr(os, "sched_setaffinity"):
+            raise ValueError("Pinning cores is not supported on this platform.")
+        self.check_backend()
+
+    def __getstate__(self) -> dict:
+        # loggers hold open file handles and are not sent to worker processes,
+        # workers log through the queue installed by `_init_worker`
+        state = self.__dict__.copy()
+        for name in ("logger", "sample_logger", "log_queue", "metrics"):
+            state[name] = None
+        # every worker writes its own shards
+        state["bundle_writers"] = {}
+        # modules cannot be pickled, workers import them by name, see `get_backend`
+        if isinstance(self.backend, ModuleType):
+            state["backend"] = self.backend.__name__
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
 
-    def run(self, dataset: SampleDataset) -> None:
+    def run(self, dataset: SampleDataset | None = None) -> dict[str, str]:
         """
         Run the optimization process on the provided dataset.
 
         Args:
-            dataset (SampleDataset): The dataset on which the optimization will be performed.
+            dataset (SampleDataset | None, optional): The dataset on which the optimization will be performed.
+                If None, every structure in `warm_start` is relaxed, see `get_warm_start_dataset`. Defaults to None.
+
+        Raises:
+            ValueError: If no dataset is passed and there is no warm start folder, the backend cannot relax
+                structures, or pre-screening or cost scheduling is enabled, which need the content of the samples.
+
+        Returns:
+            dict[str, str]: Status of every optimised sample by UID. Besides "success" and "failed", samples
+                stopped by the worker limits are marked "timeout", "memory_exceeded" or "crashed".
         """
         self.logger.info(f"Start optimisation")
+        self.open_metrics()
+        if dataset is None:
+            dataset = self.get_warm_start_dataset()
+        if self.prescreen is not None:
+            dataset = self.run_prescreen(dataset)
+
+        manifest = RunManifest(
+            self.root / self.manifest_file, get_settings_hash(self.settings)
+        )
+
+        status = {}
+        if self.resume:
+            dataset, status = self.select_pending(dataset, manifest)
+
         if self.nprocs == 1:
-            self.batch_opt(dataset)
+            status.update(self.batch_opt(dataset, manifest))
         else:
-            self.parallel_opt(dataset)
+            status.update(self.parallel_opt(dataset, manifest))
+
+        manifest.compact()
+        self.close_metrics()
+        self.close_bundle_writer()
 
-    def batch_opt(self, dataset: SampleDataset) -> None:
+        counts = {}
+        for s in status.values():
+            counts[s] = counts.get(s, 0) + 1
+        self.logger.info(f"Summary: {counts}")
+        return status
+
+    def run_distributed(
+        self,
+        queue: WorkQueue,
+        dataset: SampleDataset | None = None,
+        chunk_size: int = 100,
+        poll_interval: float = 10.0,
+    ) -> dict[str, str]:
+        """
+        Optimise samples pulled from a shared `WorkQueue` until the queue is finished.
+
+        Any number of optimisers on different hosts can work on one queue and write into the same
+        root folder. Tasks are optimised with `batch_opt` or `parallel_opt`, depending on nprocs,
+        while a background thread renews their lease. Pre-screening should be applied to the dataset
+        beforehand; the manifest is replaced by the records of the queue.
+
+        Args:
+            queue (WorkQueue): The shared queue.
+            dataset (SampleDataset | None, optional): Dataset to populate the queue with, see `WorkQueue.populate`.
+                Participants passing it take over populating if the first one dies. Defaults to None.
+            chunk_size (int, optional): Number of samples per task when populating. Defaults to 100.
+            poll_interval (float, optional): Seconds to wait for leased tasks of other participants
+                to finish or expire when no task is pending. Defaults to 10.0.
+
+        Returns:
+            dict[str, str]: Status of every sample optimised by this participant by UID.
+        """
+        self.logger.info(f"Start distributed optimisation as {queue.worker_id}")
+        self.open_metrics()
+        status = {}
+        while True:
+            if dataset is not None:
+                queue.populate(dataset, chunk_size)
+
+            n_requeued = queue.requeue_expired()
+            if n_requeued > 0:
+                self.logger.info(f"Requeued {n_requeued} tasks with expired lease.")
+
+            task = queue.claim()
+            if task is None:
+                if queue.is_finished():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            self.logger.info(f"Leased {task.name} with {len(task.dataset)} samples.")
+            stop = queue.start_heartbeat(task)
+            try:
+                if self.nprocs == 1:
+                    results = self.batch_opt(task.dataset)
+                else:
+                    results = self.parallel_opt(task.dataset)
+            finally:
+                stop.set()
+            queue.complete(task, results)
+            status.update(results)
+
+        self.close_metrics()
+        self.close_bundle_writer()
+        self.logger.info(f"Queue finished, {len(status)} samples optimised here.")
+        return status
+
+    def get_warm_start_dataset(self) -> SampleDataset:
+        """
+        List the structures in the `warm_start` folder, e.g. the mutated compounds written by `Mutator`,
+        as samples to relax. The samples only carry the UID and have no ligands, as their geometry, charge
+        and number of unpaired electrons are read from the folder, see `get_start_structure`.
+
+        Raises:
+            ValueError: If there is no warm start folder, the backend cannot relax structures,
+                or pre-screening or cost scheduling is enabled.
+
+        Returns:
+            SampleDataset: One sample per structure.
+        """
+        if self.warm_start is None:
+            raise ValueError("Please pass a dataset or a warm start folder.")
+        if self.get_relaxer() is None:
+            raise ValueError(
+                "The backend has no relax_complex(), please pass a dataset instead."
+            )
+        if self.prescreen is not None or self.cost_model is not None:
+            raise ValueError(
+                "Pre-screening and cost scheduling need the content of the samples, please pass a dataset."
+            )
+
+        if self.warm_start_bundle is not None:
+            uids = list(self.warm_start_bundle)
+        else:
+            uids = sorted(fp.name for fp in Path(self.warm_start).iterdir() if fp.is_dir())
+        self.logger.info(f"Relaxing {len(uids)} structures from {self.warm_start}.")
+        # placeholders, the structures are read from the folder
+        core = {"metal": "", "coreCN": 0}
+        parameters = {"metal_ox": 0, "full_spin": 0}
+        return SampleDataset([Sample(uid, core, [], parameters) for uid in uids])
+
+    def run_prescreen(self, dataset: SampleDataset) -> SampleDataset:
+        """
+        Reject hopeless samples with the pre-screening stage and record the reasons.
+
+        Args:
+            dataset (SampleDataset): The dataset to screen.
+
+        Returns:
+            SampleDataset: The accepted samples.
+        """
+        accepted, rejected = self.prescreen.split(dataset)
+        self.prescreen.write_report(rejected, self.root / self.prescreen_file)
+        self.logger.info(
+            f"Pre-screening accepted {len(accepted)} and rejected {len(rejected)} samples."
+        )
+        return accepted
+
+    def select_pending(
+        self, dataset: SampleDataset, manifest: RunManifest
+    ) -> tuple[SampleDataset, dict[str, str]]:
+        """
+        Select the samples of a dataset that still have to be optimised when resuming a run.
+
+        Args:
+            dataset (SampleDataset): The full dataset.
+            manifest (RunManifest): Manifest of previous runs.
+
+        Returns:
+            tuple[SampleDataset, dict[str, str]]: Samples to optimise and the status of all skipped samples by UID.
+        """
+        pending = SampleDataset([])
+        skipped = {}
+        bundle = (
+            Bundle(self.root / self.bundle_dir)
+            if self.output_format == "bundle"
+            else None
+        )
+
+        for sample in dataset:
+            record = manifest.entries.get(sample.uid)
+            status = manifest.status(sample.uid)
+            fp = self.root / sample.uid
+
+            if status == RunManifest.SUCCESS:
+                skipped[sample.uid] = status
+                continue
+
+            # failed, including samples stopped by the worker limits
+            failed = status not in (None, RunManifest.SUCCESS, RunManifest.IN_PROGRESS)
+            if failed and not self.retry_failed:
+                skipped[sample.uid] = status
+                continue
+
+            # finished by a crashed run before it was recorded, or by a run without manifest
+            recoverable = status == RunManifest.IN_PROGRESS or record is None
+            if bundle is not None:
+                complete = sample.uid in bundle
+            else:
+                complete = self.has_complete_output(fp)
+            if recoverable and complete:
+                manifest.update(sample.uid, RunManifest.SUCCESS)
+                skipped[sample.uid] = RunManifest.SUCCESS
+                continue
+
+            self.clean_output(fp)
+            pending.add_sample(sample)
+
+        self.logger.info(
+            f"Resuming: {len(skipped)} samples skipped, {len(pending)} samples pending."
+        )
+        return pending, skipped
+
+    def has_complete_output(self, save_dir: Path, name: str = "sample") -> bool:
+        """
+        Check if a directory contains a complete output written by `write_output`.
+
+        Args:
+            save_dir (Path): Path to the output directory.
+            name (str, optional): Name of the files. Defaults to "sample".
+
+        Returns:
+            bool: True if the .xyz, .CHRG and .UHF files exist and the .xyz file is complete.
+        """
+        mol_path = save_dir / f"{name}.xyz"
+        if not all(
+            p.exists() for p in [mol_path, save_dir / ".CHRG", save_dir / ".UHF"]
+        ):
+            return False
+
+        with open(mol_path, "r") as f:
+            lines = f.readlines()
+        try:
+            n_atoms = int(lines[0].strip())
+        except (IndexError, ValueError):
+            return False
+        return len([l for l in lines[2:] if l.strip() != ""]) == n_atoms
+
+    def clean_output(self, save_dir: Path) -> None:
+        """
+        Remove partially written files and errors of a previous attempt from an output directory.
+
+        Args:
+            save_dir (Path): Path to the output directory.
+        """
+        if not save_dir.is_dir():
+            return
+        for fp in save_dir.iterdir():
+            if fp.name.startswith(self.tmp_prefix) or fp.name == ".err":
+                fp.unlink()
+
+    def batch_opt(
+        self, dataset: SampleDataset, manifest: RunManifest | None = None
+    ) -> dict[str, str]:
         """
         Perform batch optimization on the provided dataset.
 
+        If a timeout, memory limit, worker recycling, thread limit or core pinning is set, the
+        samples are optimised in a single worker process that can be replaced, see `pool_opt`.
+
         Args:
             dataset (SampleDataset): The dataset containing samples to be optimized.
+            manifest (RunManifest | None, optional): Manifest to record the state of every sample in. Defaults to None.
+
+        Returns:
+            dict[str, str]: Status of every sample by UID.
         """
         self.logger.info(f"Batch optimisation on {len(dataset)} samples.")
-        for sample in tqdm(dataset, desc="Processing", unit="sample"):
-            self.optimise(sample, self.settings)
+        if self.has_worker_limits():
+            status = self.pool_opt(dataset, 1, manifest)
+            self.logger.info(f"Finished batch optimisation.")
+            return status
+
+        status = {}
+        with self.listen_logs(), self.write_outputs() as writer:
+            for sample in tqdm(dataset, desc="Processing", unit="sample"):
+                if manifest is not None:
+                    manifest.update(sample.uid, RunManifest.IN_PROGRESS)
+                s = self.optimise(sample, self.settings)
+                self.finish_sample(
+                    writer,
+                    sample,
+                    s,
+                    self.timings,
+                    os.getpid(),
+                    get_peak_rss(),
+                    self.output,
+                    manifest,
+                    status,
+                )
+            self.finish_writes(writer, manifest, status)
+        self.save_cost_model()
+        if self.metrics is not None:
+            self.metrics.write()
         self.logger.info(f"Finished batch optimisation.")
+        return status
 
-    def parallel_opt(self, dataset: "SampleDataset") -> None:
+    def parallel_opt(
+        self, dataset: "SampleDataset", manifest: RunManifest | None = None
+    ) -> dict[str, str]:
         """
         Perform parallel optimization on the provided dataset.
 
+        Samples are sent to the worker processes in chunks of `chunksize`, while at most
+        `max_pending` chunks are in flight at any time. Results are handled as they complete.
+        With `schedule_by_cost`, the most expensive samples are sent first, so that no large
+        complex is left running alone at the end.
+
         Args:
             dataset (SampleDataset): The dataset containing samples to be optimized.
+            manifest (RunManifest | None, optional): Manifest to record the state of every sample in. Defaults to None.
+
+        Returns:
+            dict[str, str]: Status of every sample by UID.
         """
         self.logger.info(
             f"Parallel optimisation on {len(dataset)} samples. Number of processes: {self.nprocs}"
         )
-        # threading
-        # with ThreadPoolExecutor() as executor:
-        #     executor.map(self.optimise, [(sample, self.settings) for sample in dataset])
-
-        # multiprocesses
-        with ProcessPoolExecutor(max_workers=self.nprocs) as executor:
-            settings = [self.settings] * self.nprocs
-            executor.map(self.optimise, dataset.samples, settings)
+        nprocs = os.cpu_count() if self.nprocs is None else self.nprocs
+        status = self.pool_opt(dataset, nprocs, manifest)
         self.logger.info(f"Finished parallel optimisation.")
+        return status
+
+    def has_worker_limits(self) -> bool:
+        """
+        Check if any of timeout, memory limit, worker recycling, thread limit or core pinning is set.
+
+        Returns:
+            bool: True if samples have to be optimised in separate worker processes.
+        """
+        return (
+            self.timeout is not None
+            or self.max_memory is not None
+            or self.max_tasks_per_worker is not None
+            or self.threads_per_worker is not None
+            or self.pin_cores
+        )
+
+    def pool_opt(
+        self, dataset: SampleDataset, nprocs: int, manifest: RunManifest | None = None
+    ) -> dict[str, str]:
+        """
+        Optimise a dataset in a `WorkerPool` that enforces the timeout, memory limit and worker recycling,
+        and starts its workers with the thread limit and core pinning.
+
+        Samples of a killed worker's chunk that were not started yet are rescheduled. The stopped
+        sample is marked with the pool's status and the reason is written to its .err file.
+
+        Args:
+            dataset (SampleDataset): The dataset containing samples to be optimized.
+            nprocs (int): Number of worker processes.
+            manifest (RunManifest | None, optional): Manifest to record the state of every sample in. Defaults to None.
+
+        Returns:
+            dict[str, str]: Status of every sample by UID.
+        """
+        max_pending = 2 * nprocs if self.max_pending is None else self.max_pending
+
+        if self.cost_model is not None and nprocs > 1:
+            samples = (dataset[i] for i in self.get_cost_order(dataset))
+        else:
+            samples = iter(dataset)
+        in_flight = {}
+        status = {}
+        exhausted = False
+
+        # the optimiser is sent once per worker instead of once per task
+        with self.listen_logs(), self.write_outputs() as writer, WorkerPool(
+            _optimise_sample,
+            nprocs,
+            initializer=_init_worker,
+            initargs=(self,),
+            timeout=self.timeout,
+            max_memory=self.max_memory,
+            max_tasks_per_worker=self.max_tasks_per_worker,
+            context=(
+                None
+                if self.threads_per_worker is None
+                else multiprocessing.get_context("spawn")
+            ),
+            log_queue=self.log_queue,
+            env=(
+                None
+                if self.threads_per_worker is None
+                else get_thread_env(self.threads_per_worker)
+            ),
+            cpu_sets=(
+                get_cpu_sets(nprocs, self.threads_per_worker or 1)
+                if self.pin_cores
+                else None
+            ),
+        ) as pool, tqdm(total=len(dataset), desc="Processing", unit="sample") as progress:
+            while True:
+                # refill the window
+                while not exhausted and pool.pending < max_pending * self.chunksize:
+                    chunk = list(islice(samples, self.chunksize))
+                    if len(chunk) == 0:
+                        exhausted = True
+                        break
+                    for sample in chunk:
+                        in_flight[sample.uid] = sample
+                        if manifest is not None:
+                            manifest.update(sample.uid, RunManifest.IN_PROGRESS)
+                    pool.submit([(s.uid, (s, self.settings)) for s in chunk])
+
+                if pool.pending == 0:
+                    break
+
+                for uid, s, result in pool.wait():
+                    sample = in_flight.pop(uid)
+                    if s == WorkerPool.OK:
+                        s, timings, pid, peak_rss, output = result
+                    else:
+                        self.write_error(uid, f"{s}: {result}")
+                        timings, pid, peak_rss, output = {}, None, None, None
+                    progress.update(
+                        self.finish_sample(
+                            writer,
+                            sample,
+                            s,
+                            timings,
+                            pid,
+                            peak_rss,
+                            output,
+                            manifest,
+                            status,
+                        )
+                    )
+            progress.update(self.finish_writes(writer, manifest, status))
+
+        self.save_cost_model()
+        if self.metrics is not None:
+            self.metrics.write()
+        return status
+
+    def finish_sample(
+        self,
+        writer: OutputWriter | None,
+        sample: Sample,
+        status: str,
+        timings: dict[str, float],
+        pid: int | None,
+        peak_rss: int | None,
+        output: dict | None,
+        manifest: RunManifest | None,
+        results: dict[str, str],
+    ) -> int:
+        """
+        Record an optimised sample, or pass its output to the background writer and record
+        the samples whose output the writer finished meanwhile.
+
+        Args:
+            writer (OutputWriter | None): The background writer, if any.
+            sample (Sample): The optimised sample.
+            status (str): Status returned by `optimise`.
+            timings (dict[str, float]): Timings of the sample, see `optimise`.
+            pid (int | None): PID of the worker process.
+            peak_rss (int | None): Peak resident memory of the worker process in bytes.
+            output (dict | None): Output left to the background writer, see `output`.
+            manifest (RunManifest | None): Manifest to record the state of the sample in.
+            results (dict[str, str]): Status of every recorded sample by UID, updated in place.
+
+        Returns:
+            int: Number of recorded samples.
+        """
+        if writer is None or output is None:
+            self.record_sample(sample, status, timings, pid, peak_rss, manifest, results)
+            n = 1
+        else:
+            # blocks while the writer is behind
+            writer.put(sample.uid, output, (sample, timings, pid, peak_rss))
+            n = 0
+
+        if writer is not None:
+            n += self.record_written(writer, manifest, results)
+        return n
+
+    def finish_writes(
+        self,
+        writer: OutputWriter | None,
+        manifest: RunManifest | None,
+        results: dict[str, str],
+    ) -> int:
+        """
+        Wait for the background writer to write all queued outputs and record their samples.
+
+        Args:
+            writer (OutputWriter | None): The background writer, if any.
+            manifest (RunManifest | None): Manifest to record the state of the samples in.
+            results (dict[str, str]): Status of every recorded sample by UID, updated in place.
+
+        Returns:
+            int: Number of recorded samples.
+        """
+        if writer is None:
+            return 0
+        writer.close()
+        return self.record_written(writer, manifest, results)
+
+    def record_written(
+        self,
+        writer: OutputWriter,
+        manifest: RunManifest | None,
+        results: dict[str, str],
+    ) -> int:
+        """
+        Record the samples whose output the background writer finished. Samples whose output
+        could not be written fail.
+
+        Args:
+            writer (OutputWriter): The background writer.
+            manifest (RunManifest | None): Manifest to record the state of the samples in.
+            results (dict[str, str]): Status of every recorded sample by UID, updated in place.
+
+        Returns:
+            int: Number of recorded samples.
+        """
+        finished = writer.get_finished()
+        for uid, (sample, timings, pid, peak_rss), error, seconds in finished:
+            timings = {**timings, "write_output": seconds}
+            if error is None:
+                status = "success"
+            else:
+                self.write_error(uid, error)
+                status = "failed"
+            self.record_sample(sample, status, timings, pid, peak_rss, manifest, results)
+        return len(finished)
+
+    def record_sample(
+        self,
+        sample: Sample,
+        status: str,
+        timings: dict[str, float],
+        pid: int | None,
+        peak_rss: int | None,
+        manifest: RunManifest | None,
+        results: dict[str, str],
+    ) -> None:
+        """
+        Record the final status of a sample in the results, the manifest, the cost model and the metrics.
+
+        Args:
+            sample (Sample): The optimised sample.
+            status (str): Final status of the sample.
+            timings (dict[str, float]): Timings of the sample, see `optimise`.
+            pid (int | None): PID of the worker process.
+            peak_rss (int | None): Peak resident memory of the worker process in bytes.
+            manifest (RunManifest | None): Manifest to record the state of the sample in.
+            results (dict[str, str]): Status of every recorded sample by UID, updated in place.
+        """
+        results[sample.uid] = status
+        if manifest is not None:
+            manifest.update(sample.uid, status)
+        self.observe_cost(sample, status, timings)
+        self.record_metrics(sample.uid, status, timings, pid, peak_rss)
+
+    def get_cost_order(self, dataset: SampleDataset) -> list[int]:
+        """
+        Order the samples of a dataset by estimated runtime, see `CostModel`.
+
+        Args:
+            dataset (SampleDataset): The dataset.
+
+        Returns:
+            list[int]: Indices of the samples, most expensive first.
+        """
+        costs = [self.cost_model.predict_log(s, self.settings) for s in dataset]
+        return sorted(range(len(costs)), key=lambda i: -costs[i])
 
-    def optimise(self, sample: Sample, settings: dict) -> None:
+    def observe_cost(self, sample: Sample, status: str, timings: dict[str, float]) -> None:
+        """
+        Refine the cost model with the measured build_complex() runtime of a successful sample.
+        Failed samples are skipped, as are cache hits and warm starts, which do not call build_complex().
+
+        Args:
+            sample (Sample): The optimised sample.
+            status (str): Final status of the sample.
+            timings (dict[str, float]): Timings of the sample, see `optimise`.
+        """
+        if self.cost_model is not None and status == "success" and "build_complex" in timings:
+            self.cost_model.observe(sample, self.settings, timings["build_complex"])
+
+    def record_metrics(
+        self,
+        uid: str,
+        status: str,
+        timings: dict[str, float],
+        pid: int | None,
+        peak_rss: int | None,
+    ) -> None:
+        """
+        Record the timings of a finished sample in `timings_file` and `metrics_file`, see `RunMetrics`.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            status (str): Status of the sample.
+            timings (dict[str, float]): Runtime of every phase in seconds.
+            pid (int | None): PID of the worker process.
+            peak_rss (int | None): Peak resident memory of the worker process in bytes.
+        """
+        self.open_metrics()
+        self.metrics.record(uid, status, timings, pid, peak_rss)
+
+    def open_metrics(self) -> None:
+        """
+        Start collecting the metrics of a run, unless already started. The throughput is measured from here.
+        """
+        if self.metrics is None:
+            self.metrics = RunMetrics(
+                self.root / self.timings_file,
+                self.root / self.metrics_file,
+                self.metrics_interval,
+            )
+
+    def close_metrics(self) -> None:
+        """
+        Write the final metrics of a run.
+        """
+        if self.metrics is not None:
+            self.metrics.close()
+            self.metrics = None
+
+    def save_cost_model(self) -> None:
+        """
+        Save the cost model to `cost_model_file`, if cost scheduling is enabled.
+        """
+        if self.cost_model is not None:
+            self.cost_model.save(self.root / self.cost_model_file)
+
+    def optimise(self, sample: Sample, settings: dict) -> str:
         """
         Optimise a single `Sample` and create an output directory named `sample.uid` in the root folder.
+        Runtimes of the phases are recorded in `timings`. With `background_writer`, nothing is written;
+        the content of the output files, or the cache key of a hit, is left in `output` instead.
 
         Args:
             sample (Sample): The sample to be optimized.
             settings (dict): Optimization settings.
+
+        Returns:
+            str: "success" if the output was written or left to the background writer, otherwise "failed".
         """
-        self.logger.debug(f"Optimise sample {sample.uid}")
+        self.sample_logger.debug(f"Optimise sample {sample.uid}")
 
+        self.timings = {}
+        self.output = None
         fp = self.root / sample.uid
-        fp.mkdir(parents=True, exist_ok=True)
+        if self.output_format == "directory" and not self.background_writer:
+            fp.mkdir(parents=True, exist_ok=True)
 
         try:
             # Construct input for architector.build_complex()
-            inp = self.get_architector_input(sample, settings)
+            with self.time_phase("get_architector_input"):
+                inp = self.get_architector_input(sample, settings)
+
+            with self.time_phase("get_start_structure"):
+                start = self.get_start_structure(sample.uid)
+            if start is None and len(sample.ligands) == 0:
+                raise ValueError(f"No complete structure to relax in {self.warm_start}.")
 
-            self.logger.debug(f"Run architector.build_complex()")
-            out = build_complex(inp)
+            key = None
+            if self.cache is not None:
+                with self.time_phase("cache_lookup"):
+                    key = get_input_hash(self.get_cache_input(inp, start))
+                    if self.background_writer:
+                        # materialised by the background writer
+                        hit = self.cache.contains(key)
+                        if hit:
+                            self.output = {"files": None, "key": key}
+                    elif self.output_format == "bundle":
+                        files = self.cache.read(key)
+                        hit = files is not None
+                        if hit:
+                            self.write_bundle_files(sample.uid, files)
+                    else:
+                        hit = self.cache.materialise(key, fp, order=self.output_files)
+                if hit:
+                    self.sample_logger.debug(f"Cache hit {key}")
+                    return "success"
+
+            if start is None:
+                self.sample_logger.debug(f"Run architector.build_complex()")
+                with self.time_phase("build_complex"):
+                    out = self.get_backend().build_complex(inp)
+            else:
+                self.sample_logger.debug(f"Relax the structure of the warm start")
+                with self.time_phase("relax_complex"):
+                    out = self.get_relaxer()(*start, dict(settings))
 
             if not isinstance(out, dict):
                 raise ValueError("Architector output is not a dict.")
@@ -112,19 +939,145 @@ class Optimiser:
                 raise ValueError("Empty dictionary was produced.")
 
             # Write the optimised geometry to disk
-            self.write_output(out, fp)
+            files = self.write_output(out, fp)
+
+            if self.background_writer:
+                self.output = {"files": files, "key": key}
+            elif self.cache is not None:
+                with self.time_phase("cache_store"):
+                    self.cache.put(key, files)
 
         except Exception as e:
-            error_message = f"Error processing data: {e}"
-            self.logger.debug(error_message)
+            self.write_error(sample.uid, f"Error processing data: {e}")
+            return "failed"
+
+        self.sample_logger.debug("Success.")
+        return "success"
+
+    def get_cache_input(
+        self, inp: dict[str], start: tuple[str, int, int] | None = None
+    ) -> dict[str]:
+        """
+        Get the data identifying the output of a sample in the cache.
+
+        Args:
+            inp (dict[str]): Input of Architector's build_complex().
+            start (tuple[str, int, int] | None, optional): Structure of the warm start, see
+                `get_start_structure`. Defaults to None.
+
+        Returns:
+            dict[str]: The input, the structure of the warm start and the number of kept conformers if any.
+        """
+        if start is not None:
+            inp = {**inp, "warm_start": list(start)}
+        if self.keep_conformers is None:
+            return inp
+        return {**inp, "keep_conformers": self.keep_conformers}
+
+    def get_backend(self):
+        """
+        Get the backend providing build_complex() and convert_io_molecule().
+
+        Returns:
+            object: The backend passed to the constructor, or the Architector module.
+        """
+        if self.backend is None:
+            # imported here, so the package can be used without Architector
+            import architector
+
+            return architector
+        if isinstance(self.backend, str):
+            return importlib.import_module(self.backend)
+        return self.backend
+
+    def check_backend(self) -> None:
+        """
+        Check that the backend can be sent to the worker processes, if any are used.
 
-            # Create local loggers to write .err files
-            logerr = self.get_logger("LocErr", fp / ".err")
-            logerr.debug(error_message)
-            self.delete_logger(logerr)
+        Raises:
+            ValueError: If the backend is a module that cannot be imported by its name, or an object that
+                cannot be pickled.
+        """
+        if self.backend is None or (self.nprocs == 1 and not self.has_worker_limits()):
             return
 
-        self.logger.debug("Success.")
+        if isinstance(self.backend, ModuleType):
+            if sys.modules.get(self.backend.__name__) is not self.backend:
+                raise ValueError(
+                    f"The backend module {self.backend.__name__} cannot be imported by its name in the worker "
+                    "processes, please pass an importable module or a picklable object."
+                )
+            return
+
+        try:
+            pickle.dumps(self.backend)
+        except Exception as e:
+            raise ValueError(
+                f"The backend cannot be sent to the worker processes, please pass a picklable object "
+                f"or an importable module: {e}"
+            ) from e
+
+    def get_relaxer(self):
+        """
+        Get the function relaxing a given structure for warm starts, see `relax_complex`.
+
+        Returns:
+            Callable | None: relax_complex() of the backend passed to the constructor, None if it has none,
+                or the Architector based `relax_complex` if no backend was passed.
+        """
+        if self.backend is None:
+            from .relax import relax_complex
+
+            return relax_complex
+        return getattr(self.get_backend(), "relax_complex", None)
+
+    def get_start_structure(
+        self, uid: str, name: str = "sample"
+    ) -> tuple[str, int, int] | None:
+        """
+        Get the structure of a sample in the `warm_start` folder.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            name (str, optional): Name of the .xyz file in the directory layout. Defaults to "sample".
+
+        Returns:
+            tuple[str, int, int] | None: Geometry in XYZ format, total charge and number of unpaired electrons,
+                or None if there is no warm start for the sample or the backend cannot relax structures.
+        """
+        if self.warm_start is None or self.get_relaxer() is None:
+            return None
+
+        if self.warm_start_bundle is not None:
+            if uid not in self.warm_start_bundle:
+                return None
+            elements, coordinates, info = self.warm_start_bundle.read(uid)
+            charge, n_unpels = info["charge"], info["uhf"]
+        else:
+            save_dir = Path(self.warm_start) / uid
+            if not self.has_complete_output(save_dir, name):
+                return None
+            elements, coordinates = read_xyz(save_dir / f"{name}.xyz")
+            with open(save_dir / ".CHRG", "r") as file:
+                charge = int(file.readline().strip())
+            with open(save_dir / ".UHF", "r") as file:
+                n_unpels = int(file.readline().strip())
+
+        lines = [str(len(elements)), uid]
+        for element, (x, y, z) in zip(elements, coordinates):
+            lines.append(f"{element} {x:.8f} {y:.8f} {z:.8f}")
+        return "\n".join(lines) + "\n", charge, n_unpels
+
+    def write_error(self, uid: str, message: str) -> None:
+        """
+        Record the reason of a failure in the .err file of a sample's output directory.
+        The record is routed by UID, through the log queue while `listen_logs` is active, see `SampleErrorHandler`.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            message (str): Description of the failure.
+        """
+        self.sample_logger.error(message, extra={"uid": uid})
 
     def get_architector_input(self, sample: Sample, settings: dict[str]) -> dict[str]:
         """
@@ -139,28 +1092,338 @@ class Optimiser:
         """
         return {**sample.to_dict(), "parameters": {k: v for k, v in settings.items()}}
 
-    def write_output(self, output: dict, save_dir: Path, name: str = "sample") -> None:
+    def write_output(
+        self, output: dict, save_dir: Path, name: str = "sample"
+    ) -> dict[str, Path | bytes]:
         """Save the output of Architector's build_complex() function in a separate directory.
 
+        Files are written under temporary names and renamed afterwards, the .xyz file last,
+        so an existing .xyz file is always complete. If `output_format` is "bundle", the
+        structure is appended to the bundle instead, with the name of `save_dir` as UID.
+        With `background_writer`, only the content of the files is returned, see `write_batch`.
+
         Args:
             output (dict): Output dictionary returned by Architector's build_complex() function.
             save_dir (Path): Path to the output directory, where all files will be saved.
             name (str, optional): Name of the files. Defaults to "sample".
+
+        Returns:
+            dict[str, Path | bytes]: Path of every written file by name, or its content for bundles.
         """
         out = output[list(output.keys())[0]]
 
-        mol = convert_io_molecule(out["mol2string"])
+        with self.time_phase("convert_io_molecule"):
+            mol = self.get_backend().convert_io_molecule(out["mol2string"])
         charge = out["total_charge"]
         n_unpels = out["calc_n_unpaired_electrons"]
 
-        mol_path = str(save_dir / f"{name}.xyz")
-        charge_path = str(save_dir / ".CHRG")
-        uhf_path = str(save_dir / ".UHF")
+        conformers = None
+        if self.keep_conformers is not None:
+            with self.time_phase("get_conformers"):
+                conformers = self.get_conformers(output, save_dir.name)
 
-        save_xyz(mol, mol_path)
-        save_chrg(charge, charge_path)
-        save_uhf(n_unpels, uhf_path)
-        self.logger.debug(f"Saved to {save_dir}")
+        if self.background_writer:
+            with self.time_phase("get_xyz"):
+                xyz = get_xyz_string(mol)
+            files = {".CHRG": str(charge).encode(), ".UHF": str(n_unpels).encode()}
+            if conformers is not None:
+                files[self.conformers_file] = conformers.encode()
+            files[f"{name}.xyz"] = xyz.encode()
+            return files
+
+        if self.output_format == "bundle":
+            with self.time_phase("get_xyz"):
+                elements, coordinates = get_xyz(mol)
+            frame = format_frame(save_dir.name, elements, coordinates, charge, n_unpels)
+            files = {".CHRG": str(charge).encode(), ".UHF": str(n_unpels).encode()}
+            if conformers is not None:
+                files[self.conformers_file] = conformers.encode()
+            files[f"{name}.xyz"] = frame.encode()
+            with self.time_phase("save_bundle"):
+                self.write_bundle_files(save_dir.name, files, name)
+            return files
+
+        mol_path = save_dir / f"{name}.xyz"
+        charge_path = save_dir / ".CHRG"
+        uhf_path = save_dir / ".UHF"
+        paths = [charge_path, uhf_path]
+
+        with self.time_phase("save_chrg"):
+            save_chrg(charge, str(self.get_tmp_path(charge_path)))
+        with self.time_phase("save_uhf"):
+            save_uhf(n_unpels, str(self.get_tmp_path(uhf_path)))
+        if conformers is not None:
+            conformers_path = save_dir / self.conformers_file
+            with self.time_phase("save_conformers"):
+                with open(self.get_tmp_path(conformers_path), "w") as file:
+                    file.write(conformers)
+            paths.append(conformers_path)
+        with self.time_phase("save_xyz"):
+            save_xyz(mol, str(self.get_tmp_path(mol_path)))
+        paths.append(mol_path)
+        with self.time_phase("rename"):
+            for p in paths:
+                os.replace(self.get_tmp_path(p), p)
+        self.sample_logger.debug(f"Saved to {save_dir}")
+        return {p.name: p for p in paths}
+
+    def get_conformers(self, output: dict, uid: str) -> str:
+        """
+        Rank the conformers returned by Architector's build_complex() by their reported energy and
+        format the lowest `keep_conformers` of them as frames of a multi-frame extended XYZ file.
+        The comment line of every frame holds the conformer's name, rank, energy and boolean flags reported
+        by the backend, e.g. "converged", besides UID, charge and number of unpaired electrons. Conformers
+        without energy are ranked last.
+
+        Args:
+            output (dict): Output dictionary returned by Architector's build_complex() function.
+            uid (str): Unique identifier of the sample.
+
+        Returns:
+            str: The frames, lowest energy first.
+        """
+        ranked = sorted(
+            output.items(),
+            key=lambda item: (
+                item[1].get("energy") is None,
+                0.0 if item[1].get("energy") is None else float(item[1]["energy"]),
+            ),
+        )
+
+        frames = []
+        for rank, (conformer, out) in enumerate(ranked[: self.keep_conformers]):
+            mol = self.get_backend().convert_io_molecule(out["mol2string"])
+            elements, coordinates = get_xyz(mol)
+            info = {"conformer": "_".join(str(conformer).split()), "rank": rank}
+            if out.get("energy") is not None:
+                info["energy"] = float(out["energy"])
+            for key, value in out.items():
+                if isinstance(value, bool) and str(key).isidentifier():
+                    info[key] = value
+            frames.append(
+                format_frame(
+                    uid,
+                    elements,
+                    coordinates,
+                    out["total_charge"],
+                    out["calc_n_unpaired_electrons"],
+                    info,
+                )
+            )
+        return "".join(frames)
+
+    def write_bundle_files(
+        self, uid: str, files: dict[str, bytes], name: str = "sample"
+    ) -> None:
+        """
+        Append output files, e.g. from the cache, to the bundle. Kept conformers are
+        appended to the bundle in `conformers_dir` first.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            files (dict[str, bytes]): Content of the .xyz, .CHRG and .UHF files, and of `conformers_file`, by name.
+            name (str, optional): Name of the .xyz file without extension. Defaults to "sample".
+        """
+        if self.conformers_file in files:
+            self.get_bundle_writer(self.conformers_dir).write_text(
+                uid, files[self.conformers_file].decode()
+            )
+        elements, coordinates, _ = parse_frame(files[f"{name}.xyz"].decode())
+        self.get_bundle_writer().write(
+            uid,
+            elements,
+            coordinates,
+            int(files[".CHRG"]),
+            int(files[".UHF"]),
+        )
+
+    def write_batch(self, items: list[tuple[str, dict]]) -> dict[str, str]:
+        """
+        Write the outputs of a batch of samples optimised with `background_writer`. Runs in the writer thread.
+
+        Files are written under temporary names first. With `fsync`, all of them are forced to disk before
+        any is renamed, and the directories after renaming, so durability costs one round of syncs per batch
+        and no sample is recorded before its output is on disk. Cache hits are materialised from the cache,
+        new outputs are stored in it.
+
+        Args:
+            items (list[tuple[str, dict]]): UID and output of every sample, see `output`.
+
+        Returns:
+            dict[str, str]: Description of the failure by UID for samples whose output could not be written.
+        """
+        errors = {}
+        staged = []
+        for uid, output in items:
+            try:
+                staged.append((uid, output, self.stage_output(uid, output)))
+            except Exception as e:
+                errors[uid] = f"Error writing output: {e}"
+
+        if self.output_format == "bundle":
+            # synced by the bundle writers, conformers first
+            for bundle_dir in (self.conformers_dir, self.bundle_dir):
+                if bundle_dir in self.bundle_writers:
+                    self.bundle_writers[bundle_dir].flush()
+        else:
+            paths = [p for _, _, sample_paths in staged for p in sample_paths]
+            if self.fsync:
+                for p in paths:
+                    sync_path(str(self.get_tmp_path(p)))
+            for p in paths:
+                os.replace(self.get_tmp_path(p), p)
+            if self.fsync:
+                for save_dir in {p.parent for p in paths}:
+                    sync_path(str(save_dir))
+
+        for uid, output, paths in staged:
+            if self.cache is None or output["files"] is None or output["key"] is None:
+                continue
+            try:
+                if self.output_format == "bundle":
+                    self.cache.put(output["key"], output["files"])
+                else:
+                    self.cache.put(output["key"], {p.name: p for p in paths})
+            except Exception as e:
+                errors[uid] = f"Error storing output in cache: {e}"
+        return errors
+
+    def stage_output(self, uid: str, output: dict) -> list[Path]:
+        """
+        Write the output of a sample for `write_batch`. Files of the directory layout are
+        written under temporary names, structures of a bundle are buffered by the bundle writer.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            output (dict): Output of the sample, see `output`.
+
+        Raises:
+            ValueError: If the cache entry of a hit was evicted in the meantime.
+
+        Returns:
+            list[Path]: Final paths of the files left under temporary names, in the order they are to be renamed.
+        """
+        if output["files"] is None:
+            if self.output_format == "bundle":
+                files = self.cache.read(output["key"])
+                hit = files is not None
+                if hit:
+                    self.write_bundle_files(uid, files)
+            else:
+                hit = self.cache.materialise(
+                    output["key"], self.root / uid, order=self.output_files
+                )
+            if not hit:
+                raise ValueError(f"Cache entry {output['key']} was evicted.")
+            return []
+
+        if self.output_format == "bundle":
+            self.write_bundle_files(uid, output["files"])
+            return []
+
+        save_dir = self.root / uid
+        save_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for name, content in output["files"].items():
+            path = save_dir / name
+            with open(self.get_tmp_path(path), "wb") as file:
+                file.write(content)
+            paths.append(path)
+        return paths
+
+    def get_bundle_writer(self, bundle_dir: str | None = None) -> BundleWriter:
+        """
+        Get the bundle writer of the current process for a folder in the root folder, creating it on first use.
+        With `background_writer`, it buffers the structures of a batch until `write_batch` flushes them.
+
+        Args:
+            bundle_dir (str | None, optional): Folder of the bundle. Defaults to `bundle_dir`.
+
+        Returns:
+            BundleWriter: The writer.
+        """
+        bundle_dir = self.bundle_dir if bundle_dir is None else bundle_dir
+        if bundle_dir not in self.bundle_writers:
+            self.bundle_writers[bundle_dir] = BundleWriter(
+                self.root / bundle_dir,
+                batch_size=self.write_batch_size if self.background_writer else 1,
+                fsync=self.fsync and self.background_writer,
+            )
+        return self.bundle_writers[bundle_dir]
+
+    def close_bundle_writer(self) -> None:
+        """
+        Close the bundle writers of the current process, if any.
+        """
+        for writer in self.bundle_writers.values():
+            writer.close()
+        self.bundle_writers = {}
+
+    @contextmanager
+    def listen_logs(self):
+        """
+        Write the records of the hot path and of the worker processes in a background thread
+        while the context is active. All queued records are written when the context exits,
+        afterwards records are written directly again.
+        """
+        direct_logger = self.sample_logger
+        self.sample_logger = get_queue_logger(
+            f"{self.__class__.__name__}Logger", self.log_queue, self.log_level
+        )
+        listener = get_listener(self.log_queue, self.logger, self.root)
+        listener.start()
+        try:
+            yield
+        finally:
+            listener.stop()
+            self.sample_logger = direct_logger
+
+    @contextmanager
+    def write_outputs(self):
+        """
+        Run the background writer while the context is active, if `background_writer` is set.
+        All queued outputs are written when the context exits.
+
+        Yields:
+            OutputWriter | None: The writer, or None if outputs are written by `optimise`.
+        """
+        if not self.background_writer:
+            yield None
+            return
+
+        writer = OutputWriter(
+            self.write_batch, self.write_queue_size, self.write_batch_size
+        )
+        try:
+            yield writer
+        finally:
+            writer.close()
+
+    @contextmanager
+    def time_phase(self, phase: str):
+        """
+        Measure the runtime of a phase of `optimise` and store it in `timings`.
+
+        Args:
+            phase (str): Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.perf_counter() - start
+
+    def get_tmp_path(self, path: Path) -> Path:
+        """
+        Get the temporary name under which an output file is written.
+
+        Args:
+            path (Path): Final path of the file.
+
+        Returns:
+            Path: Temporary path in the same directory.
+        """
+        return path.with_name(self.tmp_prefix + path.name)
 
     def default_logger(self) -> logging.Logger:
         """
@@ -187,6 +1450,13 @@ class Optimiser:
         logger = logging.getLogger(name)
         logger.setLevel(logging.DEBUG)
 
+        # named loggers are shared, attach every file only once
+        for handler in logger.handlers:
+            if isinstance(handler, logging.FileHandler) and handler.baseFilename == str(
+                Path(log_file_path).absolute()
+            ):
+                return logger
+
         formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
         file_handler = logging.FileHandler(log_file_path)
@@ -204,6 +1474,51 @@ class Optimiser:
         Args:
             logger (logging.Logger): The logger instance from which handlers will be removed.
         """
-        for handler in logger.handlers:
+        for handler in list(logger.handlers):
             handler.close()
             logger.removeHandler(handler)
+
+
+_worker_optimiser: Optimiser | None = None
+"""Optimiser of the current worker process, set by `_init_worker`."""
+
+
+def _init_worker(optimiser: Optimiser) -> None:
+    """Install the optimiser in a worker process of `Optimiser.pool_opt`.
+    Its log records are sent to the log listener of the parent process.
+
+    Args:
+        optimiser (Optimiser): The optimiser, sent once per worker.
+    """
+    global _worker_optimiser
+    logger = get_queue_logger(
+        f"{optimiser.__class__.__name__}Logger",
+        get_worker_log_queue(),
+        optimiser.log_level,
+    )
+    optimiser.logger = logger
+    optimiser.sample_logger = logger
+    _worker_optimiser = optimiser
+
+
+def _optimise_sample(
+    sample: Sample, settings: dict
+) -> tuple[str, dict[str, float], int, int, dict | None]:
+    """Optimise a sample in a worker process.
+
+    Args:
+        sample (Sample): Sample to be optimised.
+        settings (dict): Optimization settings.
+
+    Returns:
+        tuple[str, dict[str, float], int, int, dict | None]: Status and timings of the sample, PID and peak resident
+            memory of the worker, and the output left to the background writer, see `Optimiser.output`.
+    """
+    status = _worker_optimiser.optimise(sample, settings)
+    return (
+        status,
+        _worker_optimiser.timings,
+        os.getpid(),
+        get_peak_rss(),
+        _worker_optimiser.output,
+    )
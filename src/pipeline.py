@@ -0,0 +1,357 @@
+from math import ceil
+from pathlib import Path
+from pydantic import BaseModel
+
+from .bundle import Bundle
+from .dataset import Sample, SampleDataset
+from .optimiser import Optimiser
+from .screening import PreScreen
+from .util import read_conformers
+
+
+def get_group(sample: Sample, key: str | None) -> str | None:
+    """
+    Get the group of a sample within which the filters of a `Pipeline` compare energies.
+
+    Args:
+        sample (Sample): The sample.
+        key (str | None): Key of `Sample.core` or `Sample.parameters`, e.g. "metal". None puts all samples into one group.
+
+    Returns:
+        str | None: Value of the key, or None for a single group.
+    """
+    if key is None:
+        return None
+    if key in sample.core:
+        return str(sample.core[key])
+    return str(sample.parameters[key])
+
+
+class EnergyWindow(BaseModel):
+    """
+    Rejects samples whose energy lies more than `window` above the lowest energy of their group.
+    The energy of a sample is the lowest energy of its conformers, see `read_conformers`.
+
+    Initialize via:
+
+    ```python
+    filter = EnergyWindow(window=0.02, group_by="metal")
+    ```
+    """
+
+    window: float
+    """Largest accepted energy above the lowest energy of the group, in the unit of the backend."""
+
+    group_by: str | None = None
+    """Key of `Sample.core` or `Sample.parameters` within which energies are compared. None compares all samples."""
+
+    def apply(self, records: list[dict]) -> dict[str, str]:
+        """
+        Apply the filter.
+
+        Args:
+            records (list[dict]): Sample, energy and conformer metadata of every successful sample, see `Pipeline.get_records`.
+
+        Returns:
+            dict[str, str]: Reason for the rejection by UID of every rejected sample.
+        """
+        lowest = {}
+        for record in records:
+            if record["energy"] is not None:
+                group = get_group(record["sample"], self.group_by)
+                lowest[group] = min(lowest.get(group, record["energy"]), record["energy"])
+
+        rejected = {}
+        for record in records:
+            uid = record["sample"].uid
+            if record["energy"] is None:
+                rejected[uid] = "no energy reported"
+                continue
+            delta = record["energy"] - lowest[get_group(record["sample"], self.group_by)]
+            if delta > self.window:
+                rejected[uid] = f"energy {delta:g} above lowest exceeds window {self.window:g}"
+        return rejected
+
+
+class TopFraction(BaseModel):
+    """
+    Keeps the fraction of samples with the lowest energy of their group, at least one per group.
+    The energy of a sample is the lowest energy of its conformers, see `read_conformers`.
+
+    Initialize via:
+
+    ```python
+    filter = TopFraction(fraction=0.1, group_by="coreCN")
+    ```
+    """
+
+    fraction: float
+    """Fraction of the samples of every group to keep."""
+
+    group_by: str | None = None
+    """Key of `Sample.core` or `Sample.parameters` within which samples are ranked. None ranks all samples."""
+
+    def apply(self, records: list[dict]) -> dict[str, str]:
+        """
+        Apply the filter.
+
+        Args:
+            records (list[dict]): Sample, energy and conformer metadata of every successful sample, see `Pipeline.get_records`.
+
+        Returns:
+            dict[str, str]: Reason for the rejection by UID of every rejected sample.
+        """
+        groups = {}
+        rejected = {}
+        for record in records:
+            if record["energy"] is None:
+                rejected[record["sample"].uid] = "no energy reported"
+                continue
+            group = get_group(record["sample"], self.group_by)
+            groups.setdefault(group, []).append(record)
+
+        for group in groups.values():
+            group.sort(key=lambda record: record["energy"])
+            n_keep = max(1, ceil(self.fraction * len(group)))
+            for rank, record in enumerate(group[n_keep:], start=n_keep):
+                rejected[record["sample"].uid] = (
+                    f"energy rank {rank + 1} of {len(group)} outside top fraction {self.fraction:g}"
+                )
+        return rejected
+
+
+class Converged(BaseModel):
+    """
+    Rejects samples whose lowest-energy conformer was reported as not converged by the backend,
+    in a boolean flag of its metadata, see `Optimiser.get_conformers`. Samples without the flag pass.
+
+    Initialize via:
+
+    ```python
+    filter = Converged(flag="converged")
+    ```
+    """
+
+    flag: str = "converged"
+    """Name of the boolean flag reported by the backend."""
+
+    def apply(self, records: list[dict]) -> dict[str, str]:
+        """
+        Apply the filter.
+
+        Args:
+            records (list[dict]): Sample, energy and conformer metadata of every successful sample, see `Pipeline.get_records`.
+
+        Returns:
+            dict[str, str]: Reason for the rejection by UID of every rejected sample.
+        """
+        return {
+            record["sample"].uid: f"{self.flag} is False"
+            for record in records
+            if record["info"].get(self.flag) == "False"
+        }
+
+
+class Stage:
+    """
+    A stage of a `Pipeline`: the settings of an `Optimiser` run, and the filters selecting
+    the samples passed on to the next stage.
+
+    Initialize via:
+
+    ```python
+    stage = Stage("uff", {"full_method": "UFF"}, [TopFraction(fraction=0.1)], nprocs=8)
+    ```
+    """
+
+    def __init__(
+        self,
+        name: str,
+        settings: dict[str],
+        filters: list[EnergyWindow | TopFraction | Converged] | None = None,
+        **options,
+    ) -> None:
+        """
+        Initializes a `Stage` instance.
+
+        Args:
+            name (str): Name of the stage and of its folder in the root folder of the pipeline.
+            settings (dict[str]): Settings for Arcitector.build_complex() in this stage.
+            filters (list[EnergyWindow | TopFraction | Converged] | None, optional): Filters every sample passed on
+                to the next stage has to pass. Failed samples are never passed on. Defaults to None.
+            **options: Further arguments of the `Optimiser` of this stage, e.g. nprocs, output_format or resume.
+        """
+        self.name = name
+        self.settings = settings
+        self.filters = [] if filters is None else filters
+        self.options = options
+
+
+class Pipeline:
+    """
+    Staged screening: every stage optimises the samples that survived the filters of the previous
+    stage, e.g. a cheap method on the full dataset and an expensive method on the best candidates.
+
+    Every stage runs its own `Optimiser` in a sub-folder of the root folder named after the stage, with
+    its own manifest, so a pipeline can be resumed stage by stage. Later stages start from the geometries
+    of the previous stage where the backend can relax given structures, see `Optimiser.warm_start`.
+
+    Initialize via:
+
+    ```python
+    pipeline = Pipeline(
+        root,
+        [
+            Stage("uff", {"full_method": "UFF"}, [EnergyWindow(window=0.5, group_by="metal")]),
+            Stage("gfn2", {"full_method": "GFN2-xTB"}),
+        ],
+    )
+    status = pipeline.run(dataset)
+    ```
+    """
+
+    rejected_file: str = "filter_rejected.jsonl"
+    """File in the folder of every stage but the last listing samples not passed on to the next stage and the reasons."""
+
+    def __init__(self, root: Path, stages: list[Stage], warm_start: bool = True) -> None:
+        """
+        Initializes a `Pipeline` instance.
+
+        Args:
+            root (Path): Root folder holding one folder per stage.
+            stages (list[Stage]): The stages, in the order they run.
+            warm_start (bool, optional): Start every stage from the geometries of the previous stage. Defaults to True.
+
+        Raises:
+            ValueError: If there are no stages or two stages have the same name.
+        """
+        self.root = root
+        self.stages = stages
+        self.warm_start = warm_start
+
+        if len(self.stages) == 0:
+            raise ValueError("Please pass at least one stage.")
+        if len({stage.name for stage in self.stages}) != len(self.stages):
+            raise ValueError("Stage names have to be unique.")
+
+    def run(self, dataset: SampleDataset) -> dict[str, dict[str, str]]:
+        """
+        Run all stages.
+
+        Args:
+            dataset (SampleDataset): The dataset optimised by the first stage.
+
+        Returns:
+            dict[str, dict[str, str]]: Status of every optimised sample by UID, for every stage by name,
+                see `Optimiser.run`.
+        """
+        status = {}
+        previous = None
+        for i, stage in enumerate(self.stages):
+            optimiser = self.get_optimiser(stage, previous)
+            optimiser.logger.info(f"Start stage {stage.name} with {len(dataset)} samples.")
+            status[stage.name] = optimiser.run(dataset)
+
+            if i == len(self.stages) - 1:
+                break
+
+            records = self.get_records(optimiser, dataset, status[stage.name])
+            dataset, rejected = self.select(stage, dataset, records, status[stage.name])
+            PreScreen.write_report(rejected, optimiser.root / self.rejected_file)
+            optimiser.logger.info(
+                f"Stage {stage.name} passed {len(dataset)} samples on and rejected {len(rejected)}."
+            )
+            previous = optimiser
+        return status
+
+    def get_optimiser(self, stage: Stage, previous: Optimiser | None) -> Optimiser:
+        """
+        Create the optimiser of a stage. Stages with filters keep at least one conformer, so that their energies are saved.
+
+        Args:
+            stage (Stage): The stage.
+            previous (Optimiser | None): Optimiser of the previous stage, if any.
+
+        Returns:
+            Optimiser: The optimiser, writing into the folder of the stage.
+        """
+        options = dict(stage.options)
+        if len(stage.filters) > 0 and options.get("keep_conformers") is None:
+            options["keep_conformers"] = 1
+        if self.warm_start and previous is not None:
+            options.setdefault(
+                "warm_start",
+                previous.root / previous.bundle_dir
+                if previous.output_format == "bundle"
+                else previous.root,
+            )
+        return Optimiser(self.root / stage.name, stage.settings, **options)
+
+    def get_records(
+        self, optimiser: Optimiser, dataset: SampleDataset, status: dict[str, str]
+    ) -> list[dict]:
+        """
+        Collect the results of the successful samples of a stage for its filters.
+
+        Args:
+            optimiser (Optimiser): Optimiser of the stage.
+            dataset (SampleDataset): The dataset optimised by the stage.
+            status (dict[str, str]): Status of every optimised sample by UID.
+
+        Returns:
+            list[dict]: "sample", "energy" of the lowest conformer or None, and its metadata as "info"
+                for every successful sample, see `read_conformers`.
+        """
+        bundle = (
+            Bundle(optimiser.root / optimiser.conformers_dir)
+            if optimiser.output_format == "bundle"
+            else None
+        )
+
+        records = []
+        for sample in dataset:
+            if status.get(sample.uid) != "success":
+                continue
+            if bundle is not None:
+                frames = bundle.read_frames(sample.uid) if sample.uid in bundle else []
+            else:
+                path = optimiser.root / sample.uid / optimiser.conformers_file
+                frames = read_conformers(path) if path.exists() else []
+
+            info = frames[0][2] if len(frames) > 0 else {}
+            energy = float(info["energy"]) if "energy" in info else None
+            records.append({"sample": sample, "energy": energy, "info": info})
+        return records
+
+    def select(
+        self,
+        stage: Stage,
+        dataset: SampleDataset,
+        records: list[dict],
+        status: dict[str, str],
+    ) -> tuple[SampleDataset, dict[str, list[str]]]:
+        """
+        Select the samples passed on to the next stage.
+
+        Args:
+            stage (Stage): The finished stage.
+            dataset (SampleDataset): The dataset optimised by the stage.
+            records (list[dict]): Results of the successful samples, see `get_records`.
+            status (dict[str, str]): Status of every optimised sample by UID.
+
+        Returns:
+            tuple[SampleDataset, dict[str, list[str]]]: Survivors and the reasons for every rejected UID.
+        """
+        rejected = {}
+        for sample in dataset:
+            if sample.uid in status and status[sample.uid] != "success":
+                rejected[sample.uid] = [f"status {status[sample.uid]}"]
+        for filter in stage.filters:
+            for uid, reason in filter.apply(records).items():
+                rejected.setdefault(uid, []).append(reason)
+
+        survivors = SampleDataset([])
+        for record in records:
+            if record["sample"].uid not in rejected:
+                survivors.add_sample(record["sample"])
+        return survivors, rejected
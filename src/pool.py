@@ -0,0 +1,466 @@
+from collections import deque
+from contextlib import contextmanager
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import pickle
+import queue
+import time
+from typing import Any, Callable
+
+
+class WorkerPool:
+    """
+    Process pool that enforces per-item wall-clock timeouts and memory ceilings.
+
+    Every worker has its own pipe and reports when it starts and finishes an item,
+    so a runaway item can be stopped by killing only its worker. Log records of the
+    workers travel over the same pipe, see `get_worker_log_queue`, so killing a worker
+    cannot leave a lock shared with other processes held. Killed workers are
+    replaced, the remaining items of their task are rescheduled. Workers can also be
+    recycled after a number of items to undo memory leaks. Workers can be started with
+    extra environment variables, e.g. thread limits, and pinned to CPUs by slot.
+
+    Use as context manager:
+
+    ```python
+    with WorkerPool(fn, nprocs=4, timeout=600) as pool:
+        pool.submit([(key, args), ...])
+        while pool.pending > 0:
+            for key, status, result in pool.wait():
+                ...
+    ```
+    """
+
+    OK: str = "ok"
+    """Status of items that returned normally."""
+
+    TIMEOUT: str = "timeout"
+    """Status of items whose worker was killed after exceeding the timeout."""
+
+    MEMORY: str = "memory_exceeded"
+    """Status of items whose worker was killed after exceeding the memory ceiling."""
+
+    CRASHED: str = "crashed"
+    """Status of items whose worker died unexpectedly."""
+
+    def __init__(
+        self,
+        fn: Callable,
+        nprocs: int,
+        initializer: Callable | None = None,
+        initargs: tuple = (),
+        timeout: float | None = None,
+        max_memory: int | None = None,
+        max_tasks_per_worker: int | None = None,
+        context: multiprocessing.context.BaseContext | None = None,
+        poll_interval: float = 1.0,
+        log_queue: queue.Queue | None = None,
+        env: dict[str, str] | None = None,
+        cpu_sets: list[set[int]] | None = None,
+    ) -> None:
+        """
+        Initializes a `WorkerPool` instance and starts the workers.
+
+        Args:
+            fn (Callable): Module-level function applied to the arguments of every item.
+            nprocs (int): Number of worker processes.
+            initializer (Callable | None, optional): Called with `initargs` in every new worker. Defaults to None.
+            initargs (tuple, optional): Arguments of the initializer. Defaults to ().
+            timeout (float | None, optional): Wall-clock limit per item in seconds. Defaults to None.
+            max_memory (int | None, optional): Limit of the resident memory per worker in bytes. Only
+                enforced where /proc is available. Defaults to None.
+            max_tasks_per_worker (int | None, optional): Number of items after which a worker is replaced.
+                Defaults to None.
+            context (multiprocessing.context.BaseContext | None, optional): Multiprocessing context used to
+                start workers. Defaults to the platform default.
+            poll_interval (float, optional): Seconds between checks of timeouts and memory. Defaults to 1.0.
+            log_queue (queue.Queue | None, optional): Queue receiving the log records of the workers. If None,
+                they are dropped. Defaults to None.
+            env (dict[str, str] | None, optional): Environment variables set in every worker from its start,
+                see `get_thread_env`. Defaults to None.
+            cpu_sets (list[set[int]] | None, optional): CPUs the worker in every slot is pinned to, reused
+                cyclically if there are more workers, see `get_cpu_sets`. Defaults to None.
+        """
+        self.fn = fn
+        self.nprocs = nprocs
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.context = multiprocessing.get_context() if context is None else context
+        self.poll_interval = poll_interval
+        self.log_queue = log_queue
+        self.env = env
+        self.cpu_sets = cpu_sets
+
+        self._queue = deque()
+        self._workers = [self._start_worker(i) for i in range(nprocs)]
+        self.pending = 0
+        """Number of submitted items without result."""
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def submit(self, items: list[tuple[Any, tuple]]) -> None:
+        """
+        Queue a task, which is sent to a single worker as a whole.
+
+        Args:
+            items (list[tuple[Any, tuple]]): Keys identifying the items and the arguments of `fn` for each of them.
+        """
+        self._queue.append(list(items))
+        self.pending += len(items)
+        self._dispatch()
+
+    def wait(self) -> list[tuple[Any, str, Any]]:
+        """
+        Wait until at least one item finished or was stopped.
+
+        Returns:
+            list[tuple[Any, str, Any]]: Key, status and result of every finished item. The result is
+                the return value of `fn` for status `OK`, otherwise a description of the failure.
+        """
+        results = []
+        while len(results) == 0 and self.pending > 0:
+            conns = [w["conn"] for w in self._workers if w["task"] is not None]
+            ready = wait(conns, timeout=self.poll_interval)
+
+            for w in [w for w in self._workers if w["conn"] in ready]:
+                results += self._receive(w)
+
+            results += self._enforce_limits()
+            self._dispatch()
+
+        self.pending -= len(results)
+        return results
+
+    def close(self) -> None:
+        """
+        Stop all workers. Items without result are discarded.
+        """
+        for w in self._workers:
+            if w["task"] is None:
+                try:
+                    w["conn"].send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for w in self._workers:
+            w["process"].join(timeout=1.0 if w["task"] is None else 0)
+            if w["process"].is_alive():
+                w["process"].kill()
+                w["process"].join()
+            w["conn"].close()
+        self._workers = []
+
+    def _start_worker(self, slot: int) -> dict:
+        """
+        Start a worker process.
+
+        Args:
+            slot (int): Position of the worker in the pool.
+
+        Returns:
+            dict: State of the worker.
+        """
+        parent_conn, child_conn = self.context.Pipe()
+        cpus = None if self.cpu_sets is None else self.cpu_sets[slot % len(self.cpu_sets)]
+        # unpickled by the worker once it is pinned, as the imports may start thread pools
+        payload = pickle.dumps((self.fn, self.initializer, self.initargs))
+        process = self.context.Process(
+            target=_worker_main,
+            args=(child_conn, cpus, payload),
+            daemon=True,
+        )
+        # inherited by the worker before it imports anything
+        with _update_environ(self.env):
+            process.start()
+        child_conn.close()
+        return {
+            "slot": slot,
+            "process": process,
+            "conn": parent_conn,
+            "task": None,
+            "current": None,
+            "started": None,
+            "n_done": 0,
+        }
+
+    def _replace_worker(self, w: dict, kill: bool) -> None:
+        """
+        Stop a worker and start a new one in its slot.
+
+        Args:
+            w (dict): State of the worker.
+            kill (bool): Kill the worker instead of asking it to exit.
+        """
+        if kill:
+            w["process"].kill()
+        else:
+            try:
+                w["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                w["process"].kill()
+        w["process"].join()
+        w["conn"].close()
+        self._workers[w["slot"]] = self._start_worker(w["slot"])
+
+    def _dispatch(self) -> None:
+        """
+        Send queued tasks to idle workers.
+        """
+        for w in self._workers:
+            if len(self._queue) == 0:
+                return
+            if w["task"] is None:
+                task = self._queue.popleft()
+                try:
+                    w["conn"].send(task)
+                except (BrokenPipeError, OSError):
+                    # the worker died while idle, none of the items was started
+                    self._queue.appendleft(task)
+                    self._replace_worker(w, kill=True)
+                    continue
+                w["task"] = task
+
+    def _receive(self, w: dict) -> list[tuple[Any, str, Any]]:
+        """
+        Handle messages of a worker.
+
+        Args:
+            w (dict): State of the worker.
+
+        Returns:
+            list[tuple[Any, str, Any]]: Finished items.
+        """
+        results = []
+        try:
+            while w["conn"].poll():
+                message = w["conn"].recv()
+                if message[0] == "start":
+                    w["current"] = message[1]
+                    w["started"] = time.monotonic()
+                elif message[0] == "log":
+                    if self.log_queue is not None:
+                        self.log_queue.put_nowait(message[1])
+                elif message[0] == "done":
+                    results.append((message[1], self.OK, message[2]))
+                    w["task"] = [i for i in w["task"] if i[0] != message[1]]
+                    w["current"] = None
+                    w["started"] = None
+                    w["n_done"] += 1
+        except (EOFError, OSError):
+            results += self._fail_current(w, self.CRASHED, "Worker process died.")
+            return results
+
+        if w["task"] is not None and len(w["task"]) == 0:
+            w["task"] = None
+            if (
+                self.max_tasks_per_worker is not None
+                and w["n_done"] >= self.max_tasks_per_worker
+            ):
+                self._replace_worker(w, kill=False)
+        return results
+
+    def _enforce_limits(self) -> list[tuple[Any, str, Any]]:
+        """
+        Kill workers exceeding the timeout or memory ceiling. The timeout only runs while an item is running.
+
+        Returns:
+            list[tuple[Any, str, Any]]: Stopped items.
+        """
+        results = []
+        now = time.monotonic()
+        for w in list(self._workers):
+            if w["task"] is None:
+                continue
+            if (
+                self.timeout is not None
+                and w["current"] is not None
+                and now - w["started"] > self.timeout
+            ):
+                results += self._fail_current(
+                    w, self.TIMEOUT, f"Exceeded wall-clock limit of {self.timeout} s."
+                )
+            elif self.max_memory is not None:
+                rss = get_rss(w["process"].pid)
+                if rss is not None and rss > self.max_memory:
+                    results += self._fail_current(
+                        w,
+                        self.MEMORY,
+                        f"Resident memory {rss} B exceeded limit of {self.max_memory} B.",
+                    )
+        return results
+
+    def _fail_current(self, w: dict, status: str, message: str) -> list[tuple[Any, str, Any]]:
+        """
+        Kill a worker, fail its current item and reschedule the rest of its task.
+
+        Args:
+            w (dict): State of the worker.
+            status (str): Status of the current item.
+            message (str): Description of the failure.
+
+        Returns:
+            list[tuple[Any, str, Any]]: The failed item, if the worker had any left.
+        """
+        task = w["task"]
+        if not task:
+            # the worker died after it finished its task, nothing is lost
+            self._replace_worker(w, kill=True)
+            return []
+
+        # the item was not started yet if the worker died between two items
+        current = w["current"] if w["current"] is not None else task[0][0]
+
+        self._replace_worker(w, kill=True)
+
+        rest = [i for i in task if i[0] != current]
+        if len(rest) > 0:
+            self._queue.appendleft(rest)
+        return [(current, status, message)]
+
+
+def get_rss(pid: int) -> int | None:
+    """
+    Get the resident memory of a process from /proc.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        int | None: Resident memory in bytes, or None if it is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def get_thread_env(n_threads: int) -> dict[str, str]:
+    """
+    Get the environment variables limiting the threads of OpenMP, MKL, OpenBLAS and other
+    numerical libraries. They only take effect if set before the libraries are loaded.
+
+    Args:
+        n_threads (int): Number of threads per process.
+
+    Returns:
+        dict[str, str]: The variables.
+    """
+    names = [
+        "OMP_NUM_THREADS",
+        "MKL_NUM_THREADS",
+        "OPENBLAS_NUM_THREADS",
+        "NUMEXPR_NUM_THREADS",
+        "VECLIB_MAXIMUM_THREADS",
+    ]
+    return {name: str(n_threads) for name in names}
+
+
+def get_cpu_sets(nprocs: int, n_threads: int = 1) -> list[set[int]]:
+    """
+    Split the CPUs available to the current process into disjoint sets, one per worker.
+    If there are too few CPUs, the sets wrap around and overlap.
+
+    Args:
+        nprocs (int): Number of workers.
+        n_threads (int, optional): Number of CPUs per worker. Defaults to 1.
+
+    Returns:
+        list[set[int]]: CPUs of every worker slot.
+    """
+    cpus = sorted(os.sched_getaffinity(0))
+    return [
+        {cpus[(i * n_threads + j) % len(cpus)] for j in range(n_threads)}
+        for i in range(nprocs)
+    ]
+
+
+@contextmanager
+def _update_environ(env: dict[str, str] | None):
+    """
+    Set environment variables of the current process while the context is active.
+
+    Args:
+        env (dict[str, str] | None): The variables, if any.
+    """
+    if env is None:
+        yield
+        return
+
+    previous = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class _PipeQueue:
+    """
+    Minimal queue interface for `logging.handlers.QueueHandler` that sends records to the pool.
+    """
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+
+    def put_nowait(self, record) -> None:
+        self.conn.send(("log", record))
+
+
+_worker_log_queue: _PipeQueue | None = None
+"""Log queue of the current worker process, set by `_worker_main`."""
+
+
+def get_worker_log_queue() -> _PipeQueue | None:
+    """
+    Get the queue through which a worker process of `WorkerPool` sends log records to the pool.
+    Use it with `logging.handlers.QueueHandler`, e.g. in the initializer.
+
+    Returns:
+        _PipeQueue | None: The queue, or None outside of worker processes.
+    """
+    return _worker_log_queue
+
+
+def _worker_main(conn, cpus: set[int] | None, payload: bytes) -> None:
+    """
+    Main loop of a worker process of `WorkerPool`.
+
+    Args:
+        conn (multiprocessing.connection.Connection): Pipe to the parent.
+        cpus (set[int] | None): CPUs the worker is pinned to before anything else, so that the
+            threads started by later imports inherit them. None leaves the affinity unchanged.
+        payload (bytes): Pickled function applied to the arguments of every item, initializer
+            called before the first task, or None, and arguments of the initializer.
+    """
+    global _worker_log_queue
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+
+    fn, initializer, initargs = pickle.loads(payload)
+    _worker_log_queue = _PipeQueue(conn)
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        for key, args in task:
+            conn.send(("start", key))
+            conn.send(("done", key, fn(*args)))
@@ -0,0 +1,44 @@
+def relax_complex(
+    structure: str, charge: int, n_unpaired: int, parameters: dict[str]
+) -> dict[str, dict]:
+    """
+    Relax a given structure with Architector's calculators instead of assembling the complex
+    with build_complex(). Used by `Optimiser` for warm starts if no other backend is set.
+
+    Args:
+        structure (str): Starting geometry in XYZ format.
+        charge (int): Total charge.
+        n_unpaired (int): Number of unpaired electrons.
+        parameters (dict[str]): Settings for Architector, the method is taken from "full_method".
+
+    Raises:
+        RuntimeError: If the relaxation failed.
+
+    Returns:
+        dict[str, dict]: A single conformer "relaxed" with the keys of a build_complex() conformer,
+            "mol2string", "total_charge", "calc_n_unpaired_electrons" and "energy".
+    """
+    # imported here, so the package can be used without Architector
+    from architector.io_calc import CalcExecutor
+    from architector.io_molecule import convert_io_molecule
+
+    mol = convert_io_molecule(structure)
+    mol.charge = charge
+    mol.uhf = n_unpaired
+    calc = CalcExecutor(
+        mol,
+        method=parameters.get("full_method", "GFN2-xTB"),
+        parameters={**parameters, "full_charge": charge, "full_spin": n_unpaired},
+        relax=True,
+    )
+    if not calc.successful:
+        raise RuntimeError("Relaxation failed.")
+
+    return {
+        "relaxed": {
+            "mol2string": calc.mol.write_mol2("relaxed", writestring=True),
+            "total_charge": charge,
+            "calc_n_unpaired_electrons": n_unpaired,
+            "energy": calc.energy,
+        }
+    }
@@ -0,0 +1,325 @@
+from collections import Counter
+from math import comb
+import numpy as np
+
+from .ligand import LigandLibrary
+
+
+class ComplexSampler:
+    """
+    Rejection-free sampler of ligand sets for complexes.
+
+    All denticity compositions (multisets of ligand denticities summing up to the
+    coordination number) are precomputed once per CN from the ligand library. Ligand
+    sets are then drawn in vectorized NumPy batches by first choosing a composition
+    and afterwards a ligand of matching denticity for every slot, hence every drawn
+    ligand fits the remaining coordination sites by construction.
+    """
+
+    def __init__(
+        self,
+        library: LigandLibrary | dict[str, dict],
+        min_CN: int,
+        max_CN: int,
+        rng: np.random.Generator | None = None,
+    ) -> None:
+        """
+        Initializes a `ComplexSampler` instance.
+
+        Args:
+            library (LigandLibrary | dict[str, dict]): Library of available ligands. A dictionary in
+                the format of ligands.json is converted into a `LigandLibrary`.
+            min_CN (int): Minimum coordination number.
+            max_CN (int): Maximum coordination number.
+            rng (np.random.Generator | None, optional): Random number generator. If None, a new one is created.
+
+        Raises:
+            ValueError: If the CN range is empty or a CN cannot be saturated with the given ligands.
+        """
+        if min_CN > max_CN:
+            raise ValueError("min_CN must not be larger than max_CN.")
+
+        self.min_CN = min_CN
+        self.max_CN = max_CN
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        if not isinstance(library, LigandLibrary):
+            library = LigandLibrary(library)
+
+        self.library = library
+        self.keys = library.keys
+        self.groups = library.by_denticity
+
+        # valid compositions and their weights for every CN
+        self.compositions = {}
+        self.weights = {}
+        for cn in range(min_CN, max_CN + 1):
+            comps = self.get_compositions(cn, sorted(self.groups, reverse=True))
+            if len(comps) == 0:
+                raise ValueError(f"No combination of ligands saturates CN={cn}.")
+            weights = np.array([self.count_ligand_sets(c) for c in comps], dtype=float)
+            self.compositions[cn] = comps
+            self.weights[cn] = weights / weights.sum()
+
+    @staticmethod
+    def get_compositions(CN: int, denticities: list[int]) -> list[tuple[int, ...]]:
+        """
+        Get all multisets of denticities that sum up to the coordination number.
+
+        Args:
+            CN (int): Coordination number to saturate.
+            denticities (list[int]): Available denticities in descending order.
+
+        Returns:
+            list[tuple[int, ...]]: Compositions, each given as denticities in descending order.
+        """
+        compositions = []
+
+        def _extend(remaining: int, start: int, current: list[int]) -> None:
+            if remaining == 0:
+                compositions.append(tuple(current))
+                return
+            for i in range(start, len(denticities)):
+                d = denticities[i]
+                if d <= remaining:
+                    _extend(remaining - d, i, current + [d])
+
+        _extend(CN, 0, [])
+        return compositions
+
+    def count_ligand_sets(self, composition: tuple[int, ...]) -> int:
+        """
+        Count the distinct ligand multisets that realise a denticity composition.
+
+        Args:
+            composition (tuple[int, ...]): Denticities of all ligands in the complex.
+
+        Returns:
+            int: Number of distinct ligand multisets.
+        """
+        count = 1
+        for d, m in Counter(composition).items():
+            n = len(self.groups[d])
+            count *= comb(n + m - 1, m)
+        return count
+
+    def sample(self, n: int) -> tuple[np.ndarray, list[tuple[int, ...]]]:
+        """
+        Draw a batch of ligand sets.
+
+        CNs are drawn uniformly from [min_CN, max_CN], compositions proportionally
+        to the number of distinct ligand sets they contain.
+
+        Args:
+            n (int): Number of ligand sets to draw.
+
+        Returns:
+            tuple[np.ndarray, list[tuple[int, ...]]]: Coordination numbers and, for each of them,
+            indices of the drawn ligands into `self.keys`.
+        """
+        cns = self.rng.integers(low=self.min_CN, high=self.max_CN + 1, size=n)
+        ligand_sets = [None] * n
+
+        for cn in np.unique(cns):
+            rows = np.flatnonzero(cns == cn)
+            comps = self.compositions[int(cn)]
+            choice = self.rng.choice(len(comps), size=len(rows), p=self.weights[int(cn)])
+
+            for j in np.unique(choice):
+                comp_rows = rows[choice == j]
+                comp = comps[j]
+                drawn = np.empty((len(comp_rows), len(comp)), dtype=np.int64)
+                for slot, d in enumerate(comp):
+                    group = self.groups[d]
+                    drawn[:, slot] = group[
+                        self.rng.integers(low=0, high=len(group), size=len(comp_rows))
+                    ]
+                for row, ligand_set in zip(comp_rows, drawn.tolist()):
+                    ligand_sets[row] = tuple(ligand_set)
+
+        return cns, ligand_sets
+
+
+class ComplexSpace:
+    """
+    Space of all unique ligand sets for complexes with a coordination number in [min_CN, max_CN].
+
+    Two complexes of the same central atom and oxidation state are identical if they share
+    the CN and the multiset of ligands, as defined by `Complex.get_uid`. The library must not
+    contain duplicate ligand entries, see `LigandLibrary.unique`. Ligand sets are
+    ordered by CN first and then lexicographically by the multiplicities of the library's
+    ligands, which allows counting, streaming and unranking them without rejection.
+    """
+
+    def __init__(self, library: LigandLibrary | dict[str, dict], min_CN: int, max_CN: int) -> None:
+        """
+        Initializes a `ComplexSpace` instance.
+
+        Args:
+            library (LigandLibrary | dict[str, dict]): Library of available ligands. A dictionary in
+                the format of ligands.json is converted into a `LigandLibrary`.
+            min_CN (int): Minimum coordination number.
+            max_CN (int): Maximum coordination number.
+
+        Raises:
+            ValueError: If the CN range is empty.
+        """
+        if min_CN > max_CN:
+            raise ValueError("min_CN must not be larger than max_CN.")
+
+        if not isinstance(library, LigandLibrary):
+            library = LigandLibrary(library)
+
+        self.library = library
+        self.min_CN = min_CN
+        self.max_CN = max_CN
+        self.denticities = library.denticities.tolist()
+
+        # counts[i][r]: number of ligand multisets built from ligands i, i+1, ... with total denticity r
+        n_ligands = len(self.denticities)
+        self.counts = [[0] * (max_CN + 1) for _ in range(n_ligands + 1)]
+        self.counts[n_ligands][0] = 1
+        for i in range(n_ligands - 1, -1, -1):
+            d = self.denticities[i]
+            for r in range(max_CN + 1):
+                self.counts[i][r] = self.counts[i + 1][r] + (
+                    self.counts[i][r - d] if r >= d else 0
+                )
+
+        self.size = sum(self.counts[0][cn] for cn in range(min_CN, max_CN + 1))
+        """Number of unique ligand sets in the space."""
+
+    def count(self, CN: int) -> int:
+        """
+        Get the number of unique ligand sets for a single coordination number.
+
+        Args:
+            CN (int): Coordination number.
+
+        Returns:
+            int: Number of unique ligand sets.
+        """
+        if CN < self.min_CN or CN > self.max_CN:
+            return 0
+        return self.counts[0][CN]
+
+    def __iter__(self):
+        """
+        Stream every unique ligand set in rank order.
+
+        Yields:
+            tuple[int, tuple[int, ...]]: Coordination number and sorted indices of the ligands into `library.keys`.
+        """
+        n_ligands = len(self.denticities)
+
+        def _extend(i: int, remaining: int, current: list[int]):
+            if remaining == 0:
+                yield tuple(current)
+                return
+            if i == n_ligands or self.counts[i][remaining] == 0:
+                return
+            d = self.denticities[i]
+            # multiplicity 0 first, then increasing multiplicities of ligand i
+            yield from _extend(i + 1, remaining, current)
+            for m in range(1, remaining // d + 1):
+                yield from _extend(i + 1, remaining - m * d, current + [i] * m)
+
+        for cn in range(self.min_CN, self.max_CN + 1):
+            for ligand_set in _extend(0, cn, []):
+                yield cn, ligand_set
+
+    def unrank(self, rank: int) -> tuple[int, tuple[int, ...]]:
+        """
+        Get the ligand set at a given position of the rank order.
+
+        Args:
+            rank (int): Position in [0, size).
+
+        Raises:
+            IndexError: If the rank is out of range.
+
+        Returns:
+            tuple[int, tuple[int, ...]]: Coordination number and sorted indices of the ligands into `library.keys`.
+        """
+        if rank < 0 or rank >= self.size:
+            raise IndexError(f"Rank {rank} out of range for space of size {self.size}.")
+
+        for cn in range(self.min_CN, self.max_CN + 1):
+            if rank < self.counts[0][cn]:
+                break
+            rank -= self.counts[0][cn]
+
+        ligand_set = []
+        remaining = cn
+        i = 0
+        while remaining > 0:
+            d = self.denticities[i]
+            m = 0
+            while True:
+                c = self.counts[i + 1][remaining - m * d]
+                if rank < c:
+                    break
+                rank -= c
+                m += 1
+            ligand_set += [i] * m
+            remaining -= m * d
+            i += 1
+
+        return cn, tuple(ligand_set)
+
+    def sample(
+        self, k: int, rng: np.random.Generator | None = None
+    ) -> list[tuple[int, tuple[int, ...]]]:
+        """
+        Draw k distinct ligand sets uniformly without replacement.
+
+        Args:
+            k (int): Number of ligand sets.
+            rng (np.random.Generator | None, optional): Random number generator. If None, a new one is created.
+
+        Raises:
+            ValueError: If k exceeds the size of the space.
+
+        Returns:
+            list[tuple[int, tuple[int, ...]]]: Coordination numbers and sorted ligand indices.
+        """
+        if k > self.size:
+            raise ValueError(
+                f"The requested number of complexes ({k}) exceeds the number of unique complexes ({self.size}) "
+                f"for CN in [{self.min_CN}, {self.max_CN}]."
+            )
+
+        rng = np.random.default_rng() if rng is None else rng
+
+        if self.size < 2**63:
+            ranks = rng.choice(self.size, size=k, replace=False).tolist()
+        else:
+            # Floyd's algorithm on arbitrary precision integers
+            chosen = {}
+            for j in range(self.size - k, self.size):
+                t = _randbelow(rng, j + 1)
+                chosen[j if t in chosen else t] = None
+            ranks = list(chosen)
+
+        return [self.unrank(r) for r in ranks]
+
+
+def _randbelow(rng: np.random.Generator, n: int) -> int:
+    """Draw a uniform random integer from [0, n) for arbitrarily large n.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        n (int): Exclusive upper bound.
+
+    Returns:
+        int: Random integer.
+    """
+    n_bits = n.bit_length()
+    n_words = (n_bits + 31) // 32
+    while True:
+        value = 0
+        for w in rng.integers(0, 2**32, size=n_words, dtype=np.uint64).tolist():
+            value = (value << 32) | w
+        value >>= n_words * 32 - n_bits
+        if value < n:
+            return value
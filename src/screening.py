@@ -0,0 +1,193 @@
+from functools import lru_cache
+import json
+from pathlib import Path
+from pydantic import BaseModel
+import re
+
+from .dataset import Sample, SampleDataset
+from .ligand import Chem
+
+_bracket_atom = re.compile(r"\[([^\]]+)\]")
+_organic_atom = re.compile(r"Cl|Br|[BCNOPSFI]|[bcnops]")
+_charge = re.compile(r"([+-]+)(\d*)$")
+_element = re.compile(r"\d*([A-Z][a-z]?|[a-z]+)")
+
+
+@lru_cache(maxsize=None)
+def get_ligand_descriptors(smiles: str) -> tuple[int, int]:
+    """
+    Get cheap descriptors of a ligand from its SMILES.
+
+    RDKit is used if available, otherwise the SMILES string is parsed directly.
+
+    Args:
+        smiles (str): SMILES of the ligand.
+
+    Returns:
+        tuple[int, int]: Formal charge and number of heavy atoms of the ligand.
+    """
+    mol = Chem.MolFromSmiles(smiles) if Chem is not None else None
+    if mol is not None:
+        return Chem.GetFormalCharge(mol), mol.GetNumHeavyAtoms()
+
+    charge = 0
+    heavy_atoms = 0
+    for atom in _bracket_atom.findall(smiles):
+        match = _charge.search(atom)
+        if match is not None:
+            sign = 1 if match.group(1)[0] == "+" else -1
+            if match.group(2) != "":
+                charge += sign * int(match.group(2))
+            else:
+                charge += sign * len(match.group(1))
+        element = _element.match(atom)
+        if element is None or element.group(1) != "H":
+            heavy_atoms += 1
+
+    heavy_atoms += len(_organic_atom.findall(_bracket_atom.sub("", smiles)))
+    return charge, heavy_atoms
+
+
+def get_sample_descriptors(sample: Sample) -> dict[str, float]:
+    """
+    Compute cheap descriptors of a sample without building the complex.
+
+    Args:
+        sample (Sample): The sample.
+
+    Returns:
+        dict[str, float]: Descriptors
+            - total_charge: central atom oxidation state plus formal charges of all ligands,
+            - heavy_atoms: number of heavy atoms of all ligands,
+            - steric_load: heavy atoms of all ligands per coordination site,
+            - max_ligand_bulk: largest number of heavy atoms per coordination site of a single ligand.
+    """
+    core = sample.core
+    total_charge = sample.parameters["metal_ox"]
+    heavy_atoms = 0
+    max_ligand_bulk = 0.0
+
+    for ligand in sample.ligands:
+        charge, n_heavy = get_ligand_descriptors(ligand["smiles"])
+        total_charge += charge
+        heavy_atoms += n_heavy
+        max_ligand_bulk = max(max_ligand_bulk, n_heavy / len(ligand["coordList"]))
+
+    return {
+        "total_charge": total_charge,
+        "heavy_atoms": heavy_atoms,
+        "steric_load": heavy_atoms / core["coreCN"],
+        "max_ligand_bulk": max_ligand_bulk,
+    }
+
+
+class Rule(BaseModel):
+    """
+    Rejects samples whose descriptor lies outside of [minimum, maximum].
+
+    Initialize via:
+
+    ```python
+    rule = Rule(descriptor="total_charge", minimum=-4, maximum=2)
+    ```
+    """
+
+    descriptor: str
+    """Name of the descriptor, see `get_sample_descriptors`."""
+
+    minimum: float | None = None
+    """Smallest accepted value. None disables the lower bound."""
+
+    maximum: float | None = None
+    """Largest accepted value. None disables the upper bound."""
+
+    def check(self, descriptors: dict[str, float]) -> str | None:
+        """
+        Apply the rule.
+
+        Args:
+            descriptors (dict[str, float]): Descriptors of a sample.
+
+        Returns:
+            str | None: Reason for the rejection, or None if the sample passes.
+        """
+        value = descriptors[self.descriptor]
+        if self.minimum is not None and value < self.minimum:
+            return f"{self.descriptor}={value:g} below minimum {self.minimum:g}"
+        if self.maximum is not None and value > self.maximum:
+            return f"{self.descriptor}={value:g} above maximum {self.maximum:g}"
+        return None
+
+
+class PreScreen:
+    """
+    Cheap pre-screening stage that rejects hopeless samples before any optimisation.
+
+    Initialize via:
+
+    ```python
+    prescreen = PreScreen(
+        [
+            Rule(descriptor="total_charge", minimum=-4, maximum=2),
+            Rule(descriptor="steric_load", maximum=8.0),
+        ]
+    )
+    accepted, rejected = prescreen.split(dataset)
+    ```
+    """
+
+    def __init__(self, rules: list[Rule]) -> None:
+        """
+        Initializes a `PreScreen` instance.
+
+        Args:
+            rules (list[Rule]): Rules every accepted sample has to pass.
+        """
+        self.rules = rules
+
+    def check(self, sample: Sample) -> list[str]:
+        """
+        Apply all rules to a sample.
+
+        Args:
+            sample (Sample): The sample.
+
+        Returns:
+            list[str]: Reasons for the rejection, empty if the sample passes.
+        """
+        descriptors = get_sample_descriptors(sample)
+        reasons = [rule.check(descriptors) for rule in self.rules]
+        return [r for r in reasons if r is not None]
+
+    def split(self, dataset: SampleDataset) -> tuple[SampleDataset, dict[str, list[str]]]:
+        """
+        Split a dataset into accepted and rejected samples.
+
+        Args:
+            dataset (SampleDataset): The dataset to screen.
+
+        Returns:
+            tuple[SampleDataset, dict[str, list[str]]]: Accepted samples and the reasons for every rejected UID.
+        """
+        accepted = SampleDataset([])
+        rejected = {}
+        for sample in dataset:
+            reasons = self.check(sample)
+            if len(reasons) == 0:
+                accepted.add_sample(sample)
+            else:
+                rejected[sample.uid] = reasons
+        return accepted, rejected
+
+    @staticmethod
+    def write_report(rejected: dict[str, list[str]], path: str | Path) -> None:
+        """
+        Save the rejected samples and their reasons in JSON Lines format.
+
+        Args:
+            rejected (dict[str, list[str]]): Reasons for every rejected UID.
+            path (str | Path): Path to the JSONL file.
+        """
+        with open(path, "w") as file:
+            for uid, reasons in rejected.items():
+                file.write(json.dumps({"uid": uid, "reasons": reasons}) + "\n")
@@ -0,0 +1,320 @@
+from copy import deepcopy
+import numpy as np
+
+
+class InternTable:
+    """
+    Table that maps recurring values to small integer IDs and back.
+    """
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self) -> None:
+        self.values = []
+        self._ids = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value) -> int:
+        """
+        Get the ID of a hashable value, adding it to the table if necessary.
+
+        Args:
+            value (Any): Hashable value.
+
+        Returns:
+            int: ID of the value.
+        """
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._ids[value] = idx
+            self.values.append(value)
+        return idx
+
+
+class SampleStore:
+    """
+    Columnar backing store for the samples of a `SampleDataset`.
+
+    Every row is one sample. Central atoms and ligands are interned into the store's
+    `metal_table` and `ligand_table`, which are pickled with it and shared only with the
+    stores created by `take`; CN, oxidation state and spin are kept in NumPy
+    arrays and the ligands of row i are `ligand_ids[ligand_offsets[i]:ligand_offsets[i + 1]]`.
+    Samples whose dictionaries do not follow the schema written by `SampleDataset.generate`
+    are kept verbatim in `extras` and copied on access. Dictionaries are only built on demand.
+    """
+
+    __slots__ = (
+        "uids",
+        "_metal_ids",
+        "_cn",
+        "_ox",
+        "_spin",
+        "_ligand_offsets",
+        "_ligand_ids",
+        "_n_ligands",
+        "extras",
+        "metal_table",
+        "ligand_table",
+    )
+
+    core_keys = frozenset(("metal", "coreCN"))
+    ligand_keys = frozenset(("smiles", "coordList", "ligType"))
+    parameter_keys = frozenset(("metal_ox", "full_spin"))
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        metal_table: InternTable | None = None,
+        ligand_table: InternTable | None = None,
+    ) -> None:
+        """
+        Initializes an empty `SampleStore` instance.
+
+        Args:
+            capacity (int, optional): Number of rows allocated up front. Defaults to 1024.
+            metal_table (InternTable | None, optional): Table of central atom symbols. If None, a new one.
+            ligand_table (InternTable | None, optional): Table of ligands as (smiles, coordList, ligType) tuples.
+                If None, a new one.
+        """
+        self.uids = []
+        self._metal_ids = np.zeros(capacity, dtype=np.int16)
+        self._cn = np.zeros(capacity, dtype=np.int16)
+        self._ox = np.zeros(capacity, dtype=np.int16)
+        self._spin = np.zeros(capacity, dtype=np.int16)
+        self._ligand_offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._ligand_ids = np.zeros(8 * capacity, dtype=np.int32)
+        self._n_ligands = 0
+        # rows stored verbatim as (core, ligands, parameters) tuples
+        self.extras = {}
+        self.metal_table = InternTable() if metal_table is None else metal_table
+        self.ligand_table = InternTable() if ligand_table is None else ligand_table
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    @property
+    def metal_ids(self) -> np.ndarray:
+        """IDs of the central atoms in `metal_table`."""
+        return self._metal_ids[: len(self)]
+
+    @property
+    def cn(self) -> np.ndarray:
+        """Coordination numbers."""
+        return self._cn[: len(self)]
+
+    @property
+    def ox(self) -> np.ndarray:
+        """Oxidation states of the central atoms."""
+        return self._ox[: len(self)]
+
+    @property
+    def spin(self) -> np.ndarray:
+        """Spin multiplicities (2S+1)."""
+        return self._spin[: len(self)]
+
+    @property
+    def ligand_offsets(self) -> np.ndarray:
+        """Offsets of every row's ligands in `ligand_ids`, with one trailing entry."""
+        return self._ligand_offsets[: len(self) + 1]
+
+    @property
+    def ligand_ids(self) -> np.ndarray:
+        """IDs of all rows' ligands in `ligand_table`."""
+        return self._ligand_ids[: self._n_ligands]
+
+    def append(self, uid: str, core: dict, ligands: list[dict], parameters: dict) -> int:
+        """
+        Append a sample given by its dictionaries.
+
+        Args:
+            uid (str): Unique identifier of the sample.
+            core (dict): Core element and core coordination number.
+            ligands (list[dict]): Ligands, each specified via SMILES, coordination list and ligand type.
+            parameters (dict): Central atom oxidation state and total spin.
+
+        Returns:
+            int: Row of the sample.
+        """
+        columnar = (
+            core.keys() == self.core_keys
+            and parameters.keys() == self.parameter_keys
+            and all(l.keys() == self.ligand_keys for l in ligands)
+        )
+        if not columnar:
+            row = self._append_row(uid, 0, 0, 0, 0, [])
+            self.extras[row] = (core, ligands, parameters)
+            return row
+
+        return self._append_row(
+            uid,
+            self.metal_table.intern(core["metal"]),
+            core["coreCN"],
+            parameters["metal_ox"],
+            parameters["full_spin"],
+            [
+                self.ligand_table.intern((l["smiles"], tuple(l["coordList"]), l["ligType"]))
+                for l in ligands
+            ],
+        )
+
+    def append_from(self, other: "SampleStore", row: int) -> int:
+        """
+        Copy a row of another store without building dictionaries.
+        IDs are translated if the other store has its own tables.
+
+        Args:
+            other (SampleStore): Store containing the row.
+            row (int): Row in `other`.
+
+        Returns:
+            int: Row of the copy in this store.
+        """
+        if row in other.extras:
+            new_row = self._append_row(other.uids[row], 0, 0, 0, 0, [])
+            self.extras[new_row] = other.extras[row]
+            return new_row
+
+        start, end = other._ligand_offsets[row], other._ligand_offsets[row + 1]
+        metal_id = other._metal_ids[row]
+        ligand_ids = other._ligand_ids[start:end]
+        if other.metal_table is not self.metal_table:
+            metal_id = self.metal_table.intern(other.metal_table.values[metal_id])
+        if other.ligand_table is not self.ligand_table:
+            ligand_ids = [
+                self.ligand_table.intern(other.ligand_table.values[idx])
+                for idx in ligand_ids.tolist()
+            ]
+        return self._append_row(
+            other.uids[row],
+            metal_id,
+            other._cn[row],
+            other._ox[row],
+            other._spin[row],
+            ligand_ids,
+        )
+
+    def replace(self, row: int, core: dict, ligands: list[dict], parameters: dict) -> None:
+        """
+        Replace the content of a row, keeping its UID.
+
+        Args:
+            row (int): Row to replace.
+            core (dict): Core element and core coordination number.
+            ligands (list[dict]): Ligands, each specified via SMILES, coordination list and ligand type.
+            parameters (dict): Central atom oxidation state and total spin.
+        """
+        self.extras[row] = (core, ligands, parameters)
+
+    def take(self, rows: list[int]) -> "SampleStore":
+        """
+        Create a new store from selected rows.
+
+        Args:
+            rows (list[int]): Rows to copy, in the order of the new store.
+
+        Returns:
+            SampleStore: The new store.
+        """
+        store = SampleStore(
+            capacity=max(len(rows), 1),
+            metal_table=self.metal_table,
+            ligand_table=self.ligand_table,
+        )
+        for row in rows:
+            store.append_from(self, row)
+        return store
+
+    def get_core(self, row: int) -> dict:
+        """
+        Build the core dictionary of a row.
+
+        Args:
+            row (int): Row of the sample.
+
+        Returns:
+            dict: Core element and core coordination number.
+        """
+        if row in self.extras:
+            return deepcopy(self.extras[row][0])
+        return {
+            "metal": self.metal_table.values[self._metal_ids[row]],
+            "coreCN": int(self._cn[row]),
+        }
+
+    def get_ligands(self, row: int) -> list[dict]:
+        """
+        Build the ligand dictionaries of a row.
+
+        Args:
+            row (int): Row of the sample.
+
+        Returns:
+            list[dict]: Ligands, each specified via SMILES, coordination list and ligand type.
+        """
+        if row in self.extras:
+            return deepcopy(self.extras[row][1])
+        start, end = self._ligand_offsets[row], self._ligand_offsets[row + 1]
+        ligands = []
+        for idx in self._ligand_ids[start:end].tolist():
+            smiles, coordList, ligType = self.ligand_table.values[idx]
+            ligands.append(
+                {"smiles": smiles, "coordList": list(coordList), "ligType": ligType}
+            )
+        return ligands
+
+    def get_parameters(self, row: int) -> dict:
+        """
+        Build the parameters dictionary of a row.
+
+        Args:
+            row (int): Row of the sample.
+
+        Returns:
+            dict: Central atom oxidation state and total spin.
+        """
+        if row in self.extras:
+            return deepcopy(self.extras[row][2])
+        return {"metal_ox": int(self._ox[row]), "full_spin": int(self._spin[row])}
+
+    def _append_row(
+        self,
+        uid: str,
+        metal_id: int,
+        cn: int,
+        ox: int,
+        spin: int,
+        ligand_ids: list[int] | np.ndarray,
+    ) -> int:
+        """
+        Append a row to the columns, growing them if necessary.
+
+        Returns:
+            int: Row of the sample.
+        """
+        row = len(self.uids)
+        if row == len(self._cn):
+            for name in ("_metal_ids", "_cn", "_ox", "_spin"):
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+            self._ligand_offsets = np.concatenate(
+                [self._ligand_offsets, np.zeros(row, dtype=np.int64)]
+            )
+
+        n = len(ligand_ids)
+        while self._n_ligands + n > len(self._ligand_ids):
+            self._ligand_ids = np.concatenate(
+                [self._ligand_ids, np.zeros_like(self._ligand_ids)]
+            )
+
+        self.uids.append(uid)
+        self._metal_ids[row] = metal_id
+        self._cn[row] = cn
+        self._ox[row] = ox
+        self._spin[row] = spin
+        self._ligand_ids[self._n_ligands : self._n_ligands + n] = ligand_ids
+        self._n_ligands += n
+        self._ligand_offsets[row + 1] = self._n_ligands
+        return row
@@ -1,18 +1,25 @@
 from collections import Counter
+import os
 import numpy as np
+from pathlib import Path
 from typing import Any
 
 
-def get_random_CN(low: int = 4, high: int = 6) -> int:
+def get_random_CN(
+    low: int = 4, high: int = 6, rng: np.random.Generator | None = None
+) -> int:
     """Get random coordination number from the range [low, high).
 
     Args:
         low (int, optional): Lowest possible coordination number, lower bound of range. Defaults to 4.
         high (int, optional): Minimum impossible coordination number, uppen bound of range. Defaults to 6.
+        rng (np.random.Generator | None, optional): Random number generator. If None, NumPy's global random state is used.
 
     Returns:
         int: Random coordination number from the range [low, high).
     """
+    if rng is not None:
+        return int(rng.integers(low=low, high=high))
     return np.random.randint(low=low, high=high)
 
 
@@ -52,12 +59,35 @@ def split_dict_into_chunks(
     return chunks
 
 
-def read_xyz(file_path: str) -> tuple[list[str], list[tuple[float, float, float]]]:
+def read_xyz(
+    file_path: str, uid: str | None = None
+) -> tuple[list[str], list[tuple[float, float, float]]]:
     """
     Reads an XYZ file and returns the elements and coordinates.
 
     Args:
-        file_path (str): The path to the XYZ file.
+        file_path (str): The path to the XYZ file, or to the folder of a bundle, see `BundleWriter`.
+        uid (str | None, optional): UID of the structure to read from a bundle. Defaults to None.
+
+    Returns:
+        tuple[list[str], list[tuple[float, float, float]]]: A tuple containing a list of elements and a list of coordinates.
+    """
+    if uid is not None:
+        from .bundle import Bundle
+
+        elements, coordinates, _ = Bundle(file_path).read(uid)
+        return elements, coordinates
+
+    with open(file_path, "r") as f:
+        return parse_xyz(f.read())
+
+
+def parse_xyz(content: str) -> tuple[list[str], list[tuple[float, float, float]]]:
+    """
+    Parses a geometry in XYZ format.
+
+    Args:
+        content (str): The content of an XYZ file.
 
     Returns:
         tuple[list[str], list[tuple[float, float, float]]]: A tuple containing a list of elements and a list of coordinates.
@@ -65,30 +95,53 @@ def read_xyz(file_path: str) -> tuple[list[str], list[tuple[float, float, float]
     elements = []
     coordinates = []
 
-    with open(file_path, "r") as f:
-        lines = f.readlines()[
-            2:
-        ]  # Skip the first two lines which usually contain meta-information
-
-        for line in lines:
-            tokens = line.strip().split()
-            if (
-                len(tokens) < 4
-            ):  # Ensure there are enough tokens for an element and coordinates
-                continue
-
-            element, x, y, z = (
-                tokens[0],
-                float(tokens[1]),
-                float(tokens[2]),
-                float(tokens[3]),
-            )
-            elements.append(element)
-            coordinates.append((x, y, z))
+    lines = content.splitlines()[
+        2:
+    ]  # Skip the first two lines which usually contain meta-information
+
+    for line in lines:
+        tokens = line.strip().split()
+        if (
+            len(tokens) < 4
+        ):  # Ensure there are enough tokens for an element and coordinates
+            continue
+
+        element, x, y, z = (
+            tokens[0],
+            float(tokens[1]),
+            float(tokens[2]),
+            float(tokens[3]),
+        )
+        elements.append(element)
+        coordinates.append((x, y, z))
 
     return elements, coordinates
 
 
+def read_conformers(
+    file_path: str, uid: str | None = None
+) -> list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]:
+    """
+    Reads the conformers saved by `Optimiser` with `keep_conformers`, ranked by energy.
+
+    Args:
+        file_path (str): The path to the multi-frame XYZ file, or to the folder of a bundle, see `BundleWriter`.
+        uid (str | None, optional): UID of the sample to read from a bundle. Defaults to None.
+
+    Returns:
+        list[tuple[list[str], list[tuple[float, float, float]], dict[str, str]]]: Elements, coordinates and
+            metadata of every conformer, lowest energy first. The metadata contains the "conformer" name,
+            the "rank", the "energy" and boolean flags if they were reported, and the "charge" and "uhf".
+    """
+    from .bundle import Bundle, parse_frames
+
+    if uid is not None:
+        return Bundle(file_path).read_frames(uid)
+
+    with open(file_path, "r") as f:
+        return parse_frames(f.read())
+
+
 def check_max_one_overlap(list_a: list[str], list_b: list[str]) -> bool:
     """
     Check if at most one element from list_a appears in list_b, and appears only once.
@@ -112,3 +165,56 @@ def check_max_one_overlap(list_a: list[str], list_b: list[str]) -> bool:
             return False
 
     return True
+
+
+def migrate_output_dirs(root: Path, mapping: dict[str, str]) -> list[str]:
+    """
+    Rename output directories named by old UIDs, including mutated ones, to new UIDs.
+
+    Args:
+        root (Path): Folder containing one sub-directory per sample.
+        mapping (dict[str, str]): Old UIDs as keys and new UIDs as values, e.g. from `SampleDataset.migrate_uids`.
+
+    Returns:
+        list[str]: Names of the directories that were not renamed, because the target already exists.
+            These are duplicates of complexes that were optimised more than once.
+    """
+    skipped = []
+    for fp in [f for f in root.iterdir() if f.is_dir()]:
+        old_uid, sep, suffix = fp.name.partition("_mutated_")
+        if old_uid not in mapping:
+            continue
+
+        target = root / f"{mapping[old_uid]}{sep}{suffix}"
+        if target == fp:
+            continue
+        if target.exists():
+            skipped.append(fp.name)
+            continue
+        fp.rename(target)
+
+    return skipped
+
+
+def truncate_incomplete_line(path: Path) -> None:
+    """
+    Remove an incomplete last line, as left behind by an interrupted writer, from a text file.
+
+    Args:
+        path (Path): Path to the file.
+    """
+    with open(path, "rb+") as file:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            file.seek(pos - step)
+            chunk = file.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        if pos != size:
+            file.truncate(pos)
@@ -0,0 +1,304 @@
+import json
+import os
+from pathlib import Path
+import socket
+import threading
+import uuid
+
+from .dataset import SampleDataset
+
+
+class Task:
+    """
+    Chunk of samples leased from a `WorkQueue`.
+    """
+
+    def __init__(
+        self, name: str, dataset: SampleDataset, lease: str | None = None
+    ) -> None:
+        """
+        Initializes a `Task` instance.
+
+        Args:
+            name (str): Name of the task file.
+            dataset (SampleDataset): Samples of the task.
+            lease (str | None, optional): Token of the lease, part of the name of the leased file,
+                see `WorkQueue.get_lease_name`. Defaults to None.
+        """
+        self.name = name
+        self.dataset = dataset
+        self.lease = lease
+
+
+class WorkQueue:
+    """
+    Work queue on a shared file system that many processes on many hosts can pull from.
+
+    Samples are split into task files. A task is leased by renaming its file from `pending/`
+    to `leased/` under a name with a new token, which succeeds for exactly one process. While
+    working, the owner touches the leased file periodically; tasks whose lease was not renewed
+    for `lease_timeout` seconds are moved back to `pending/` by any participant. As every lease
+    has its own file name, a participant that lost its lease can never renew or release the
+    lease of the participant that took the task over. Finished tasks record the
+    status of their samples in `done/`. Only atomic renames are used, which NFS and Lustre
+    provide without relying on file locks, and lease ages are measured against the clock of
+    the file server.
+
+    Initialize in every participant via:
+
+    ```python
+    queue = WorkQueue(Path("queue"), lease_timeout=600)
+    optimiser.run_distributed(queue, dataset)
+    ```
+    """
+
+    def __init__(
+        self, path: Path, lease_timeout: float = 600.0, worker_id: str | None = None
+    ) -> None:
+        """
+        Initializes a `WorkQueue` instance, creating the folders of the queue if necessary.
+
+        Args:
+            path (Path): Folder of the queue on the shared file system.
+            lease_timeout (float, optional): Seconds without heartbeat after which a task is given
+                to another participant. Defaults to 600.0.
+            worker_id (str | None, optional): Name of this participant in logs. Defaults to host name and PID.
+        """
+        self.path = Path(path)
+        self.lease_timeout = lease_timeout
+        self.worker_id = (
+            f"{socket.gethostname()}-{os.getpid()}" if worker_id is None else worker_id
+        )
+        for name in ("pending", "leased", "done", "tmp"):
+            (self.path / name).mkdir(parents=True, exist_ok=True)
+
+    def populate(self, dataset: SampleDataset, chunk_size: int = 100) -> bool:
+        """
+        Fill the queue with the samples of a dataset. Only the first participant to call this
+        fills the queue, all others return immediately. The file `populated` marks a full queue.
+        If the filling participant dies, its lock expires after `lease_timeout` and the next
+        call takes over, skipping tasks that were already written, leased or done.
+
+        Args:
+            dataset (SampleDataset): Samples to be optimised.
+            chunk_size (int, optional): Number of samples per task. Defaults to 100.
+
+        Returns:
+            bool: True if this call filled the queue.
+        """
+        lock_path = self.path / "populate.lock"
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if (self.path / "populated").exists() or not self._is_stale(lock_path):
+                    return False
+                try:
+                    os.unlink(lock_path)
+                except FileNotFoundError:
+                    pass
+        os.write(fd, self.worker_id.encode())
+        os.close(fd)
+
+        for i, start in enumerate(range(0, len(dataset), chunk_size)):
+            name = f"task-{i:08d}.jsonl"
+            if (self.path / "pending" / name).exists():
+                continue
+            leased = any((self.path / "leased").glob(name.replace(".jsonl", ".*")))
+            if leased or (self.path / "done" / name.replace(".jsonl", ".json")).exists():
+                continue
+            tmp_path = self.path / "tmp" / f"{name}.{uuid.uuid4().hex}.jsonl"
+            SampleDataset(dataset[start : start + chunk_size]).write(tmp_path)
+            os.rename(tmp_path, self.path / "pending" / name)
+            # keep the lock alive
+            os.utime(lock_path)
+        (self.path / "populated").touch()
+        return True
+
+    def claim(self) -> Task | None:
+        """
+        Lease the next pending task.
+
+        Returns:
+            Task | None: The leased task, or None if no task is pending.
+        """
+        for name in sorted(os.listdir(self.path / "pending")):
+            pending_path = self.path / "pending" / name
+            lease = uuid.uuid4().hex
+            leased_path = self.path / "leased" / self.get_lease_name(name, lease)
+            try:
+                # renew before the rename, a task that waited longer than the
+                # lease timeout would otherwise be requeued right away
+                os.utime(pending_path)
+                os.rename(pending_path, leased_path)
+                dataset = SampleDataset.read(leased_path)
+            except FileNotFoundError:
+                # leased by another participant, or requeued in between
+                continue
+            return Task(name, dataset, lease)
+        return None
+
+    def heartbeat(self, task: Task) -> bool:
+        """
+        Renew the lease of a task.
+
+        Args:
+            task (Task): The leased task.
+
+        Returns:
+            bool: False if the lease was lost to another participant.
+        """
+        try:
+            os.utime(self.path / "leased" / self.get_lease_name(task.name, task.lease))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, task: Task, status: dict[str, str]) -> None:
+        """
+        Record the results of a task and release its lease. A lease lost to another
+        participant in the meantime is left to that participant.
+
+        Args:
+            task (Task): The leased task.
+            status (dict[str, str]): Status of every sample of the task by UID.
+        """
+        name = task.name.replace(".jsonl", ".json")
+        tmp_path = self.path / "tmp" / f"{name}.{uuid.uuid4().hex}"
+        with open(tmp_path, "w") as file:
+            json.dump({"worker": self.worker_id, "status": status}, file)
+        os.replace(tmp_path, self.path / "done" / name)
+        try:
+            os.unlink(self.path / "leased" / self.get_lease_name(task.name, task.lease))
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self) -> int:
+        """
+        Move tasks with an expired lease back to the queue. Expired leases of finished tasks are removed.
+
+        Returns:
+            int: Number of requeued tasks.
+        """
+        now = self._server_time()
+        n = 0
+        for lease_name in os.listdir(self.path / "leased"):
+            leased_path = self.path / "leased" / lease_name
+            name = self.get_task_name(lease_name)
+            try:
+                if not self._is_stale(leased_path, now):
+                    continue
+                if (self.path / "done" / name.replace(".jsonl", ".json")).exists():
+                    # the owner died after recording the results
+                    os.unlink(leased_path)
+                else:
+                    os.rename(leased_path, self.path / "pending" / name)
+                    n += 1
+            except FileNotFoundError:
+                continue
+        return n
+
+    def is_finished(self) -> bool:
+        """
+        Checks if all tasks are done.
+
+        Returns:
+            bool: True if the queue was populated and no task is pending or leased.
+        """
+        return (
+            (self.path / "populated").exists()
+            and len(os.listdir(self.path / "pending")) == 0
+            and len(os.listdir(self.path / "leased")) == 0
+        )
+
+    def results(self) -> dict[str, str]:
+        """
+        Collect the status of all finished samples.
+
+        Returns:
+            dict[str, str]: Status of every sample by UID.
+        """
+        status = {}
+        for fp in sorted((self.path / "done").iterdir()):
+            with open(fp, "r") as file:
+                status.update(json.load(file)["status"])
+        return status
+
+    def start_heartbeat(self, task: Task) -> threading.Event:
+        """
+        Renew the lease of a task in a background thread until the returned event is set.
+
+        Args:
+            task (Task): The leased task.
+
+        Returns:
+            threading.Event: Set it to stop the heartbeat.
+        """
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_timeout / 3):
+                self.heartbeat(task)
+
+        threading.Thread(target=beat, daemon=True).start()
+        return stop
+
+    @staticmethod
+    def get_lease_name(name: str, lease: str | None) -> str:
+        """
+        Get the name of the file of a leased task.
+
+        Args:
+            name (str): Name of the task file, e.g. "task-00000000.jsonl".
+            lease (str | None): Token of the lease. None for leases without token.
+
+        Returns:
+            str: The name with the token before the extension, e.g. "task-00000000.<token>.jsonl".
+        """
+        if lease is None:
+            return name
+        return name.replace(".jsonl", f".{lease}.jsonl")
+
+    @staticmethod
+    def get_task_name(lease_name: str) -> str:
+        """
+        Get the name of a task from the name of its leased file, see `get_lease_name`.
+
+        Args:
+            lease_name (str): Name of the leased file.
+
+        Returns:
+            str: Name of the task file.
+        """
+        return f"{lease_name.split('.')[0]}.jsonl"
+
+    def _is_stale(self, path: Path, now: float | None = None) -> bool:
+        """
+        Checks if a lease or lock file was not renewed for `lease_timeout` seconds.
+
+        Args:
+            path (Path): Path to the file.
+            now (float | None, optional): Current time of the file server. Defaults to None.
+
+        Returns:
+            bool: True if the file is stale, False if it is fresh or does not exist.
+        """
+        now = self._server_time() if now is None else now
+        try:
+            return now - path.stat().st_mtime > self.lease_timeout
+        except FileNotFoundError:
+            return False
+
+    def _server_time(self) -> float:
+        """
+        Get the current time of the file server, so hosts with skewed clocks agree on lease ages.
+
+        Returns:
+            float: Current time in seconds since the epoch.
+        """
+        probe = self.path / "tmp" / f"clock.{self.worker_id}"
+        probe.touch()
+        now = probe.stat().st_mtime
+        probe.unlink()
+        return now
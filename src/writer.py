@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+
+class OutputWriter:
+    """
+    Background thread that performs the file system writes of a producer in batches.
+
+    Items are passed through a bounded queue. `put` blocks while the queue is full, so a
+    producer that outpaces the file system is slowed down to its speed instead of buffering
+    without limit. The thread takes all queued items at once, up to `batch_size`, and hands
+    them to `write_batch`. The outcome of every item is collected by the producer with
+    `get_finished`, so all bookkeeping stays in the producer's thread.
+
+    Use as context manager:
+
+    ```python
+    with OutputWriter(write_batch, max_queue=1000, batch_size=100) as writer:
+        writer.put(key, item)
+        for key, context, error, seconds in writer.get_finished():
+            ...
+    ```
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[tuple[Any, Any]]], dict[Any, str]],
+        max_queue: int = 1000,
+        batch_size: int = 100,
+    ) -> None:
+        """
+        Initializes an `OutputWriter` instance and starts the thread.
+
+        Args:
+            write_batch (Callable[[list[tuple[Any, Any]]], dict[Any, str]]): Writes a list of keys and items
+                and returns a description of the failure by key for items that could not be written.
+                If it raises, all items of the batch fail.
+            max_queue (int, optional): Number of queued items at which `put` blocks. Defaults to 1000.
+            batch_size (int, optional): Maximum number of items per call of `write_batch`. Defaults to 100.
+        """
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._finished = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def put(self, key: Any, item: Any, context: Any = None) -> None:
+        """
+        Queue an item, waiting while the queue is full.
+
+        Args:
+            key (Any): Key identifying the item.
+            item (Any): The item, passed to `write_batch`.
+            context (Any, optional): Returned with the outcome of the item by `get_finished`. Defaults to None.
+        """
+        self._queue.put((key, item, context))
+
+    def get_finished(self) -> list[tuple[Any, Any, str | None, float]]:
+        """
+        Collect the items written since the last call, without waiting.
+
+        Returns:
+            list[tuple[Any, Any, str | None, float]]: Key, context, description of the failure or None on success,
+                and the share of the batch's write time in seconds of every item.
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self._finished.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def close(self) -> None:
+        """
+        Write all queued items and stop the thread. Outcomes remain available from `get_finished`.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        """
+        Main loop of the thread.
+        """
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if len(batch) > 0:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple[Any, Any, Any]]) -> None:
+        """
+        Write a batch and report the outcome of its items.
+
+        Args:
+            batch (list[tuple[Any, Any, Any]]): Key, item and context of every item.
+        """
+        start = time.perf_counter()
+        try:
+            errors = self.write_batch([(key, item) for key, item, _ in batch])
+        except Exception as e:
+            errors = {key: f"Error writing output: {e}" for key, _, _ in batch}
+        seconds = (time.perf_counter() - start) / len(batch)
+
+        for key, _, context in batch:
+            self._finished.put((key, context, errors.get(key), seconds))
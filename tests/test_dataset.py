@@ -0,0 +1,63 @@
+import pickle
+
+import pytest
+
+from src.dataset import Sample, SampleDataset
+
+
+def make_sample(uid: str, metal: str, smiles: str) -> Sample:
+    return Sample(
+        uid,
+        {"metal": metal, "coreCN": 1},
+        [{"smiles": smiles, "coordList": [0], "ligType": "mono"}],
+        {"metal_ox": 3, "full_spin": 0},
+    )
+
+
+def test_samples_cannot_be_modified():
+    dataset = SampleDataset([make_sample("a", "La", "[O-]")])
+    with pytest.raises(AttributeError):
+        dataset.samples.append(make_sample("b", "La", "[Cl-]"))
+    assert len(dataset) == 1
+
+
+def test_samples_keep_content_across_stores():
+    first = SampleDataset([make_sample("a", "La", "[O-]"), make_sample("b", "Ce", "[Cl-]")])
+    second = SampleDataset([make_sample("c", "Ce", "[Br-]"), make_sample("d", "La", "[O-]")])
+
+    # views of one store are copied into another store with its own IDs
+    merged = SampleDataset([first[1], second[0], first[0]])
+    merged.remove_samples(["c"])
+    restored = pickle.loads(pickle.dumps(merged))
+
+    for dataset in (merged, restored):
+        assert [s.to_dict() for s in dataset] == [
+            make_sample("b", "Ce", "[Cl-]").to_dict(),
+            make_sample("a", "La", "[O-]").to_dict(),
+        ]
+    assert len(merged._store.metal_table) == 2
+    assert len(second._store.ligand_table) == 2
+
+
+def test_edits_of_samples_persist():
+    dataset = SampleDataset(
+        [
+            make_sample("a", "La", "[O-]"),
+            Sample("b", {"metal": "Ce"}, [], {"metal_ox": 3}),
+        ]
+    )
+    sample = dataset[0]
+    sample.parameters["full_spin"] = 2
+    sample.ligands[0]["coordList"].append(1)
+    assert sample.parameters["full_spin"] == 2
+    assert sample.ligands[0]["coordList"] == [0, 1]
+
+    # samples stored verbatim are copied, the dataset is unchanged
+    extra = dataset[1]
+    extra.core["coreCN"] = 5
+    assert extra.core == {"metal": "Ce", "coreCN": 5}
+    assert dataset[0].parameters["full_spin"] == 0
+    assert dataset[1].core == {"metal": "Ce"}
+
+    dataset.add_sample(sample, overwrite=True)
+    assert dataset[0].parameters["full_spin"] == 2
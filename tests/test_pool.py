@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from src.pool import WorkerPool
+
+
+def double(x: int) -> int:
+    return 2 * x
+
+
+def crash_on(x: int, bad: int) -> int:
+    if x == bad:
+        os._exit(1)
+    return x
+
+
+def crash_after_task(x: int, last: int) -> int:
+    # dies shortly after the result of the last item was sent
+    if x == last:
+        threading.Timer(0.1, os._exit, (1,)).start()
+    return x
+
+
+def sleep_on(x: int, bad: int) -> int:
+    if x == bad:
+        time.sleep(60)
+    return x
+
+
+def allocate_on(x: int, bad: int) -> int:
+    if x == bad:
+        data = b"x" * (512 * 2**20)
+        time.sleep(60)
+        return len(data)
+    return x
+
+
+def get_pid(x: int) -> int:
+    return os.getpid()
+
+
+def run(pool: WorkerPool, tasks: list[list[tuple]]) -> dict:
+    for task in tasks:
+        pool.submit(task)
+    results = {}
+    while pool.pending > 0:
+        for key, status, result in pool.wait():
+            results[key] = (status, result)
+    return results
+
+
+def test_results():
+    with WorkerPool(double, nprocs=2, poll_interval=0.05) as pool:
+        results = run(pool, [[(i, (i,)) for i in range(3)], [(i, (i,)) for i in range(3, 5)]])
+    assert results == {i: (WorkerPool.OK, 2 * i) for i in range(5)}
+
+
+def test_crash_reschedules_rest_of_task():
+    with WorkerPool(crash_on, nprocs=1, poll_interval=0.05) as pool:
+        results = run(pool, [[(i, (i, 1)) for i in range(4)]])
+    assert results[1][0] == WorkerPool.CRASHED
+    assert {k: v for k, v in results.items() if k != 1} == {
+        i: (WorkerPool.OK, i) for i in (0, 2, 3)
+    }
+
+
+def test_crash_after_last_item_keeps_result():
+    with WorkerPool(crash_after_task, nprocs=1, poll_interval=0.05) as pool:
+        pool.submit([(0, (0, 1)), (1, (1, 1))])
+        # the result of the last item and the end of the pipe arrive together
+        time.sleep(0.5)
+        results = run(pool, [])
+        assert results == {0: (WorkerPool.OK, 0), 1: (WorkerPool.OK, 1)}
+
+        # the replaced worker takes the next task
+        assert run(pool, [[(2, (2, 1))]]) == {2: (WorkerPool.OK, 2)}
+
+
+def test_timeout():
+    with WorkerPool(sleep_on, nprocs=1, timeout=0.5, poll_interval=0.05) as pool:
+        start = time.monotonic()
+        results = run(pool, [[(i, (i, 1)) for i in range(3)]])
+    assert time.monotonic() - start < 10
+    assert results[1][0] == WorkerPool.TIMEOUT
+    assert results[0] == (WorkerPool.OK, 0)
+    assert results[2] == (WorkerPool.OK, 2)
+
+
+def test_timeout_ignores_idle_time():
+    with WorkerPool(double, nprocs=1, timeout=0.5, poll_interval=0.05) as pool:
+        assert run(pool, [[(0, (0,))]]) == {0: (WorkerPool.OK, 0)}
+        time.sleep(1)
+        assert run(pool, [[(1, (1,))]]) == {1: (WorkerPool.OK, 2)}
+
+
+def test_memory():
+    with WorkerPool(
+        allocate_on, nprocs=1, max_memory=256 * 2**20, poll_interval=0.05
+    ) as pool:
+        results = run(pool, [[(i, (i, 1)) for i in range(3)]])
+    assert results[1][0] == WorkerPool.MEMORY
+    assert results[0] == (WorkerPool.OK, 0)
+    assert results[2] == (WorkerPool.OK, 2)
+
+
+def test_recycling():
+    with WorkerPool(get_pid, nprocs=1, max_tasks_per_worker=2, poll_interval=0.05) as pool:
+        pids = [run(pool, [[(i, (i,))]])[i][1] for i in range(4)]
+    assert pids[0] == pids[1]
+    assert pids[2] == pids[3]
+    assert pids[0] != pids[2]
@@ -0,0 +1,164 @@
+import os
+import time
+
+from src.dataset import Sample, SampleDataset
+from src.lazy import LazySampleDataset
+from src.workqueue import WorkQueue
+
+
+def make_dataset(n: int) -> SampleDataset:
+    return SampleDataset(
+        [
+            Sample(
+                f"uid{i}",
+                {"metal": "La", "coreCN": 1},
+                [{"smiles": "[O-]", "coordList": [0], "ligType": "mono"}],
+                {"metal_ox": 3, "full_spin": 0},
+            )
+            for i in range(n)
+        ]
+    )
+
+
+def age(path, seconds: float) -> None:
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_populate_claim_complete(tmp_path):
+    queue = WorkQueue(tmp_path, lease_timeout=60)
+    assert queue.populate(make_dataset(5), chunk_size=2)
+    assert not queue.populate(make_dataset(5), chunk_size=2)
+
+    status = {}
+    while (task := queue.claim()) is not None:
+        assert queue.heartbeat(task)
+        queue.complete(task, {s.uid: "success" for s in task.dataset})
+        status.update({s.uid: "success" for s in task.dataset})
+
+    assert len(status) == 5
+    assert queue.results() == status
+    assert queue.is_finished()
+
+
+def test_populate_from_lazy_dataset(tmp_path):
+    make_dataset(5).write(tmp_path / "samples.jsonl")
+    lazy = LazySampleDataset(tmp_path / "samples.jsonl")
+    assert [s.uid for s in lazy[1:4]] == ["uid1", "uid2", "uid3"]
+
+    queue = WorkQueue(tmp_path / "queue", lease_timeout=60)
+    assert queue.populate(lazy, chunk_size=2)
+    uids = []
+    while (task := queue.claim()) is not None:
+        uids.extend(s.uid for s in task.dataset)
+        queue.complete(task, {})
+    assert uids == [f"uid{i}" for i in range(5)]
+
+
+def test_claim_renews_long_pending_task(tmp_path, monkeypatch):
+    queue = WorkQueue(tmp_path, lease_timeout=60, worker_id="a")
+    other = WorkQueue(tmp_path, lease_timeout=60, worker_id="b")
+    queue.populate(make_dataset(2), chunk_size=2)
+    age(tmp_path / "pending" / "task-00000000.jsonl", 3600)
+
+    # another participant requeues expired tasks right after the rename
+    rename = os.rename
+    requeued = []
+
+    def rename_then_requeue(src, dst):
+        rename(src, dst)
+        if "leased" in str(dst):
+            requeued.append(other.requeue_expired())
+
+    monkeypatch.setattr(os, "rename", rename_then_requeue)
+    task = queue.claim()
+    monkeypatch.setattr(os, "rename", rename)
+
+    assert task is not None
+    assert requeued == [0]
+    assert queue.heartbeat(task)
+
+
+def test_claim_skips_vanished_task(tmp_path, monkeypatch):
+    queue = WorkQueue(tmp_path, lease_timeout=60)
+    queue.populate(make_dataset(4), chunk_size=2)
+
+    listdir = os.listdir
+    monkeypatch.setattr(
+        os, "listdir", lambda path: ["task-0.jsonl"] + listdir(path)
+    )
+    task = queue.claim()
+    assert task is not None
+    assert task.name == "task-00000000.jsonl"
+
+
+def test_lost_lease_is_not_renewed_or_released(tmp_path):
+    queue_a = WorkQueue(tmp_path, lease_timeout=60, worker_id="a")
+    queue_b = WorkQueue(tmp_path, lease_timeout=60, worker_id="b")
+    queue_a.populate(make_dataset(2), chunk_size=2)
+
+    task_a = queue_a.claim()
+    (leased_path,) = (tmp_path / "leased").iterdir()
+    age(leased_path, 3600)
+    assert queue_b.requeue_expired() == 1
+    task_b = queue_b.claim()
+    assert task_b.name == task_a.name
+
+    assert not queue_a.heartbeat(task_a)
+    queue_a.complete(task_a, {"uid0": "success", "uid1": "success"})
+    assert queue_b.heartbeat(task_b)
+    assert not queue_b.is_finished()
+
+    queue_b.complete(task_b, {"uid0": "success", "uid1": "success"})
+    assert queue_b.is_finished()
+
+
+def test_expired_lease_of_finished_task_is_removed(tmp_path):
+    queue = WorkQueue(tmp_path, lease_timeout=60)
+    queue.populate(make_dataset(2), chunk_size=2)
+    task = queue.claim()
+
+    # results recorded, but the owner died before releasing the lease
+    (leased_path,) = (tmp_path / "leased").iterdir()
+    (tmp_path / "done" / "task-00000000.json").write_text(
+        '{"worker": "a", "status": {}}'
+    )
+    age(leased_path, 3600)
+
+    assert queue.requeue_expired() == 0
+    assert not leased_path.exists()
+    assert queue.is_finished()
+    assert queue.claim() is None
+    assert not queue.heartbeat(task)
+
+
+def test_populate_skips_pending_leased_and_done_tasks(tmp_path, monkeypatch):
+    queue = WorkQueue(tmp_path, lease_timeout=60)
+    queue.populate(make_dataset(8), chunk_size=2)
+    task = queue.claim()
+    queue.complete(queue.claim(), {})
+    pending_path = tmp_path / "pending" / "task-00000002.jsonl"
+    inode = pending_path.stat().st_ino
+
+    # a participant taking over populating after a crash
+    (tmp_path / "populated").unlink()
+    (tmp_path / "pending" / "task-00000003.jsonl").unlink()
+    age(tmp_path / "populate.lock", 3600)
+    rename = os.rename
+    renamed = []
+
+    def record_rename(src, dst):
+        renamed.append(os.path.basename(dst))
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", record_rename)
+    assert queue.populate(make_dataset(8), chunk_size=2)
+    monkeypatch.setattr(os, "rename", rename)
+
+    assert renamed == ["task-00000003.jsonl"]
+    assert pending_path.stat().st_ino == inode
+    assert sorted(os.listdir(tmp_path / "pending")) == [
+        "task-00000002.jsonl",
+        "task-00000003.jsonl",
+    ]
+    assert queue.heartbeat(task)